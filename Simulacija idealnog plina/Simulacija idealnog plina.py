@@ -1,9 +1,18 @@
 import pygame
 import sys
-import numpy as np
 import os
-from matplotlib import pyplot as plt
+import time
 import math 
+import numpy as np
+import domena
+import eksperiment
+import fizika
+import grafovi
+import profiliranje
+import raspored
+import snimanje
+import spremanje
+import termostati
 
 
 
@@ -43,212 +52,339 @@ class Gumb:
 
 
 
-
-class IdealGasSimulation:
-    def __init__(self, N, molar_mass, radius, screen_width, screen_height, v0, duration, nsteps, border_rect, hard, admin):
-        self.N = N  # Number of particles
-        self.M = molar_mass  # Molarna masa u kg/mol
-        self.radius = radius  # Radius
-        self.screen_width = screen_width   # Duljina ekrana
-        self.duration = duration  # Trajanje (s)
-        self.nsteps = nsteps  # Broj intervala
-        self.dt = duration / nsteps  # Interval (s)
-        self.dt_array = np.full((self.N, 1), self.dt)
-        self.v0 = v0  # Početna brzina čestica koja zbog preglednosti simulacije služi kao Temperatura
-        self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M) #Prava brzina po računu u m/s 
-        self.border_rect = border_rect  # Border rectangle (x, y, širina, visina)
-        self.pressure = 1 #Tlak za simulaciju u atm
-        self.volume = float(float(border_rect[2]) * float(border_rect[3])) / 1000 #Volumen za simulaciju u L
-        
-        self.hard = hard #Određuje je li čvrst ili osjetljiv cilindar
-        self.admin = admin #Dozvoljava input
-        
-        #Liste za graf
-        self.lista_volume = [self.volume/1000]
-        self.lista_pressure = [self.pressure]
-        self.lista_temperatura = [self.v0]
-
-
-
-        self.k_N = ((self.volume/1000) * (self.pressure*101325) * 6.022 * (10**23)) / (8.314*self.v0 * self.N) #Za realan broj čestica, tj. nalik na mjernu jedinicu.
+#Gumbi u simulaciji: slika, pozicija, tekst, font
+GUMBI = {
+    "BACK_BUTTON": (None, (1400, 700), "NAZAD", "test"),
+    "RESET_BUTTON": (None, (1200, 700), "RESET", "test"),
+    "GRAPH_BUTTON": (None, (800, 750), "Graf", "test"),
+    "VELOCITY_INPUT": (None, (1150, 150), None, "test"),
+    "VELOCITY_INCREASE": ("Increase_button.png", (1430, 120), "Povećaj +100     ", "small"),
+    "VELOCITY_DECREASE": ("Decrease_button.png", (1430, 180), "Smanji -100     ", "small"),
+    "PARTICLE_INPUT": (None, (1150, 300), None, "test"),
+    "PARTICLE_INCREASE": ("Increase_button.png", (1430, 270), "Povećaj +10       ", "small"),
+    "PARTICLE_DECREASE": ("Decrease_button.png", (1430, 330), "Smanji -10       ", "small"),
+    "RADIUS_INPUT": (None, (150, 100), None, "test"),
+    "VELOCITY_PRESENTED": (None, (800, 100), None, "test"),
+    "VOLUME_INPUT": (None, (1150, 450), None, "test"),
+    "VOLUME_INCREASE": ("Increase_button.png", (1430, 420), "Povećaj +25      ", "small"),
+    "VOLUME_DECREASE": ("Decrease_button.png", (1430, 480), "Smanji -25      ", "small"),
+    "PRESSURE_INPUT": (None, (1150, 600), None, "test"),
+}
+
+#Polja koja admin može upisati: gumb -> (parametar za eksperiment.set_parameter, tekst ispred vrijednosti)
+UNOSI = {
+    "VELOCITY_INPUT": ("v0", "Temperatura: "),
+    "PARTICLE_INPUT": ("N", "Čestice: "),
+    "RADIUS_INPUT": ("radius", "Radius: "),
+    "VOLUME_INPUT": ("volume", "Volumen: "),
+    "PRESSURE_INPUT": ("pressure", "Tlak: "),
+}
+#Granice upisanih vrijednosti u prikazu (pokusi iz datoteke ih nemaju)
+GRANICE_UNOSA = {"v0": (1, 1000), "N": (1, 200)}
+
+BOJA_POZADINE = (195, 195, 195)
+DIREKTORIJ = os.path.dirname(os.path.abspath(__file__)) #Slike se traže uz program, ne u trenutnom direktoriju
+SPREMLJENO = "spremljeno.plin" #Datoteka za F5/F9
+
+
+
+
+#Pygame prikaz, samo čita stanje iz fizika.IdealGasSimulation i crta ga
+class Prikaz:
+    def __init__(self, sim, screen_width, screen_height, threaded=False, physics_rate=None, profiler=None, autosave=None):
+        self.sim = sim
+        self.autosave = autosave #Sekunde između automatskih spremanja u SPREMLJENO (None = isključeno)
+        self.threaded = threaded #Računa fiziku u posebnoj dretvi
+        self.physics_rate = physics_rate #Intervala u sekundi za dretvu (None = najbrže moguće)
+        self.physics = None
+        self.grafovi = grafovi.LivePlot() #Grafovi u zasebnom procesu
+        self.profiler = profiler if profiler is not None else profiliranje.Profiler() #Vremena po frameu (F3), isključeno dok se ne zatraži
+        self.stari_overlay = None
+        self.overlay_font = None
+        self.unos = None #[gumb, upisani tekst] dok admin upisuje vrijednost; simulacija za to vrijeme ne staje
 
         # Pokrene pygame sučelje
-        pygame.init()
+        init_display()
         self.screen = pygame.display.set_mode((screen_width - 10, screen_height - 50), pygame.RESIZABLE)
         pygame.display.set_caption("Ideal Gas Simulation")
 
-        # Stvara nasumična mjesta
-        grid_size = int(np.ceil(np.sqrt(N)))  # Koristi za stvaranje čestica unutar granica
-        spacing = min((self.screen_width  - border_rect[2]) / grid_size, (self.screen_width  - border_rect[3]) / grid_size)  # Popravlja kako bi stale unutar granica
-        x = np.linspace(border_rect[0] + radius + spacing / 2, border_rect[0] + border_rect[2] - radius - spacing / 2, grid_size)
-        y = np.linspace(border_rect[1] + radius + spacing / 2, border_rect[1] + border_rect[3] - radius - spacing / 2, grid_size)
-        pos = [(xi, yi) for xi in x for yi in y]
-
-        self.position = np.array(pos[:N])  # Uzima stvorene pozicije
-        
-        #Stvara kuteve pod kojim se kreću i njihove brzine
-        Kutevi = np.random.uniform(0, 2 * np.pi, size=self.N)
-        vx, vy = self.v0 * np.cos(Kutevi), self.v0 * np.sin(Kutevi)
-        self.v = np.stack((vx, vy), axis=1)
-
-
-
-
-    def check_collisions(self):
-        """Provjerava kada se sudare čestice ili kada udare o zid"""
-        dt_array = np.full((self.N, 1), self.dt)  
-        r_next = self.position + self.v * dt_array
-
-        # Gleda kad se sudare sa zidom
-        self.v[r_next[:, 0] < self.border_rect[0] + self.radius, 0] *= -1  # S lijevim
-        self.v[r_next[:, 0] > self.border_rect[0] + self.border_rect[2] - self.radius, 0] *= -1  # Desnim
-        self.v[r_next[:, 1] < self.border_rect[1] + self.radius, 1] *= -1  # Gornjim
-        self.v[r_next[:, 1] > self.border_rect[1] + self.border_rect[3] - self.radius, 1] *= -1  # Donjim
-
-        # Gleda kad se međusobno sudare čestice
-        for i in range(self.N):
-            for j in range(i + 1, self.N):
-                if np.linalg.norm(r_next[i] - r_next[j]) < 2 * self.radius:
-                    rdiff = self.position[i] - self.position[j]  # Vektor za česticu [i] i česticu [j]
-                    vdiff = self.v[i] - self.v[j]
-                    self.v[i] = self.v[i] - rdiff.dot(vdiff) / rdiff.dot(rdiff) * rdiff  # Vraća brzinu za česticu [i]
-                    self.v[j] = self.v[j] + rdiff.dot(vdiff) / rdiff.dot(rdiff) * rdiff  # Vraća brzinu za česticu [j]
-
-
-
-
-
-
-
-
-    def step(self):
-        """Izračunava položaje u sljedećem intervalu"""
-        self.check_collisions()
-        self.position += self.v * self.dt
-
-    def draw_particles(self):
-        """Crta čestice"""
-        self.screen.fill((195, 195, 195))
-        
-
-        for particle_pos in self.position:
-            if math.isnan(particle_pos[0]) or math.isnan(particle_pos[1]): #Provjerava jesu li sve pozicije brojevi
-                next 
-            else:
-                pygame.draw.circle(self.screen, (0, 0, 0), (int(particle_pos[0]), int(particle_pos[1])), self.radius) #Crta čestice po pozicijama
-
-        pygame.draw.rect(self.screen, (0, 0, 0), self.border_rect, 2)  # Crta granicu
-
-        #Gumbi
-        BACK_BUTTON = Gumb(None, (1400, 700), "NAZAD", test_font, "Black", "White")
-        RESET_BUTTON = Gumb(None, (1200, 700), "RESET", test_font, "Black", "White")
-        GRAPH_BUTTON = Gumb(None, (800, 750), "Graf", test_font, "Black", "White")
-        VELOCITY_INPUT = Gumb(None, (1150, 150), "Temperatura: " + str(self.v0)+"K", test_font, "Black", "White")
-        VELOCITY_INCREASE = Gumb(pygame.image.load("Increase_button.png"), (1430, 120), "Povećaj +100     ", small_font, "Black", "White")
-        VELOCITY_DECREASE = Gumb(pygame.image.load("Decrease_button.png"), (1430, 180), "Smanji -100     ", small_font, "Black", "White")
-        PARTICLE_INPUT = Gumb(None, (1150, 300), "Čestice: " + str(self.N), test_font, "Black", "White")
-        PARTICLE_INCREASE = Gumb(pygame.image.load("Increase_button.png"), (1430, 270), "Povećaj +10       ", small_font, "Black", "White")
-        PARTICLE_DECREASE = Gumb(pygame.image.load("Decrease_button.png"), (1430, 330), "Smanji -10       ", small_font, "Black", "White")
-        RADIUS_INPUT = Gumb(None, (150, 100), "Radius: " + str(self.radius), test_font, "Black", "White")
-        VELOCITY_PRESENTED = Gumb(None, (800, 100), "Brzina: " + str(round(self.brzina_graf,4)) + "m/s", test_font, "Black", "White")
-        VOLUME_INPUT = Gumb(None, (1150, 450), "Volumen: " + str(round(self.volume,3)) +"L", test_font, "Black", "White")
-        VOLUME_INCREASE = Gumb(pygame.image.load("Increase_button.png"), (1430, 420), "Povećaj +25      ", small_font, "Black", "White")
-        VOLUME_DECREASE = Gumb(pygame.image.load("Decrease_button.png"), (1430, 480), "Smanji -25      ", small_font, "Black", "White")
-        PRESSURE_INPUT = Gumb(None, (1150, 600), "Tlak: " + str(round(float(self.pressure),3)) + "atm", test_font, "Black", "White")
-        
-        
-        MENU_MOUSE_POS = pygame.mouse.get_pos()  
-        # Updeta promjene na gumbima i mijenja njihovu boju
-        for gumb in [BACK_BUTTON, RESET_BUTTON, GRAPH_BUTTON, VELOCITY_INPUT, VELOCITY_INCREASE, VELOCITY_DECREASE, PARTICLE_INPUT, PARTICLE_INCREASE, PARTICLE_DECREASE, RADIUS_INPUT, VELOCITY_PRESENTED, VOLUME_INPUT, VOLUME_INCREASE, VOLUME_DECREASE, PRESSURE_INPUT]:
-            gumb.changeColor(MENU_MOUSE_POS)
-            gumb.update(self.screen)
-
-
-
-        pygame.display.flip() 
-        
-
-
-
-
-
-
-
-
-
-
-    def add_particles(self, new_N):
-        """Nadodava i miče čestice."""
-        if new_N > self.N:
-            new_positions = []
-            min_distance = 15  # Minimalni razmak čestica pri stvaranju
-
-            while len(new_positions) < new_N - self.N:
-                #Generira nasumične položaje za nove čestice
-                new_position = np.random.uniform(
-                    (self.border_rect[0] + self.radius, self.border_rect[1] + self.radius),
-                    (self.border_rect[0] + self.border_rect[2] - self.radius, self.border_rect[1] + self.border_rect[3] - self.radius),
-                    size=(1, 2)
-                )
-                
-                #Gleda preklapaju li se čestice s postojećim + minimalni razmak
-                if (not any(np.linalg.norm(new_position - p) < 2 * self.radius + min_distance for p in self.position) and
-                        all(np.linalg.norm(new_position - p) >= min_distance for p in new_positions)):
-                    new_positions.append(new_position[0])
-
-            #Povezuje nove pozicije i brzine
-            self.position = np.concatenate([self.position, np.array(new_positions)], axis=0)
-            self.v = np.concatenate([self.v, np.random.uniform(-self.v0, self.v0, size=(len(new_positions), 2))], axis=0)
-        elif new_N < self.N:
-            # Smanji broj čestica
-            self.position = self.position[:new_N]
-            self.v = self.v[:new_N]
-        self.N = new_N
-        global Kutevi
-        Kutevi = np.random.uniform(0, 2 * np.pi, size=self.N)
-
-
-
-
-
-
+        # Slike se učitavaju samo jednom
+        self.slike = {}
+        for slika, _, _, _ in GUMBI.values():
+            if slika is not None and slika not in self.slike:
+                self.slike[slika] = pygame.image.load(os.path.join(DIREKTORIJ, slika)).convert_alpha()
+
+        self.hud = None  # Pozadina s gumbima, mijenja se samo kad se promijeni neki gumb
+        self.gumbi = {}
+        self.stanje_gumba = {}
+        self.sprite = None  # Unaprijed nacrtana čestica
+        self.sprite_radius = None
+        self.sprite_vrste = None  # (polumjeri i boje vrsta, nacrtane čestice) za smjese
+        self.stara_granica = None
+        if self.profiler.enabled:
+            self.profiler.start(self.profiler_targets())
+
+
+
+
+    def oznake(self):
+        """Tekstovi gumba koji ovise o stanju simulacije (polje koje se upisuje pokazuje upisani tekst)"""
+        oznake = {
+            "VELOCITY_INPUT": "Temperatura: " + str(self.sim.v0)+"K",
+            "PARTICLE_INPUT": "Čestice: " + str(self.sim.N),
+            "RADIUS_INPUT": "Radius: " + str(self.sim.radius),
+            "VELOCITY_PRESENTED": "Brzina: " + str(round(self.sim.brzina_graf,4)) + "m/s",
+            "VOLUME_INPUT": "Volumen: " + str(round(self.sim.volume,3)) +"L",
+            "PRESSURE_INPUT": "Tlak: " + str(round(float(self.sim.pressure),3)) + "atm",
+        }
+        if self.unos is not None:
+            oznake[self.unos[0]] = UNOSI[self.unos[0]][1] + self.unos[1] + "_"
+        return oznake
+
+    def handle_input(self, event):
+        """Upisivanje vrijednosti u admin načinu bez blokiranja: Enter postavlja, Esc odustaje"""
+        if event.key == pygame.K_ESCAPE:
+            self.unos = None
+        elif event.key == pygame.K_BACKSPACE:
+            self.unos[1] = self.unos[1][:-1]
+        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            ime, tekst = self.unos
+            self.unos = None
+            parametar = UNOSI[ime][0]
+            try:
+                vrijednost = float(tekst)
+            except ValueError:
+                print("Krivi unos. Molimo upišite broj.")
+                return
+            if parametar in GRANICE_UNOSA:
+                najmanja, najveca = GRANICE_UNOSA[parametar]
+                vrijednost = min(max(vrijednost, najmanja), najveca)
+
+            def postavi():
+                try:
+                    eksperiment.set_parameter(self.sim, parametar, vrijednost)
+                except ValueError as greska:
+                    print(greska)
+                    return
+                self.sim.crtanje_grafa()
+            self.izvrsi(postavi)
+        elif event.unicode and event.unicode in "0123456789.-":
+            self.unos[1] += event.unicode
+
+    def izvrsi(self, naredba):
+        """Promjena simulacije iz sučelja: s dretvom ide u red i izvodi se između dva koraka, bez nje odmah"""
+        if self.physics is not None:
+            self.physics.submit(naredba)
+        else:
+            naredba()
+
+    def reset(self):
+        """Vraća početne vrijednosti (gumb RESET)"""
+        new_N = 100
+        self.sim.add_particles(new_N)
+        if not self.sim.mixture:
+            self.sim.radius = 5
+
+        new_velocity = 100
+        self.sim.set_temperature(new_velocity, reseed=True)
+        new_volume = 150
+        self.sim.adjust_particle_positions(new_volume)
+        self.sim.pressure = 1
+        if self.sim.barostat is not None:
+            self.sim.barostat.target = None  # Klip drži tlak iz reseta
+
+        self.sim.crtanje_grafa()
+
+    def change_particles(self, pomak):
+        """Gumbi +10 i -10 čestica, najmanje 1 i najviše 200 (s 1 se +10 vraća na 10)"""
+        new_N = min(max(self.sim.N + pomak, 1), 200)
+        if pomak > 0 and new_N == 11:
+            new_N = 10
+        self.sim.change(1, new_N, self.sim.volume, self.sim.v0)
+        self.sim.add_particles(new_N)
+        self.sim.crtanje_grafa()
+
+    def change_velocity(self, pomak):
+        """Gumbi +100 i -100 K, najmanje 1 i najviše 1000 (s 1 se +100 vraća na 100)"""
+        new_velocity = min(max(self.sim.v0 + pomak, 1), 1000)
+        if pomak > 0 and new_velocity == 101:
+            new_velocity = 100
+        self.sim.change(2, self.sim.N, self.sim.volume, float(new_velocity))
+        self.sim.set_temperature(new_velocity)
+        self.sim.crtanje_grafa()
+
+    def change_volume(self, pomak):
+        """Gumbi +25 i -25 L, unutar [150, 500]"""
+        new_volume = min(max(self.sim.volume + pomak, 150), 500)
+        self.sim.change(3, self.sim.N, float(new_volume), self.sim.v0)
+        self.sim.set_volume(new_volume)
+        self.sim.crtanje_grafa()
+
+    def toggle_recording(self):
+        """Tipka R uključuje i isključuje snimanje"""
+        if self.sim.recorder is None:
+            snimka = os.path.join("snimke", time.strftime("%Y%m%d_%H%M%S"))
+            self.sim.start_recording(snimka)
+            print("Snimanje u", snimka)
+        else:
+            self.sim.stop_recording()
+            print("Snimanje zaustavljeno")
 
+    def save_state(self):
+        spremanje.save(self.sim, SPREMLJENO)
+        print("Stanje spremljeno u", SPREMLJENO)
 
+    def restore_state(self):
+        if os.path.exists(SPREMLJENO):
+            spremanje.restore_into(self.sim, SPREMLJENO)
+        else:
+            print("Nema spremljenog stanja.")
+
+    def explode(self):
+        """Preveliki tlak raznese posudu"""
+        if self.sim.pressure >= 19.99:
+            print("KABOOOM")
+            self.sim.border_rect = (0, 0, 2000, 2000)
+            self.sim.volume = 10000
+            self.sim.crtanje_grafa()
+
+    def napravi_gumb(self, ime, tekst=None):
+        """Stvara gumb iz tablice GUMBI s već učitanom slikom"""
+        slika, pos, tekst_gumba, font = GUMBI[ime]
+        return Gumb(self.slike.get(slika), pos, tekst if tekst is not None else tekst_gumba, test_font if font == "test" else small_font, "Black", "White")
+
+    def update_hud(self, mis):
+        """Ponovno crta samo gumbe kojima se promijenio tekst ili boja, vraća promijenjena područja"""
+        promjene = []
+        if self.hud is None or self.hud.get_size() != self.screen.get_size():
+            self.hud = pygame.Surface(self.screen.get_size())
+            self.hud.fill(BOJA_POZADINE)
+            self.gumbi = {}
+            self.stanje_gumba = {}
+            promjene.append(self.hud.get_rect())
+
+        oznake = self.oznake()
+        for ime in GUMBI:
+            tekst = oznake.get(ime)
+            gumb = self.gumbi.get(ime)
+            if gumb is None or (tekst is not None and tekst != gumb.text_input):
+                stari = gumb.rect.union(gumb.text_rect) if gumb is not None else None
+                gumb = self.gumbi[ime] = self.napravi_gumb(ime, tekst)
+                promjene.append(gumb.rect.union(gumb.text_rect) if stari is None else stari.union(gumb.rect.union(gumb.text_rect)))
+            hover = gumb.checkForInput(mis)
+            if self.stanje_gumba.get(ime) != (gumb.text_input, hover):
+                self.stanje_gumba[ime] = (gumb.text_input, hover)
+                gumb.changeColor(mis)
+                promjene.append(gumb.rect.union(gumb.text_rect))
+
+        # Briše stara područja i ponovno crta sve gumbe koji ih dodiruju
+        for podrucje in promjene:
+            self.hud.fill(BOJA_POZADINE, podrucje)
+        for gumb in self.gumbi.values():
+            if gumb.rect.union(gumb.text_rect).collidelist(promjene) != -1:
+                gumb.update(self.hud)
+        return promjene
+
+    def profiler_targets(self):
+        """Metode koje profiler omata: fizika i crtanje (obrada događaja se mjeri u petlji)"""
+        return [(self.sim, ("step", "check_collisions", "change", "adjust_particle_positions")), (self, ("draw_particles",))]
+
+    def toggle_profiler(self):
+        if self.profiler.enabled:
+            self.profiler.stop()
+        else:
+            self.profiler.start(self.profiler_targets())
+            self.profiler.overlay = True
+
+    def draw_overlay(self):
+        """Tablica s vremenima profilera u donjem lijevom kutu; prethodna se briše pozadinom"""
+        promjene = []
+        if self.stari_overlay is not None:
+            self.screen.blit(self.hud, self.stari_overlay, self.stari_overlay)
+            promjene.append(self.stari_overlay)
+            self.stari_overlay = None
+        if self.profiler.enabled and self.profiler.overlay:
+            if self.overlay_font is None:
+                self.overlay_font = pygame.font.Font(None, 22)
+            redci = [[self.overlay_font.render(celija, True, "Black") for celija in redak] for redak in self.profiler.overlay_rows()]
+            sirine = [max(redak[k].get_width() for redak in redci) + 12 for k in range(len(redci[0]))]
+            visina_retka = self.overlay_font.get_linesize()
+            podrucje = pygame.Rect(10, 0, sum(sirine) + 10, len(redci) * visina_retka + 10)
+            podrucje.bottom = self.screen.get_height() - 10
+            self.screen.fill((235, 235, 235), podrucje)
+            for r, redak in enumerate(redci):
+                x = podrucje.x + 5
+                for k, celija in enumerate(redak):
+                    # Ime lijevo, brojevi desno poravnati u stupcu
+                    self.screen.blit(celija, (x if k == 0 else x + sirine[k] - 12 - celija.get_width(), podrucje.y + 5 + r * visina_retka))
+                    x += sirine[k]
+            promjene.append(podrucje)
+            self.stari_overlay = podrucje
+        if promjene:
+            pygame.display.update(promjene)
+
+    def particle_sprite(self, r):
+        """Čestica polumjera r nacrtana jednom, ponovno samo kad se promijeni polumjer"""
+        if self.sprite is None or self.sprite_radius != r:
+            velicina = int(math.ceil(2 * r)) + 1
+            self.sprite = pygame.Surface((velicina, velicina), pygame.SRCALPHA)
+            pygame.draw.circle(self.sprite, (0, 0, 0), (velicina // 2, velicina // 2), r)
+            self.sprite_radius = r
+        return self.sprite
+
+    def species_sprites(self):
+        """Po jedna nacrtana čestica za svaku vrstu u smjesi, u boji i polumjeru vrste"""
+        kljuc = tuple((vrsta.radius, vrsta.boja) for vrsta in self.sim.species)
+        if self.sprite_vrste is None or self.sprite_vrste[0] != kljuc:
+            sprites = []
+            for r, boja in kljuc:
+                velicina = int(math.ceil(2 * r)) + 1
+                sprite = pygame.Surface((velicina, velicina), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, boja, (velicina // 2, velicina // 2), r)
+                sprites.append(sprite)
+            self.sprite_vrste = (kljuc, sprites)
+        return self.sprite_vrste[1]
+
+    def draw_particles(self, pozicije=None, stanje=None):
+        """Crta čestice: zadane pozicije s granicom, polumjerom i vrstama iz objavljenog stanja
+        (raspored.Snapshot), ili trenutne iz simulacije kad fizika ne radi u dretvi"""
+        promjene = self.update_hud(pygame.mouse.get_pos())
+        if stanje is None:
+            stanje = self.sim
+            vrste = self.sim.store.species if getattr(self.sim, "mixture", False) else None
+        else:
+            vrste = stanje.vrste
+        if pozicije is None:
+            pozicije = stanje.position
+
+        # Područje s česticama, samo ono se briše i ponovno crta svaki frame
+        granica = pygame.Rect(stanje.border_rect)
+        podrucje = granica.inflate(2 * int(math.ceil(stanje.radius)) + 6, 2 * int(math.ceil(stanje.radius)) + 6).clip(self.screen.get_rect())
+        promjene.append(podrucje)
+        if self.stara_granica is not None and self.stara_granica != podrucje:
+            promjene.append(self.stara_granica)
+        self.stara_granica = podrucje
+        for rect in promjene:
+            self.screen.blit(self.hud, rect, rect)
+
+        konacne = np.isfinite(pozicije).all(axis=1)  #Provjerava jesu li sve pozicije brojevi
+        if not konacne.all():
+            pozicije = pozicije[konacne]
+            vrste = vrste[konacne] if vrste is not None else None
+        self.screen.set_clip(podrucje)
+        if vrste is None:
+            sprite = self.particle_sprite(stanje.radius)
+            pomak = sprite.get_width() // 2
+            self.screen.blits([(sprite, xy) for xy in (pozicije - pomak).astype(int).tolist()], doreturn=False) #Crta čestice po pozicijama
+        else:
+            sprites = self.species_sprites()
+            pomaci = np.array([sprite.get_width() // 2 for sprite in sprites])[vrste]
+            self.screen.blits(list(zip([sprites[k] for k in vrste.tolist()], (pozicije - pomaci[:, None]).astype(int).tolist())), doreturn=False)
+        pygame.draw.rect(self.screen, (0, 0, 0), stanje.border_rect, 2)  # Crta granicu
+        self.screen.set_clip(None)
 
-    def adjust_particle_positions(self, new_volume):
-        """Popravlja poziciju čestica kad se mijenja volumen"""
+        pygame.display.update(promjene)
         
-        if float(new_volume) != self.volume:
-            if float(new_volume) <= 150:
-                new_volume = 150
-            if float(new_volume) >= 500:
-                new_volume = 500
-
-            #Izračuna novu granicu rectengla po volumenu
-            new_border_width = ((((float(new_volume) * 500) * 1000) / 300) ** 0.5) 
-            new_border_height = ((((float(new_volume) * 500) * 1000) / 300) ** 0.5) * (300 / 500) 
-            new_border_rect = (50, 150, new_border_width, new_border_height)
-
-            # Stvara čestice unutar granice
-            new_positions = []
-            min_distance = 15  
-
-            while len(new_positions) < len(self.position):
-                new_position = np.random.uniform(
-                    (new_border_rect[0] + self.radius, new_border_rect[1] + self.radius),
-                    (new_border_rect[0] + new_border_rect[2] - self.radius, new_border_rect[1] + new_border_rect[3] - self.radius),
-                    size=(1, 2)
-                )
-                # Gleda minimalni razmak od već postojećih čestica
-                if all(np.linalg.norm(new_position - p) >= min_distance for p in new_positions):
-                    new_positions.append(new_position[0])
-
-            # Updatea čestice i granice
-            self.position = np.array(new_positions)
-            self.border_rect = new_border_rect
-            self.volume = float(new_volume)
-
-
 
 
 
@@ -258,22 +394,7 @@ class IdealGasSimulation:
 
 
 
-    def crtanje_grafa(self):
-        """Appenda vrijednosti listama pri svakoj promijeni"""
-        self.lista_volume.append(self.volume / 1000)
-        self.lista_pressure.append(self.pressure)
-        self.lista_temperatura.append(self.v0)
 
-
-
-
-
-
-
-
-
-
-    
     def run_simulation(self):
         """Pokreće simulaciju"""
         running = True
@@ -285,310 +406,283 @@ class IdealGasSimulation:
         BACK_BUTTON = Gumb(None, (1400, 700), "NAZAD", test_font, "Black", "White")
         RESET_BUTTON = Gumb(None, (1200, 700), "RESET", test_font, "Black", "White")
         GRAPH_BUTTON = Gumb(None, (800, 750), "Graf", test_font, "Black", "White")
-        VELOCITY_INPUT = Gumb(None, (1150, 150), "Temperatura: " + str(self.v0)+"K", test_font, "Black", "White")
-        VELOCITY_INCREASE = Gumb(pygame.image.load("Increase_button.png"), (1430, 120), "Povećaj +100     ", small_font, "Black", "White")
-        VELOCITY_DECREASE = Gumb(pygame.image.load("Decrease_button.png"), (1430, 180), "Smanji -100     ", small_font, "Black", "White")
-        PARTICLE_INPUT = Gumb(None, (1150, 300), "Čestice: " + str(self.N), test_font, "Black", "White")
-        PARTICLE_INCREASE = Gumb(pygame.image.load("Increase_button.png"), (1430, 270), "Povećaj +10       ", small_font, "Black", "White")
-        PARTICLE_DECREASE = Gumb(pygame.image.load("Decrease_button.png"), (1430, 330), "Smanji -10       ", small_font, "Black", "White")
-        RADIUS_INPUT = Gumb(None, (150, 100), "Radius: " + str(self.radius), test_font, "Black", "White")
-        VOLUME_INPUT = Gumb(None, (1150, 450), "Volumen: " + str(round(self.volume,3)) +"L", test_font, "Black", "White")
-        VOLUME_INCREASE = Gumb(pygame.image.load("Increase_button.png"), (1430, 420), "Povećaj +25      ", small_font, "Black", "White")
-        VOLUME_DECREASE = Gumb(pygame.image.load("Decrease_button.png"), (1430, 480), "Smanji -25      ", small_font, "Black", "White")
-        PRESSURE_INPUT = Gumb(None, (1150, 600), "Tlak: " + str(round(float(self.pressure),3)) + "atm", test_font, "Black", "White")
+        VELOCITY_INPUT = Gumb(None, (1150, 150), "Temperatura: " + str(self.sim.v0)+"K", test_font, "Black", "White")
+        VELOCITY_INCREASE = Gumb(self.slike["Increase_button.png"], (1430, 120), "Povećaj +100     ", small_font, "Black", "White")
+        VELOCITY_DECREASE = Gumb(self.slike["Decrease_button.png"], (1430, 180), "Smanji -100     ", small_font, "Black", "White")
+        PARTICLE_INPUT = Gumb(None, (1150, 300), "Čestice: " + str(self.sim.N), test_font, "Black", "White")
+        PARTICLE_INCREASE = Gumb(self.slike["Increase_button.png"], (1430, 270), "Povećaj +10       ", small_font, "Black", "White")
+        PARTICLE_DECREASE = Gumb(self.slike["Decrease_button.png"], (1430, 330), "Smanji -10       ", small_font, "Black", "White")
+        RADIUS_INPUT = Gumb(None, (150, 100), "Radius: " + str(self.sim.radius), test_font, "Black", "White")
+        VOLUME_INPUT = Gumb(None, (1150, 450), "Volumen: " + str(round(self.sim.volume,3)) +"L", test_font, "Black", "White")
+        VOLUME_INCREASE = Gumb(self.slike["Increase_button.png"], (1430, 420), "Povećaj +25      ", small_font, "Black", "White")
+        VOLUME_DECREASE = Gumb(self.slike["Decrease_button.png"], (1430, 480), "Smanji -25      ", small_font, "Black", "White")
+        PRESSURE_INPUT = Gumb(None, (1150, 600), "Tlak: " + str(round(float(self.sim.pressure),3)) + "atm", test_font, "Black", "White")
+
+        # Stanje se povremeno sprema u pozadini, korak ga samo kopira
+        if self.autosave:
+            self.sim.autosave = spremanje.AutoSave(SPREMLJENO, self.autosave)
+
+        # Fizika u svojoj dretvi, prikaz samo uzima zadnje stanje
+        if self.threaded:
+            self.physics = raspored.PhysicsLoop(self.sim, self.physics_rate)
+            self.physics.start()
 
 
         while running:
             
+            pocetak_dogadaja = time.perf_counter()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3: #F3 uključuje i isključuje mjerenje vremena
+                    self.toggle_profiler()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and self.profiler.enabled: #F4 sprema izmjerena vremena
+                    print("Vremena spremljena u", self.profiler.dump())
+
+                if self.unos is not None and event.type == pygame.KEYDOWN: #Admin upisuje vrijednost, ostale tipke ne vrijede
+                    self.handle_input(event)
+                    continue
+                if self.sim.admin == 1 and event.type == pygame.MOUSEBUTTONDOWN: #Ako admin uključen korisnik smije direktno upisati vrijednosti
+                    for ime, gumb in (("VELOCITY_INPUT", VELOCITY_INPUT), ("PARTICLE_INPUT", PARTICLE_INPUT), ("RADIUS_INPUT", RADIUS_INPUT),
+                                      ("VOLUME_INPUT", VOLUME_INPUT), ("PRESSURE_INPUT", PRESSURE_INPUT)):
+                        if gumb.checkForInput(pygame.mouse.get_pos()):
+                            self.unos = [ime, ""]
+
+                # Promjene simulacije idu kroz izvrsi(), s dretvom se izvode između dva koraka
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_r: #Tipka R uključuje i isključuje snimanje
+                    self.izvrsi(self.toggle_recording)
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F5: #F5 sprema stanje, F9 ga vraća
+                    self.izvrsi(self.save_state)
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                    self.izvrsi(self.restore_state)
                 
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if BACK_BUTTON.checkForInput(pygame.mouse.get_pos()):
+                        self.stop_physics()
+                        self.stop_autosave()
+                        self.sim.stop_recording()
+                        self.grafovi.close()
+                        self.profiler.release()
                         simulacija()
                         
                     if RESET_BUTTON.checkForInput(pygame.mouse.get_pos()): #Resetira vrijednosti
-                        new_N = 100
-                        self.add_particles(new_N)
-                        self.radius = 5
-
-                        new_velocity = 100
-                        global Kutevi
-                        Kutevi = np.random.uniform(0, 2 * np.pi, size=self.N) 
-                        self.v0 = float(new_velocity)
-                        vx, vy = self.v0 * np.cos(Kutevi), self.v0 * np.sin(Kutevi)
-                        self.v = np.stack((vx, vy), axis=1)
-                        self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M)
-                        new_volume = 150
-                        self.adjust_particle_positions(new_volume)
-                        self.pressure = 1
-
-                        self.crtanje_grafa()
+                        self.izvrsi(self.reset)
                         
-                    if GRAPH_BUTTON.checkForInput(pygame.mouse.get_pos()): #Prikazuje grafove
-                    
-                        plt.subplot(1, 3, 1)
-                        plt.plot(self.lista_volume, self.lista_pressure)
-                        plt.title('P-V graf')
-                        plt.xlabel('Volumen (m^3)')
-                        plt.ylabel('Tlak (atm)')
-
-                        plt.subplot(1, 3, 2)
-                        plt.plot( self.lista_temperatura, self.lista_volume)
-                        plt.title('V-T graf')
-                        plt.xlabel('Temperatura (K)')
-                        plt.ylabel('Volumen (m^3)')
-                        
-
-                        plt.subplot(1, 3, 3)
-                        plt.plot(self.lista_temperatura, self.lista_pressure)
-                        plt.title('P-T')
-                        plt.xlabel('Temperatura (K)')
-                        plt.ylabel('Tlak (atm)')
-
-                        plt.tight_layout()
-                        plt.show()
+                    if GRAPH_BUTTON.checkForInput(pygame.mouse.get_pos()): #Prikazuje grafove u zasebnom procesu, simulacija ne staje
+                        self.grafovi.show(self.sim)
             
                         
                         
                 if event.type == pygame.MOUSEBUTTONUP:    
-                    if PARTICLE_INCREASE.checkForInput(pygame.mouse.get_pos()):
-                            new_N = self.N + 10
-                            if new_N >= 200:
-                                new_N = 200
-                            if new_N == 11:
-                                new_N = 10
-                            self.change(1, new_N, self.volume, self.v0)
-                            self.add_particles(new_N)
-                            self.crtanje_grafa()
-                    if PARTICLE_DECREASE.checkForInput(pygame.mouse.get_pos()):
-                            new_N = self.N - 10
-                            if new_N <= 0:
-                                new_N = 1
-                            self.change(1, new_N, self.volume, self.v0)
-                            self.add_particles(new_N)
-                            self.crtanje_grafa()
-                    if VELOCITY_INCREASE.checkForInput(pygame.mouse.get_pos()):
-                            new_velocity = self.v0 + 100
-                            if new_velocity >= 1000:
-                                new_velocity = 1000
-                            if new_velocity == 101:
-                                new_velocity = 100
-                            self.change(2, self.N, self.volume, float(new_velocity))
-                            Kutevi = np.random.uniform(0, 2 * np.pi, size=self.N) 
-                            self.v0 = float(new_velocity)
-                            vx, vy = self.v0 * np.cos(Kutevi), self.v0 * np.sin(Kutevi)
-                            self.v = np.stack((vx, vy), axis=1)
-                            self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M)
-                            self.crtanje_grafa()
-                            
-                    if VELOCITY_DECREASE.checkForInput(pygame.mouse.get_pos()):
-                            new_velocity = self.v0 - 100
-                            if new_velocity <= 1:
-                                new_velocity = 1
-                            self.change(2, self.N, self.volume, float(new_velocity)) 
-                            Kutevi = np.random.uniform(0, 2 * np.pi, size=self.N) 
-                            self.v0 = float(new_velocity)
-                            vx, vy = self.v0 * np.cos(Kutevi), self.v0 * np.sin(Kutevi)
-                            self.v = np.stack((vx, vy), axis=1)
-                            self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M)
-                            self.crtanje_grafa()
-
-                    if VOLUME_INCREASE.checkForInput(pygame.mouse.get_pos()):
-                            new_volume = self.volume + 25
-                            if new_volume >= 500:
-                                new_volume = 500
-                            self.change(3, self.N, float(new_volume), self.v0)
-                            self.adjust_particle_positions(new_volume)
-                            self.crtanje_grafa()
-                            
-                    if VOLUME_DECREASE.checkForInput(pygame.mouse.get_pos()):
-                            new_volume = self.volume - 25
-                            if new_volume <= 150:
-                                new_volume = 150
-                            self.change(3, self.N, float(new_volume), self.v0)
-                            self.adjust_particle_positions(new_volume)
-                            self.crtanje_grafa()
+                    for gumb, naredba, pomak in ((PARTICLE_INCREASE, self.change_particles, 10), (PARTICLE_DECREASE, self.change_particles, -10),
+                                                 (VELOCITY_INCREASE, self.change_velocity, 100), (VELOCITY_DECREASE, self.change_velocity, -100),
+                                                 (VOLUME_INCREASE, self.change_volume, 25), (VOLUME_DECREASE, self.change_volume, -25)):
+                        if gumb.checkForInput(pygame.mouse.get_pos()):
+                            self.izvrsi(lambda naredba=naredba, pomak=pomak: naredba(pomak))
 
             
-            if self.admin == 1: #Ako admin uključen korisnik smije direktno inputati vrijednosti
-                if VELOCITY_INPUT.checkForInput(pygame.mouse.get_pos()):
-                    if pygame.mouse.get_pressed()[0]:
-                        new_velocity = input("Upišite novu temperaturu: ")
-                        if float(new_velocity) > 1000:
-                            new_velocity = 1000
-                        self.change(2, self.N, self.volume, float(new_velocity))
-                        try:
-                            Kutevi = np.random.uniform(0, 2 * np.pi, size=self.N) 
-                            self.v0 = float(new_velocity)
-                            vx, vy = self.v0 * np.cos(Kutevi), self.v0 * np.sin(Kutevi)
-                            self.v = np.stack((vx, vy), axis=1)
-                            VELOCITY_INPUT.text_input = "Temperatura: " + str(new_velocity)
-                            self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M)
-                            self.crtanje_grafa()
-                        except ValueError:
-                            print("Krivi unos. Molimo upišite broj.")            
-
-                if PARTICLE_INPUT.checkForInput(pygame.mouse.get_pos()):
-                    if pygame.mouse.get_pressed()[0]:
-                        new_particles = input("Upišite novi broj čestica: ")
-                        
-                        try:
-                            
-                            new_N = int(new_particles)
-                            if new_N > 200:
-                                new_N = 200
-                            if new_N <= 0:
-                                new_N = 1
-                            self.change(1, new_N, self.volume, self.v0)
-                            self.add_particles(new_N)  
-                            PARTICLE_INPUT.text_input = "Čestice: " + str(self.N)
-                        except ValueError:
-                            print("Krivi unos. Molimo upišite broj.")
-                            self.crtanje_grafa()
-
-                if RADIUS_INPUT.checkForInput(pygame.mouse.get_pos()):
-                    if pygame.mouse.get_pressed()[0]:
-                        new_radius = input("Upišite novi polumjer: ")
-                        try:
-                            self.radius = float(new_radius)
-                            RADIUS_INPUT.text_input = "Polumjer: " + str(self.radius)
-                        except ValueError:
-                            print("Krivi unos. Molimo upišite broj.")
-                if VOLUME_INPUT.checkForInput(pygame.mouse.get_pos()):
-                    if pygame.mouse.get_pressed()[0]:
-                        new_volume = input("Upišite novi volumen:")
-                        self.change(3, self.N, float(new_volume), self.v0)
-                        try:
-                            self.adjust_particle_positions(new_volume)
-                            VOLUME_INPUT.text_input = "Volumen: " + str(self.volume)
-                        except ValueError:
-                            print("Krivi unos. Molimo upišite broj.")
-                            self.crtanje_grafa()
-
-                if PRESSURE_INPUT.checkForInput(pygame.mouse.get_pos()):
-                    if pygame.mouse.get_pressed()[0]:
-                        new_pressure = input("Upišite novi tlak: ")
-                        try:
-                            self.pressure = round(float(new_pressure))
-                            PRESSURE_INPUT.text_input = "Tlak: " + str(round(self.pressure))
-                            self.crtanje_grafa()
-                        except ValueError:
-                            print("Krivi unos. Molimo upišite broj.")
             
 
-            if self.pressure >= 19.99:
-                print("KABOOOM")
-                self.border_rect = (0, 0, 2000, 2000)
-                self.volume = 10000
-                self.crtanje_grafa()
-
-            self.step()
-            self.draw_particles()
-            
-            clock.tick(60)       
-
+            if self.sim.pressure >= 19.99:
+                self.izvrsi(self.explode)
 
+            self.grafovi.sync(self.sim) #Nove točke idu u otvorene grafove (povijest se puni prije pomicanja brojača, pa se čita bez lock-a)
+            self.profiler.add("events", time.perf_counter() - pocetak_dogadaja)
 
+            if self.physics is None:
+                self.sim.step()
+                if pygame.display.get_active(): #Skriveni prozor se ne crta
+                    self.draw_particles()
+                    self.draw_overlay()
+                clock.tick(60)
+            else:
+                if pygame.display.get_active():
+                    self.draw_particles(*self.physics.interpolated())
+                    self.draw_overlay()
+                    clock.tick(60)
+                else:
+                    clock.tick(10)
+            self.profiler.end_frame()
+
+        self.stop_physics()
+        self.stop_autosave()
+        self.sim.stop_recording()
+        self.grafovi.close()
+        if self.profiler.enabled and self.profiler.dump_path:
+            print("Vremena spremljena u", self.profiler.dump())
+        self.profiler.release()
+
+    def run_replay(self):
+        """Pregled snimke: strelice mijenjaju frame (sa Shiftom po 100), razmak pokreće i zaustavlja"""
+        clock = pygame.time.Clock()
+        stanje = self.sim
+        k = 0
+        pokrenuto = False
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN:
+                    pomak = 100 if event.mod & pygame.KMOD_SHIFT else 1
+                    if event.key == pygame.K_RIGHT:
+                        k += pomak
+                    if event.key == pygame.K_LEFT:
+                        k -= pomak
+                    if event.key == pygame.K_HOME:
+                        k = 0
+                    if event.key == pygame.K_END:
+                        k = len(stanje.snimka) - 1
+                    if event.key == pygame.K_SPACE:
+                        pokrenuto = not pokrenuto
+                if event.type == pygame.MOUSEWHEEL:
+                    k -= event.y * 10
+
+            if pokrenuto:
+                k += 1
+            k = min(max(k, 0), len(stanje.snimka) - 1)
+            if k != stanje.k:
+                stanje.show(k)
+            self.draw_particles()
+            clock.tick(60)
 
+    def stop_physics(self):
+        """Zaustavlja dretvu s fizikom ako radi (naredbe koje još nije izvela se odbacuju)"""
+        if self.physics is not None:
+            self.physics.stop()
+            self.physics = None
 
+    def stop_autosave(self):
+        """Zaustavlja pozadinsko spremanje (nakon fizike, da korak više ne kopira stanje)"""
+        if self.sim.autosave is not None:
+            self.sim.autosave.stop()
+            self.sim.autosave = None
 
 
 
 
+class Pogled:
+    """Prozor u veliku periodičnu domenu (domena.PeriodicDomain): crta samo čestice unutar prozora.
 
+    Strelice pomiču prozor (sa Shiftom brže), Home ga vraća na početak; u kutu je
+    umanjena domena s označenim prozorom."""
+    def __init__(self, domena, screen_width, screen_height):
+        self.domena = domena
+        init_display()
+        self.screen = pygame.display.set_mode((screen_width - 10, screen_height - 50), pygame.RESIZABLE)
+        pygame.display.set_caption("Periodična domena")
+        r = domena.radius
+        velicina = int(math.ceil(2 * r)) + 1
+        self.sprite = pygame.Surface((velicina, velicina), pygame.SRCALPHA)
+        pygame.draw.circle(self.sprite, (0, 0, 0), (velicina // 2, velicina // 2), r)
+        self.x = 0.0  # Gornji lijevi kut prozora u koordinatama domene
+        self.y = 0.0
+
+    def draw(self, brzina):
+        sirina, visina = self.screen.get_size()
+        self.screen.fill(BOJA_POZADINE)
+        pozicije = self.domena.position
+        # Položaji od kuta prozora, preko periodične granice
+        dx = (pozicije[:, 0] - self.x) % self.domena.width
+        dy = (pozicije[:, 1] - self.y) % self.domena.height
+        vidljive = (dx < sirina) & (dy < visina)
+        pomak = self.sprite.get_width() // 2
+        xy = np.stack((dx[vidljive], dy[vidljive]), axis=1) - pomak
+        self.screen.blits([(self.sprite, p) for p in xy.astype(int).tolist()], doreturn=False)
+
+        # Umanjena domena s prozorom
+        mjerilo = 200 / max(self.domena.width, self.domena.height)
+        karta = pygame.Rect(sirina - 210, 10, self.domena.width * mjerilo, self.domena.height * mjerilo)
+        self.screen.fill((235, 235, 235), karta)
+        self.screen.set_clip(karta)
+        for ox in (0, -karta.width):  # Prozor koji prelazi granicu se vidi i s druge strane
+            for oy in (0, -karta.height):
+                pygame.draw.rect(self.screen, (200, 0, 0), (karta.x + self.x * mjerilo + ox, karta.y + self.y * mjerilo + oy,
+                                                            max(sirina * mjerilo, 2), max(visina * mjerilo, 2)), 1)
+        self.screen.set_clip(None)
+        pygame.draw.rect(self.screen, (0, 0, 0), karta, 1)
+
+        tekst = small_font.render("N = %d   radnika: %d   korak %d   %.1f koraka/s   T = %.1f   Z = PA/NkT = %.3f" % (
+            self.domena.N, self.domena.workers, self.domena.korak, brzina, self.domena.temperature(), self.domena.compressibility()), True, "Black")
+        self.screen.fill((235, 235, 235), tekst.get_rect(topleft=(10, 10)).inflate(10, 6))
+        self.screen.blit(tekst, (10, 10))
+        pygame.display.flip()
+
+    def run(self):
+        clock = pygame.time.Clock()
+        brzina = 0.0
+        mjerenje_od, mjerenje_korak = time.perf_counter(), self.domena.korak
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+                    self.x = self.y = 0.0
+            tipke = pygame.key.get_pressed()
+            pomak = (50 if tipke[pygame.K_LSHIFT] or tipke[pygame.K_RSHIFT] else 10)
+            self.x = (self.x + pomak * (tipke[pygame.K_RIGHT] - tipke[pygame.K_LEFT])) % self.domena.width
+            self.y = (self.y + pomak * (tipke[pygame.K_DOWN] - tipke[pygame.K_UP])) % self.domena.height
 
+            # Radnici računaju korak dok se crta prethodno stanje
+            self.domena.begin_step()
+            self.draw(brzina)
+            self.domena.finish_step()
 
-    #Služi za računanje promjene na razini proporcionalnosti po formuli PV = NkT
-    def change(self, promjena, new_N, new_volume, new_velocity):
-        if self.hard == 0: #Ako je osjetljivi cilindar
-            if promjena == 1:
-                k = (new_N/ self.N)
-                k_volume = k * self.volume
-                if k_volume> 500:
-                    self.pressure = (k / (500/(k_volume/k))) * self.pressure
-                    self.adjust_particle_positions(500)
-                if k_volume< 150:
-                    self.pressure = (k / (150/(k_volume/k))) * self.pressure
-                    self.adjust_particle_positions(150)
-                else:
-                    self.adjust_particle_positions(k_volume)
-
-
-            if promjena == 2:
-                k = (new_velocity/ self.v0)
-                k_volume = k * self.volume
-                if k_volume> 500:
-                    self.pressure = (k / (500/(k_volume/k))) * self.pressure
-                    self.volume = 500
-                    self.adjust_particle_positions(500)
-                if k_volume< 150:
-                    self.pressure = (k / (150/(k_volume/k))) * self.pressure
-                    self.volume = 150
-                    self.adjust_particle_positions(150)
-                else:
-                    self.adjust_particle_positions(k_volume)
-
-            if promjena == 3:
-                if new_volume < 150:
-                    new_volume = 150
-                if new_volume > 500:
-                    new_volume = 500
-                k = (new_volume/ self.volume)
-                self.pressure = float(self.pressure) / k
-            
+            sada = time.perf_counter()
+            if sada - mjerenje_od >= 1:
+                brzina = (self.domena.korak - mjerenje_korak) / (sada - mjerenje_od)
+                mjerenje_od, mjerenje_korak = sada, self.domena.korak
+            clock.tick(60)
+        self.domena.close()
 
-        if self.hard == 1: #Ako je čvrsti cilindar
-            if promjena == 1:
-                if new_N == 0 or self.N == 0:
-                    self.pressure = 0
-                else:
-                    k = (new_N/ self.N)
-                    self.pressure = k * self.pressure
-
-            if promjena == 2:
-                k = (new_velocity/ self.v0)
-                self.pressure = k * self.pressure
-
-            if promjena == 3:
-                if new_volume < 150:
-                    new_volume = 150
-                if new_volume > 500:
-                    new_volume = 500
-                k = (new_volume/ self.volume)
-                self.pressure = float(self.pressure) / k
-            
 
 
 
-#Općenito
-pygame.init()
+#Općenito: pygame, prozor, fontovi i slike se stvaraju tek kad zatrebaju (init_display, simulacija),
+#pa uvoz modula nema nuspojava i radi i bez zaslona
+screen = None
+screen_width, screen_height = None, None
+menu_surface = None
+test_font = naslov_font = small_font = None
 
-os.environ['SDL_VIDEO_CENTERED'] = '1'
-info = pygame.display.Info()
-screen_width, screen_height = info.current_w, info.current_h
+admin = 0
+profiler = None #profiliranje.Profiler iz naredbenog retka (--profile), dijele ga svi prikazi
+autosave = None #Sekunde između automatskih spremanja iz naredbenog retka (--autosave)
+termostat = None #Termostat iz naredbenog retka (--thermostat); bez njega promjena brzine odmah postavi nove brzine
+barostat = False #Klip koji drži tlak u drugoj simulaciji (--barostat)
 
 
-screen = pygame.display.set_mode((screen_width-10, screen_height-50))
 
-pygame.display.set_caption("Simulacija")
-menu_surface = pygame.image.load("Pozadina_menu.png").convert()
-test_font = pygame.font.Font(None, 50) 
-naslov_font = pygame.font.Font(None, 100)
-small_font = pygame.font.Font(None, 25)
 
-admin = 0
 
 
 
+def init_display():
+    """Pokreće pygame, čita veličinu zaslona i učitava fontove (samo prvi put)"""
+    global screen_width, screen_height, test_font, naslov_font, small_font
+    if test_font is not None:
+        return
+    os.environ.setdefault('SDL_VIDEO_CENTERED', '1')
+    pygame.init()
+    info = pygame.display.Info()
+    screen_width, screen_height = info.current_w, info.current_h
+    test_font = pygame.font.Font(None, 50) 
+    naslov_font = pygame.font.Font(None, 100)
+    small_font = pygame.font.Font(None, 25)
 
 
 
 
 def simulacija(): #Stvara početni prikaz
+    global admin, screen, menu_surface
+    init_display()
+    if screen is None:
+        screen = pygame.display.set_mode((screen_width-10, screen_height-50))
+        menu_surface = pygame.image.load(os.path.join(DIREKTORIJ, "Pozadina_menu.png")).convert()
     pygame.display.set_caption("Menu")
-    global admin
 
     while True:
         screen.blit(menu_surface, (0,0))
@@ -621,13 +715,13 @@ def simulacija(): #Stvara početni prikaz
                 if PRVI_BUTTON.checkForInput(MENU_MOUSE_POS):
                     duljina = 500
                     border_rect = (50, 150, duljina, (duljina/500)*300)  # Border rectangle (x, y, width, height)
-                    sim = IdealGasSimulation(N=100, molar_mass=0.032, radius=5, screen_width= screen_width, screen_height=screen_height, v0=100, duration=10, nsteps=1000, border_rect=border_rect, hard= 1, admin=admin)
-                    sim.run_simulation()
+                    sim = fizika.IdealGasSimulation(N=100, molar_mass=0.032, radius=5, screen_width= screen_width, screen_height=screen_height, v0=100, duration=10, nsteps=1000, border_rect=border_rect, hard= 1, admin=admin, thermostat=termostat)
+                    Prikaz(sim, screen_width, screen_height, threaded=True, physics_rate=60, profiler=profiler, autosave=autosave).run_simulation()
                 if DRUGI_BUTTON.checkForInput(MENU_MOUSE_POS):
                     duljina = 500
                     border_rect = (50, 150, duljina, (duljina/500)*300)  # Border rectangle (x, y, width, height)
-                    sim = IdealGasSimulation(N=100, molar_mass=0.032, radius=5, screen_width= screen_width, screen_height=screen_height, v0=100, duration=10, nsteps=1000, border_rect=border_rect, hard= 0, admin=admin)
-                    sim.run_simulation()
+                    sim = fizika.IdealGasSimulation(N=100, molar_mass=0.032, radius=5, screen_width= screen_width, screen_height=screen_height, v0=100, duration=10, nsteps=1000, border_rect=border_rect, hard= 0, admin=admin, thermostat=termostat, barostat=barostat)
+                    Prikaz(sim, screen_width, screen_height, threaded=True, physics_rate=60, profiler=profiler, autosave=autosave).run_simulation()
                 if ADMIN_BUTTON.checkForInput(MENU_MOUSE_POS):
                     if admin == 0:
                         admin = 1
@@ -644,7 +738,53 @@ def simulacija(): #Stvara početni prikaz
 
 
 
-simulacija()
+def reproduciraj(path): #Otvara snimku napravljenu tipkom R
+    snimka = snimanje.Playback(path)
+    if len(snimka) == 0:
+        print("Snimka je prazna.")
+        return
+    init_display()
+    Prikaz(snimanje.ReplayState(snimka), screen_width, screen_height).run_replay()
+
+
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Simulacija idealnog plina")
+    parser.add_argument("snimka", nargs="?", help="snimka napravljena tipkom R za pregled")
+    parser.add_argument("--profile", action="store_true", help="mjeri vremena po frameu i prikazuje ih (F3 uključuje/isključuje, F4 sprema)")
+    parser.add_argument("--profile-dump", metavar="DATOTEKA", help="na kraju sprema izmjerena vremena kao JSON")
+    parser.add_argument("--cprofile", type=int, metavar="N", help="snima prvih N frameova simulacije cProfileom")
+    parser.add_argument("--domain", type=float, metavar="N", help="velika periodična domena s N čestica (npr. 1e6) umjesto izbornika")
+    parser.add_argument("--workers", type=int, default=None, help="broj procesa za domenu (zadano: broj jezgri, 0 = bez procesa)")
+    parser.add_argument("--packing", type=float, default=0.2, help="udio površine domene pod česticama")
+    parser.add_argument("--experiment", metavar="DATOTEKA", help="pokus iz datoteke postavki (vidi eksperiment.py) u prozoru; bez prozora: python eksperiment.py")
+    parser.add_argument("--autosave", type=float, metavar="N", help="sprema stanje u %s svakih N sekundi (F9 ga vraća)" % SPREMLJENO)
+    parser.add_argument("--thermostat", choices=sorted(termostati.TERMOSTATI), help="promjena brzine postupno grije ili hladi plin umjesto novih nasumičnih brzina")
+    parser.add_argument("--barostat", action="store_true", help="u drugoj simulaciji klip drži tlak (desni i donji zid se miču)")
+    args = parser.parse_args()
+    autosave = args.autosave
+    termostat = args.thermostat
+    barostat = args.barostat
+    init_display()
+    if args.profile or args.profile_dump or args.cprofile:
+        profiler = profiliranje.Profiler(enabled=True, dump_path=args.profile_dump)
+        profiler.overlay = args.profile
+        if args.cprofile:
+            profiler.capture(args.cprofile)
+    if args.domain:
+        N = int(args.domain)
+        polumjer = 5 if N <= 1000 else 2
+        Pogled(domena.PeriodicDomain(N, *domena.domain_size(N, args.packing, polumjer), polumjer, v0=100, workers=args.workers),
+               screen_width, screen_height).run()
+    elif args.experiment:
+        pokusi = eksperiment.expand(eksperiment.load_config(args.experiment))
+        eksperiment.run_viewer(pokusi[0], sys.modules[__name__])
+    elif args.snimka:
+        reproduciraj(args.snimka)
+    else:
+        simulacija()
                 
 
 
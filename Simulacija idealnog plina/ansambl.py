@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import fizika
+import ravnoteza
+
+
+
+
+#Osnovne postavke za simulaciju bez prozora, kao u izborniku
+BAZA = dict(N=100, molar_mass=0.032, radius=5, screen_width=1600, screen_height=900, v0=100, duration=10, nsteps=1000, border_rect=(50, 150, 500, 300), hard=1)
+
+
+
+
+def make_simulation(config, seed=None):
+    """Stvara simulaciju iz rječnika postavki, 'volume' (u L) postavlja granicu kao gumbi za volumen"""
+    postavke = dict(BAZA)
+    postavke.update(config)
+    volume = postavke.pop("volume", None)
+    if volume is not None:
+        postavke["border_rect"] = fizika.border_rect_for_volume(volume)
+    return fizika.IdealGasSimulation(seed=seed, **postavke)
+
+
+
+
+def speed_edges(v0, bins=40):
+    """Rubovi histograma brzina, od 0 do 4*v0"""
+    return np.linspace(0, 4 * v0, bins + 1)
+
+
+
+
+def run_replica(config, seed, n_steps, warmup=500, sample_every=10, until_equilibrium=False):
+    """Pokreće jednu repliku i vraća prosjeke tlaka, temperature i histogram brzina.
+
+    Ako je until_equilibrium True, warmup je najveći broj koraka, a zagrijavanje staje
+    čim ravnoteza.EquilibrationDetector javi ravnotežu."""
+    sim = make_simulation(config, seed)
+    if until_equilibrium:
+        warmup = ravnoteza.run_until_equilibrium(sim, warmup)
+    else:
+        sim.run(warmup)
+    histogram = ravnoteza.SpeedHistogram(4 * sim.v0, 40)
+    tlak = []
+    temperatura = []
+    for korak in range(1, n_steps + 1):
+        sim.step()
+        if korak % sample_every == 0:
+            tlak.append(sim.pressure)
+            temperatura.append(sim.temperature)
+            histogram.add(sim.v, sim.weights())
+    return {
+        "seed": seed,
+        "pressure": float(np.mean(tlak)) if tlak else float(sim.pressure),
+        "temperature": float(np.mean(temperatura)) if temperatura else float(sim.temperature),
+        "speed_hist": histogram.density(),
+        "mb_distance": histogram.distance(),
+        "warmup_steps": warmup,
+    }
+
+
+
+
+def _run_replica(args):
+    return run_replica(*args)
+
+
+
+
+def run_ensemble(config, seeds, n_steps, warmup=500, sample_every=10, workers=None, until_equilibrium=False):
+    """Pokreće neovisne replike (jedna po seedu) na svim jezgrama i vraća prosjeke i varijance.
+
+    Rezultat ovisi samo o seedovima, ne o broju procesa."""
+    seeds = list(seeds)
+    poslovi = [(config, seed, n_steps, warmup, sample_every, until_equilibrium) for seed in seeds]
+    if workers == 1:
+        replike = [_run_replica(posao) for posao in poslovi]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            replike = list(pool.map(_run_replica, poslovi))
+
+    tlak = np.array([r["pressure"] for r in replike])
+    temperatura = np.array([r["temperature"] for r in replike])
+    histogrami = np.array([r["speed_hist"] for r in replike])
+    ddof = 1 if len(replike) > 1 else 0
+    return {
+        "replicas": replike,
+        "pressure_mean": float(tlak.mean()),
+        "pressure_var": float(tlak.var(ddof=ddof)),
+        "temperature_mean": float(temperatura.mean()),
+        "temperature_var": float(temperatura.var(ddof=ddof)),
+        "speed_edges": speed_edges(dict(BAZA, **config)["v0"], histogrami.shape[1]),
+        "speed_hist_mean": histogrami.mean(axis=0),
+        "speed_hist_var": histogrami.var(axis=0, ddof=ddof),
+        "mb_distance_mean": float(np.mean([r["mb_distance"] for r in replike])),
+        "warmup_steps_mean": float(np.mean([r["warmup_steps"] for r in replike])),
+    }
@@ -0,0 +1,116 @@
+import numpy as np
+
+
+
+
+#Stupci spremnika: ime -> (broj komponenti, dtype); None je dtype spremnika (float64 ili float32)
+STUPCI = {
+    "position": (2, None),
+    "v": (2, None),
+    "mass": (1, None),  # Molarna masa čestice u kg/mol
+    "radius": (1, None),
+    "species": (1, np.int64),
+}
+
+#Od ovoliko čestica stanje je zadano u float32: korak je tada ograničen prijenosom memorije, a ne računanjem
+VELIKI_N = 10 ** 5
+
+
+
+
+def default_dtype(N):
+    """float32 za velike simulacije (pola memorije i prometa po koraku), float64 inače i za provjere"""
+    return np.float32 if N >= VELIKI_N else np.float64
+
+
+
+
+class ParticleStore:
+    """Čestice kao zasebna neprekinuta polja (structure of arrays) s rezervom mjesta.
+
+    Aktivne čestice su prvih `n` redaka svakog stupca. Kapacitet se udvostručuje kad
+    ponestane mjesta, a čestica se miče tako da se na njeno mjesto stavi zadnja (O(1)).
+    Svojstva position, v, mass, radius i species vraćaju poglede na aktivni dio, bez kopiranja.
+    Svaka promjena izvana (dodavanje, micanje, zamjena cijelog stupca) povećava `verzija`.
+    dtype (float64 ili float32) vrijedi za sve stupce s brojevima s pomičnim zarezom."""
+    def __init__(self, capacity=16, dtype=np.float64):
+        self.n = 0
+        self.capacity = max(1, int(capacity))
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError("Spremnik podržava float32 i float64, ne %s" % self.dtype)
+        self.verzija = 0
+        self.polja = {ime: self.empty(ime, self.capacity) for ime in STUPCI}
+        self.pogledi()
+
+    def empty(self, ime, capacity):
+        komponente, dtype = STUPCI[ime]
+        oblik = (capacity, komponente) if komponente > 1 else (capacity,)
+        return np.zeros(oblik, dtype=self.dtype if dtype is None else dtype)
+
+    def bytes_per_particle(self):
+        """Bajtova po čestici u svim stupcima"""
+        return sum(polje[:1].nbytes for polje in self.polja.values())
+
+    def nbytes(self):
+        """Zauzeta memorija svih stupaca, s rezervom mjesta"""
+        return sum(polje.nbytes for polje in self.polja.values())
+
+    def pogledi(self):
+        """Pogledi na aktivni dio se rade samo kad se promijeni n ili kapacitet, pa ostaju isti objekti između koraka"""
+        for ime, polje in self.polja.items():
+            setattr(self, ime, polje[:self.n])
+        self.verzija += 1
+
+    def __len__(self):
+        return self.n
+
+    def reserve(self, capacity):
+        """Osigurava mjesto za barem capacity čestica (kapacitet raste udvostručavanjem)"""
+        if capacity <= self.capacity:
+            return
+        novi = max(capacity, 2 * self.capacity)
+        for ime, staro in self.polja.items():
+            novo = self.empty(ime, novi)
+            novo[:self.n] = staro[:self.n]
+            self.polja[ime] = novo
+        self.capacity = novi
+
+    def append(self, position, v, mass, radius, species=0):
+        """Dodaje čestice na kraj, mass, radius i species mogu biti brojevi ili polja"""
+        k = len(position)
+        self.reserve(self.n + k)
+        kraj = self.n + k
+        self.polja["position"][self.n:kraj] = position
+        self.polja["v"][self.n:kraj] = v
+        self.polja["mass"][self.n:kraj] = mass
+        self.polja["radius"][self.n:kraj] = radius
+        self.polja["species"][self.n:kraj] = species
+        self.n = kraj
+        self.pogledi()
+
+    def remove(self, indices):
+        """Miče čestice na zadanim indeksima, na svako mjesto dolazi trenutno zadnja čestica"""
+        for i in np.unique(np.asarray(indices, dtype=np.int64))[::-1]:
+            zadnja = self.n - 1
+            if i != zadnja:
+                for polje in self.polja.values():
+                    polje[i] = polje[zadnja]
+            self.n = zadnja
+        self.pogledi()
+
+    def resize(self, n):
+        """Mijenja broj aktivnih čestica; nove su nule, višak s kraja se odbacuje"""
+        if n > self.n:
+            self.reserve(n)
+            for polje in self.polja.values():
+                polje[self.n:n] = 0
+        self.n = n
+        self.pogledi()
+
+    def set_column(self, ime, vrijednosti):
+        """Zamjenjuje cijeli stupac (npr. sim.v = ...); kopira u postojeći spremnik"""
+        if len(vrijednosti) != self.n:
+            self.resize(len(vrijednosti))
+        self.polja[ime][:self.n] = vrijednosti
+        self.verzija += 1
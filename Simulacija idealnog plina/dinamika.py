@@ -0,0 +1,187 @@
+import math
+from collections import deque
+import numpy as np
+import mjerenja
+import sudari
+
+
+
+
+DVA_NA_SESTINU = 2 ** (1 / 6)  # Minimum LJ potencijala je na r = 2^(1/6) sigma
+
+
+
+
+class Potential:
+    """Lennard-Jones ili WCA (LJ odrezan u minimumu) između parova čestica.
+
+    sigma para se računa iz polumjera čestica tako da je minimum potencijala na zbroju
+    polumjera, pa je "promjer" isti kao za tvrde diskove. epsilon je u jedinicama simulacije
+    (masa M = 1, px, s); None znači kT pri početnoj temperaturi, tj. v0^2 / 2.
+    cutoff je u jedinicama sigma, za WCA je uvijek 2^(1/6). Potencijal je pomaknut tako da je
+    na cutoffu nula."""
+    def __init__(self, kind="wca", epsilon=None, cutoff=2.5):
+        if kind not in ("lj", "wca"):
+            raise ValueError("Nepoznat potencijal: %r" % (kind,))
+        self.kind = kind
+        self.epsilon = epsilon
+        self.cutoff = DVA_NA_SESTINU if kind == "wca" else float(cutoff)
+        sr6 = self.cutoff ** -6
+        self.pomak = 4 * (sr6 * sr6 - sr6)  # Energija na cutoffu u jedinicama epsilon
+
+    def __repr__(self):
+        return "Potential(%r, epsilon=%r, cutoff=%r)" % (self.kind, self.epsilon, self.cutoff)
+
+    def to_dict(self):
+        return {"kind": self.kind, "epsilon": self.epsilon, "cutoff": self.cutoff}
+
+    def max_range(self, radius):
+        """Najveći domet za čestice polumjera najviše `radius`"""
+        return self.cutoff * 2 * radius / DVA_NA_SESTINU
+
+    def pair_forces(self, d, zbroj_polumjera):
+        """Sila na i od j za parove s razmakom d = r_i - r_j (parovi x 2).
+
+        Vraća (sila po paru, potencijalna energija, zbroj r_ij . F_ij); parovi izvan
+        cutoffa ne doprinose ničemu."""
+        sigma2 = (zbroj_polumjera / DVA_NA_SESTINU) ** 2
+        r2 = np.einsum("ij,ij->i", d, d)
+        unutra = r2 < sigma2 * self.cutoff ** 2
+        sr2 = np.where(unutra, sigma2 / np.where(unutra, r2, 1.0), 0.0)
+        sr6 = sr2 * sr2 * sr2
+        # F = 24 eps (2 (s/r)^12 - (s/r)^6) / r^2 * d
+        f_r2 = np.where(unutra, 24 * self.epsilon * (2 * sr6 * sr6 - sr6) / np.where(unutra, r2, 1.0), 0.0)
+        energija = 4 * self.epsilon * float((sr6 * sr6 - sr6)[unutra].sum() - self.pomak / 4 * np.count_nonzero(unutra))
+        return f_r2[:, None] * d, energija, float((f_r2 * r2).sum())
+
+
+
+
+def make_potential(potential, v0):
+    """Potential iz imena ("lj", "wca") ili postojećeg objekta, epsilon po početnoj temperaturi ako nije zadan"""
+    if potential is None:
+        potential = "wca"
+    if isinstance(potential, str):
+        potential = Potential(potential)
+    elif isinstance(potential, dict):
+        potential = Potential(**potential)
+    if potential.epsilon is None:
+        potential.epsilon = 0.5 * float(v0) ** 2
+    return potential
+
+
+
+
+class VelocityVerlet:
+    """Molekularna dinamika s mekim potencijalom: Velocity-Verlet i Verletove liste susjeda.
+
+    Lista sadrži parove bliže od dometa + skin i gradi se ponovno (preko mreže ćelija, O(N))
+    tek kad se neka čestica pomakne za više od skin / 2 od zadnje izgradnje. Sile se računaju
+    odjednom za sve parove iz liste. Interval simulacije dt se dijeli na manje korake tako da
+    se čestica u jednom koraku pomakne za najviše `max_pomak` sigme i da je korak najviše
+    `max_tau` vremenske skale potencijala. Zidovi su tvrdi kao u ostatku simulacije."""
+    def __init__(self, sim, potential, skin=0.3, max_pomak=0.01, max_tau=0.005, prozor=200):
+        self.sim = sim
+        self.potential = potential
+        self.skin_udio = skin  # Skin u jedinicama najvećeg dometa
+        self.max_pomak = max_pomak
+        self.max_tau = max_tau
+        self.virijali = deque(maxlen=prozor)  # Srednji zbroj r . F u zadnjim intervalima
+        self.izgradnji = 0  # Broj izgradnji liste, za provjeru da se ne gradi svaki korak
+        self.rebuild()
+
+    def rebuild(self):
+        """Ponovno čita stanje simulacije, gradi listu susjeda i računa sile"""
+        sim = self.sim
+        self.verzija = sim.store.verzija
+        if len(sim.position) != getattr(self, "N", None):
+            self.virijali.clear()  # Za pomak klipa ili zamjenu stupca prošli viral još vrijedi
+        self.N = len(sim.position)
+        self.radius = sim.radius
+        self.border_rect = tuple(sim.border_rect)
+        self.domet = self.potential.max_range(sim.radius)
+        self.skin = self.skin_udio * self.domet
+        self.build_list()
+        self.compute_forces()
+
+    def is_stale(self):
+        sim = self.sim
+        return (sim.store.verzija != self.verzija or len(sim.position) != self.N
+                or sim.radius != self.radius or tuple(sim.border_rect) != self.border_rect)
+
+    def build_list(self):
+        """Parovi bliže od domet + skin, preko iste mreže ćelija kao za tvrde sudare"""
+        position = self.sim.position
+        self.i, self.j = sudari.pairs_grid(position, (self.domet + self.skin) / 2, self.border_rect)
+        radii = self.sim.store.radius
+        self.zbroj_polumjera = radii[self.i] + radii[self.j]
+        self.pozicije_liste = position.copy()
+        self.izgradnji += 1
+
+    def compute_forces(self):
+        """Ubrzanja svih čestica iz liste parova (np.bincount umjesto petlje po česticama)"""
+        sim = self.sim
+        position = sim.position
+        sila, self.potencijalna, self.virial = self.potential.pair_forces(position[self.i] - position[self.j], self.zbroj_polumjera)
+        self.a = np.empty((self.N, 2))
+        for os_ in (0, 1):
+            self.a[:, os_] = (np.bincount(self.i, weights=sila[:, os_], minlength=self.N)
+                              - np.bincount(self.j, weights=sila[:, os_], minlength=self.N))
+        weights = sim.weights()
+        if weights is not None:
+            self.a /= weights[:, None]
+
+    def substeps(self, dt):
+        """Na koliko koraka se dijeli interval dt"""
+        v = self.sim.v
+        v_max = float(np.sqrt(np.einsum("ij,ij->i", v, v).max())) if self.N else 0.0
+        sigma = 2 * self.sim.radius / DVA_NA_SESTINU
+        tau = sigma / math.sqrt(self.potential.epsilon)  # Vremenska skala potencijala za masu M
+        h = min(self.max_tau * tau, self.max_pomak * sigma / v_max if v_max > 0 else math.inf)
+        return max(1, math.ceil(dt / h))
+
+    def kinetic(self):
+        """Kinetička energija sum(m v^2 / 2) u jedinicama simulacije (masa M = 1)"""
+        v2 = np.einsum("ij,ij->i", self.sim.v, self.sim.v, dtype=np.float64)
+        weights = self.sim.weights()
+        return 0.5 * float(v2.sum() if weights is None else np.dot(weights, v2))
+
+    def energy(self):
+        """Ukupna energija (kinetička + potencijalna), za provjeru integratora"""
+        return self.kinetic() + self.potencijalna
+
+    def advance(self, dt):
+        """Pomiče simulaciju za interval dt, vraća broj izgradnji liste susjeda u tom intervalu"""
+        if self.is_stale():
+            self.rebuild()
+        sim = self.sim
+        position, v = sim.position, sim.v
+        radius = sim.store.radius if sim.mixture else sim.radius
+        koraka = self.substeps(dt)
+        h = dt / koraka
+        izgradnji = self.izgradnji
+        virial = 0.0
+        for _ in range(koraka):
+            v += 0.5 * h * self.a
+            # Tvrdi zidovi: odbijanje prije pomaka, impuls ide u mjerenje tlaka kao za tvrde diskove
+            impulsi = sim.kernels.reflect_walls(sim.kernels.predict(position, v, h), v, self.border_rect, radius, sim.weights())
+            for zid in (mjerenja.LIJEVI, mjerenja.DESNI, mjerenja.GORNJI, mjerenja.DONJI):
+                sim.wall_pressure.add(zid, impulsi[zid])
+            position += v * h
+            pomak2 = np.einsum("ij,ij->i", position - self.pozicije_liste, position - self.pozicije_liste)
+            if self.N and float(pomak2.max()) > (self.skin / 2) ** 2:
+                self.build_list()
+            self.compute_forces()
+            v += 0.5 * h * self.a
+            virial += self.virial
+        self.virijali.append(virial / koraka)
+        self.verzija = sim.store.verzija
+        return self.izgradnji - izgradnji
+
+    def virial_pressure_2d(self):
+        """Tlak iz viralnog teorema, P A = N <m v^2> / 2 + <sum r_ij . F_ij> / 2, u jedinicama kao WallPressure.pressure_2d"""
+        povrsina = self.border_rect[2] * self.border_rect[3]
+        if not self.virijali or povrsina <= 0:
+            return 0.0
+        T = self.sim.wall_pressure.temperature()
+        return (self.N * T * T / 2 + float(np.mean(self.virijali)) / 2) / povrsina
@@ -0,0 +1,249 @@
+import heapq
+import numpy as np
+import sudari
+
+
+
+
+ZID_X = -1  # Oznaka za sudar s lijevim ili desnim zidom
+ZID_Y = -2  # Oznaka za sudar s gornjim ili donjim zidom
+CELIJA_X = -3  # Oznaka za prelazak u lijevu ili desnu susjednu ćeliju
+CELIJA_Y = -4  # Oznaka za prelazak u gornju ili donju susjednu ćeliju
+CESTICA_PO_CELIJI = 8  # Prosječan broj čestica po ćeliji mreže za traženje sudara
+STALNI = -1  # Oznaka verzije za događaje koji ne ovise o položaju klipa (lijevi i gornji zid, prelasci ćelija)
+
+
+
+
+class EventDriven:
+    """Simulacija tvrdih diskova od sudara do sudara (bez fiksnog dt), s polumjerom i masom svake čestice.
+
+    Čestice su u mreži ćelija kao u sudari.pairs_grid (ćelija nije manja od najvećeg promjera),
+    pa se sudari traže samo u susjednim ćelijama. Prelazak u drugu ćeliju je i sam događaj u redu.
+
+    Termostat i barostat ne traže ponovno predviđanje svih sudara: jednako skaliranje brzina
+    samo skalira vremena događaja (scale_velocities), nove brzine dijela čestica poništavaju
+    samo njihove događaje (invalidate), a pomak klipa samo sudare s desnim i donjim zidom (walls_moved)."""
+    def __init__(self, sim):
+        self.sim = sim
+        self.t = 0.0
+        self.rebuild()
+
+    def rebuild(self):
+        """Ponovno predviđa sve sudare iz trenutnog stanja simulacije"""
+        sim = self.sim
+        self.verzija = sim.store.verzija
+        self.position = sim.position
+        self.v = sim.v
+        self.radii = sim.store.radius
+        self.mass = sim.store.mass
+        self.M = sim.M
+        self.N = len(sim.position)
+        self.radius = sim.radius
+        self.border_rect = tuple(sim.border_rect)
+        self.t_cestice = np.full(self.N, self.t)  # Vrijeme do kojeg je pomaknuta svaka čestica
+        self.brojac = np.zeros(self.N, dtype=np.int64)  # Broj sudara svake čestice, služi za poništavanje događaja
+        self.verzija_zida = 0  # Povećava se kad se klip pomakne, poništava sudare s desnim i donjim zidom
+        # Ćelija nije manja od najvećeg promjera; u rjeđem plinu je veća, da prelazaka ne bude puno više nego sudara
+        w, h = self.border_rect[2:]
+        polumjer = max(float(self.radii.max()) if self.N else 0.0, 0.5 * np.sqrt(CESTICA_PO_CELIJI * w * h / max(self.N, 1)))
+        self.nx, self.ny = sudari.grid_shape(polumjer, self.border_rect)
+        self.sirina = (w / self.nx, h / self.ny)
+        self.ishodiste = self.border_rect[:2]
+        self.velicina_mreze = (w, h)  # Mreža ostaje ista kad se klip malo pomakne, rubne ćelije sežu do zida
+        cx, cy = sudari.grid_cells(self.position, self.border_rect, self.nx, self.ny)
+        self.celija = np.column_stack((cx, cy))  # (cx, cy) svake čestice, mijenja se samo događajem prelaska
+        self.celije = [set() for _ in range(self.nx * self.ny)]  # Čestice u svakoj ćeliji
+        for i, (a, b) in enumerate(zip(cx.tolist(), cy.tolist())):
+            self.celije[a * self.ny + b].add(i)
+        self.red = []
+        for i in range(self.N):
+            self.predict(i)
+
+    def is_stale(self):
+        """Gleda je li se stanje simulacije promijenilo izvana"""
+        sim = self.sim
+        return (sim.store.verzija != self.verzija or len(sim.position) != self.N
+                or sim.radius != self.radius or tuple(sim.border_rect) != self.border_rect)
+
+    def move(self, i, t):
+        """Pomiče česticu (ili niz čestica) do vremena t"""
+        self.position[i] += self.v[i] * (t - self.t_cestice[i])[..., None]
+        self.t_cestice[i] = t
+
+    def neighbours(self, i):
+        """Čestice u ćeliji čestice i i osam susjednih (bez same čestice i)"""
+        cx, cy = self.celija[i]
+        susjedi = []
+        for a in range(max(cx - 1, 0), min(cx + 2, self.nx)):
+            for b in range(max(cy - 1, 0), min(cy + 2, self.ny)):
+                susjedi.extend(self.celije[a * self.ny + b])
+        susjedi = np.array(susjedi, dtype=np.intp)
+        return susjedi[susjedi != i]
+
+    def predict(self, i, zidovi=True):
+        """Stavlja u red najraniji sudar čestice i s drugom česticom iz susjednih ćelija,
+        a sa zidovi=True i sudare sa zidom i prelazak u drugu ćeliju"""
+        x, y, w, h = self.border_rect
+        r = self.radii[i]
+        p = self.position[i] + self.v[i] * (self.t - self.t_cestice[i])
+        vi = self.v[i]
+
+        # Zidovi; sudar s desnim ili donjim nosi verziju zida, jer ga pomak klipa poništava
+        if zidovi:
+            for os_, oznaka, low, high in ((0, ZID_X, x + r, x + w - r), (1, ZID_Y, y + r, y + h - r)):
+                if vi[os_] > 0:
+                    heapq.heappush(self.red, (self.t + max((high - p[os_]) / vi[os_], 0.0), i, oznaka, self.brojac[i], self.verzija_zida))
+                elif vi[os_] < 0:
+                    heapq.heappush(self.red, (self.t + max((low - p[os_]) / vi[os_], 0.0), i, oznaka, self.brojac[i], STALNI))
+
+            self.predict_crossing(i, 0, p)
+            self.predict_crossing(i, 1, p)
+
+        # Čestice iz susjednih ćelija, u red ide samo najraniji sudar
+        ostale = self.neighbours(i)
+        if not len(ostale):
+            return
+        dr = self.position[ostale] + self.v[ostale] * (self.t - self.t_cestice[ostale])[:, None] - p
+        dv = self.v[ostale] - vi
+        b = (dr * dv).sum(axis=1)
+        dvdv = (dv * dv).sum(axis=1)
+        drdr = (dr * dr).sum(axis=1)
+        d = b * b - dvdv * (drdr - (self.radii[ostale] + r) ** 2)
+        moguci = (b < 0) & (d > 0)
+        if not moguci.any():
+            return
+        ostale, b, d, dvdv = ostale[moguci], b[moguci], d[moguci], dvdv[moguci]
+        dt = np.maximum(-(b + np.sqrt(d)) / dvdv, 0.0)
+        k = np.argmin(dt)
+        j = int(ostale[k])
+        heapq.heappush(self.red, (self.t + dt[k], i, j, self.brojac[i], self.brojac[j]))
+
+    def predict_crossing(self, i, os_, p):
+        """Stavlja u red prelazak čestice i (na položaju p u trenutku self.t) preko granice ćelije po osi os_.
+
+        Na rubu mreže nema prelaska, tamo je zid."""
+        c = self.celija[i, os_]
+        vi = self.v[i, os_]
+        if vi > 0 and c < (self.nx, self.ny)[os_] - 1:
+            dt = (self.ishodiste[os_] + (c + 1) * self.sirina[os_] - p[os_]) / vi
+        elif vi < 0 and c > 0:
+            dt = (self.ishodiste[os_] + c * self.sirina[os_] - p[os_]) / vi
+        else:
+            return
+        heapq.heappush(self.red, (self.t + max(dt, 0.0), i, CELIJA_X - os_, self.brojac[i], STALNI))
+
+    def cross(self, i, os_):
+        """Čestica i prelazi u susjednu ćeliju u smjeru svoje brzine po osi os_"""
+        staro = self.celija[i, 0] * self.ny + self.celija[i, 1]
+        self.celija[i, os_] += 1 if self.v[i, os_] > 0 else -1
+        self.celije[staro].discard(i)
+        self.celije[self.celija[i, 0] * self.ny + self.celija[i, 1]].add(i)
+
+    def valid(self, dogadaj):
+        """Vrijedi li još događaj za česticu koja ga je predvidjela (partner se provjerava u advance)"""
+        t, i, j, brojac_i, brojac_j = dogadaj
+        return brojac_i == self.brojac[i] and (j >= 0 or brojac_j == STALNI or brojac_j == self.verzija_zida)
+
+    def compact(self):
+        """Miče nevažeće događaje iz reda (brže od ponovnog predviđanja svih sudara)"""
+        self.red = [dogadaj for dogadaj in self.red if self.valid(dogadaj)]
+        heapq.heapify(self.red)
+
+    def synchronized(self):
+        """Jesu li sve čestice pomaknute do self.t (tako je nakon advance, kad termostat i barostat mijenjaju stanje)"""
+        return not self.is_stale() and bool((self.t_cestice == self.t).all())
+
+    def scale_velocities(self, faktor):
+        """Sve brzine su pomnožene s faktor: putanje ostaju iste, pa se vremena do svih događaja dijele s faktor"""
+        if faktor <= 0 or not self.synchronized():
+            self.rebuild()
+            return
+        t0 = self.t
+        self.red = [(t0 + (t - t0) / faktor, i, j, brojac_i, brojac_j) for t, i, j, brojac_i, brojac_j in self.red]
+        heapq.heapify(self.red)  # Redoslijed je isti, ali zaokruživanje može izjednačiti vremena
+
+    def invalidate(self, indeksi):
+        """Čestice s indeksima su dobile nove brzine: poništavaju se samo njihovi događaji (i sudari drugih s njima)"""
+        if not self.synchronized():
+            self.rebuild()
+            return
+        self.brojac[indeksi] += 1
+        for i in np.asarray(indeksi).tolist():
+            self.predict(i)
+
+    def walls_moved(self):
+        """Klip je pomaknuo desni i donji zid, a čestice su ostale na mjestu.
+
+        Ponovno se predviđaju samo sudari s desnim i donjim zidom.
+        Mreža ostaje ista dok se granica ne promijeni za više od četvrtine."""
+        sim = self.sim
+        x, y, w, h = sim.border_rect
+        if (sim.store.verzija != self.verzija or len(sim.position) != self.N or sim.radius != self.radius
+                or (x, y) != self.ishodiste or not (self.t_cestice == self.t).all()
+                or not 0.8 < w / self.velicina_mreze[0] < 1.25 or not 0.8 < h / self.velicina_mreze[1] < 1.25):
+            self.rebuild()
+            return
+        self.border_rect = tuple(sim.border_rect)
+        self.verzija_zida += 1
+        for os_, oznaka, zid in ((0, ZID_X, x + w), (1, ZID_Y, y + h)):
+            prema_zidu = np.nonzero(self.v[:, os_] > 0)[0]
+            vremena = self.t + np.maximum((zid - self.radii[prema_zidu] - self.position[prema_zidu, os_]) / self.v[prema_zidu, os_], 0.0)
+            for i, t in zip(prema_zidu.tolist(), vremena.tolist()):
+                heapq.heappush(self.red, (t, i, oznaka, self.brojac[i], self.verzija_zida))
+        if len(self.red) > 20 * self.N + 1000:
+            self.compact()
+
+    def advance(self, dt):
+        """Obrađuje sve sudare u sljedećem intervalu dt i vraća broj obrađenih sudara"""
+        if self.is_stale():
+            self.rebuild()
+        kraj = self.t + dt
+        broj = 0
+        while self.red and self.red[0][0] <= kraj:
+            dogadaj = heapq.heappop(self.red)
+            if not self.valid(dogadaj):
+                continue  # Događaj više ne vrijedi
+            t, i, j, brojac_i, brojac_j = dogadaj
+            if j >= 0 and brojac_j != self.brojac[j]:
+                # Druga čestica se već sudarila, traži se novi sudar za česticu i
+                self.t = t
+                self.predict(i, zidovi=False)
+                continue
+            self.t = t
+            if j == CELIJA_X or j == CELIJA_Y:
+                # Putanja se ne mijenja, pa stari događaji čestice vrijede; traže se sudari s novim susjedima i sljedeći prelazak
+                os_ = CELIJA_X - j
+                self.cross(i, os_)
+                self.predict(i, zidovi=False)
+                self.predict_crossing(i, os_, self.position[i] + self.v[i] * (t - self.t_cestice[i]))
+                continue
+            if j == ZID_X or j == ZID_Y:
+                self.move(i, t)
+                os_ = -1 - j
+                zid = 2 * os_ + (1 if self.v[i, os_] > 0 else 0)  # Lijevi/desni ili gornji/donji
+                self.sim.wall_pressure.add(zid, 2 * abs(self.v[i, os_]) * self.mass[i] / self.M)
+                self.v[i, os_] *= -1
+                self.brojac[i] += 1
+                self.predict(i)
+            else:
+                self.move(i, t)
+                self.move(j, t)
+                rdiff = self.position[i] - self.position[j]
+                vdiff = self.v[i] - self.v[j]
+                impuls = rdiff.dot(vdiff) / rdiff.dot(rdiff) * rdiff
+                ukupna = self.mass[i] + self.mass[j]
+                self.v[i] -= impuls * (2 * self.mass[j] / ukupna)
+                self.v[j] += impuls * (2 * self.mass[i] / ukupna)
+                self.brojac[i] += 1
+                self.brojac[j] += 1
+                self.predict(i)
+                self.predict(j)
+            broj += 1
+
+        # Pomiče sve čestice do kraja intervala
+        self.t = kraj
+        self.move(slice(None), kraj)
+        if len(self.red) > 20 * self.N + 1000:  # Čisti red od starih događaja
+            self.compact()
+        return broj
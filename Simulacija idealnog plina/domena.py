@@ -0,0 +1,386 @@
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from multiprocessing import shared_memory
+import postavljanje
+import sudari
+
+
+
+
+#Naredbe radnicima (prvi element zaglavlja)
+STOJ, KORAK = 0, 1
+#Zbrojevi koje svaki dio upiše nakon koraka: zbroj v^2, viral sudara, broj sudara
+V2, VIRIAL, SUDARA = range(3)
+#Popisi za razmjenu među susjednim radnicima: čestice koje prelaze lijevo i desno, halo neparne trake
+LIJEVO, DESNO, HALO = range(3)
+#Zadani pomak u koraku (v0*dt) kao udio polumjera. Sudar se vidi tek kad se diskovi već preklapaju, pa veći dt
+#precjenjuje tlak: uz 0.2 domene pod česticama Z je 1.72 za v0*dt = r/2, 1.59 za r/20, a Henderson daje 1.57
+POMAK_PO_KORAKU = 0.05
+#Najmanja paralelna učinkovitost (ubrzanje prema jednom radniku / broj radnika) koju scaling() prihvaća
+MIN_UCINKOVITOST = 0.6
+
+
+
+
+def henderson(packing):
+    """Hendersonova jednadžba stanja za tvrde diskove: Z = PA / NkT, za usporedbu s mjerenjem"""
+    return (1 + packing ** 2 / 8) / (1 - packing) ** 2
+
+
+
+
+class Tile:
+    """Dio posla jednog radnika: dvije trake domene (parna 2w i neparna 2w+1) i čestice u njima.
+
+    Radnik pamti indekse svojih čestica (po položaju u r_next) i nakon predviđanja provjerava
+    samo njih: one koje su prešle u traku susjednog radnika piše u svoj izlazni popis, a nakon
+    barijere preuzima one koje su susjedi poslali njemu. Čestice svoje neparne trake bliže
+    desnom rubu od 2*radius objavljuje kao halo za parnu traku desnog susjeda. Tako je posao
+    po koraku razmjeran česticama radnika i rubovima traka, a ne svim N česticama.
+
+    Sva polja su pogledi na dijeljenu memoriju. Sudari parnih traka se računaju zajedno s
+    haloom (česticama susjednih traka bliže od 2*radius), zatim neparne traka bez haloa;
+    trake su šire od dva promjera, pa dva radnika nikad ne mijenjaju istu česticu u isto vrijeme.
+    Čestica u jednom koraku ne smije prijeći više od jedne trake (v*dt je puno manje od polumjera)."""
+    def __init__(self, polja, razmjena, w, radnika, sirina, visina, radius, dt):
+        self.position, self.v, self.r_next, self.zbrojevi = polja
+        self.brojevi, self.popisi = razmjena
+        self.w = w
+        self.radnika = radnika
+        self.lijevi = (w - 1) % radnika
+        self.desni = (w + 1) % radnika
+        self.L = sirina
+        self.H = visina
+        self.radius = radius
+        self.dt = dt
+        self.traka = sirina / (2 * radnika)
+        self.virial = np.zeros(1)
+        # Samo na početku se gledaju sve čestice, poslije se popis mijenja prelascima
+        self.moje = np.nonzero(self.strips(self.position[:, 0]) // 2 == w)[0]
+        self.trake_mojih = self.strips(self.position[self.moje, 0])
+        self.parna = self.neparna = self.moje
+
+    def strips(self, x):
+        """Traka (0 do 2*radnika-1) za x koordinate, i izvan domene"""
+        return (x // self.traka).astype(np.intp) % (2 * self.radnika)
+
+    def predict(self):
+        """r_next za svoje čestice; one koje su prešle u traku susjednog radnika idu u izlazne popise"""
+        m = self.moje
+        r = self.position[m]
+        r += self.v[m] * self.dt
+        self.r_next[m] = r
+        trake = self.strips(r[:, 0])
+        vlasnik = trake // 2
+        ostaju = vlasnik == self.w
+        # S dva radnika lijevi i desni susjed su isti, pa sve ide u desni popis; s jednim nitko ne odlazi
+        for smjer, odlaze in ((LIJEVO, m[(vlasnik == self.lijevi) & (self.lijevi != self.desni)]), (DESNO, m[(vlasnik == self.desni) & ~ostaju])):
+            self.popisi[self.w, smjer, :len(odlaze)] = odlaze
+            self.brojevi[self.w, smjer] = len(odlaze)
+        self.moje = m[ostaju]
+        self.trake_mojih = trake[ostaju]
+
+    def adopt(self):
+        """Preuzima čestice koje su susjedi poslali, dijeli svoje po trakama i objavljuje halo"""
+        dosle = [self.popisi[self.lijevi, DESNO, :self.brojevi[self.lijevi, DESNO]]]
+        if self.desni != self.lijevi:
+            dosle.append(self.popisi[self.desni, LIJEVO, :self.brojevi[self.desni, LIJEVO]])
+        dosle = np.concatenate(dosle)
+        if len(dosle):
+            self.moje = np.concatenate((self.moje, dosle))
+            self.trake_mojih = np.concatenate((self.trake_mojih, self.strips(self.r_next[dosle, 0])))
+        parna = self.trake_mojih == 2 * self.w
+        self.parna = self.moje[parna]
+        self.neparna = self.moje[~parna]
+
+        x = (self.r_next[self.neparna, 0] - (2 * self.w + 1) * self.traka) % self.L  # Položaj od početka neparne trake
+        halo = self.neparna[x >= self.traka - 2 * self.radius]
+        self.popisi[self.w, HALO, :len(halo)] = halo
+        self.brojevi[self.w, HALO] = len(halo)
+        self.lijevi_rub = self.neparna[x < 2 * self.radius]  # Desni halo vlastite parne trake
+
+    def collide(self, traka, halo):
+        """Sudari u traci s periodičnim granicama; halo dodaje čestice susjednih traka"""
+        h = 2 * self.radius
+        if halo:
+            odabrane = np.concatenate((self.parna, self.lijevi_rub, self.popisi[self.lijevi, HALO, :self.brojevi[self.lijevi, HALO]]))
+        else:
+            odabrane = self.neparna
+        lokalno = np.empty((len(odabrane), 2))
+        lokalno[:, 0] = (self.r_next[odabrane, 0] - traka * self.traka) % self.L  # Položaj od početka trake
+        if halo:
+            lokalno[lokalno[:, 0] >= self.L - h, 0] -= self.L  # Lijevi halo ide ispred početka trake
+        lokalno[:, 1] = self.r_next[odabrane, 1] % self.H
+
+        # Slike čestica blizu donjeg ruba iznad gornjeg, za sudare preko granice u y
+        slike = np.nonzero(lokalno[:, 1] < h)[0]
+        lokalno = np.concatenate((lokalno, lokalno[slike] + (0.0, self.H)))
+        indeksi = np.concatenate((odabrane, odabrane[slike]))
+        pomak = lokalno - self.r_next[indeksi]  # Razlika lokalnih i globalnih koordinata svake čestice
+        slika = np.zeros(len(lokalno), dtype=bool)
+        slika[len(odabrane):] = True
+        u_halou = (lokalno[:, 0] < 0) | (lokalno[:, 0] >= self.traka)
+
+        i, j = sudari.pairs_grid(lokalno, self.radius, (-h, 0.0, self.traka + 2 * h, self.H + h))
+        vrijedi = ~(slika[i] & slika[j]) & ~(u_halou[i] & u_halou[j])
+        i, j = i[vrijedi], j[vrijedi]
+        return sudari.resolve_pairs(self.position, self.v, indeksi[i], indeksi[j], pomak=pomak[j] - pomak[i], virial=self.virial)
+
+    def integrate(self):
+        """Pomiče svoje čestice i vraća ih u domenu (periodične granice)"""
+        m = self.moje
+        v = self.v[m]
+        r = self.position[m]
+        r += v * self.dt
+        np.mod(r, (self.L, self.H), out=r)
+        self.position[m] = r
+        self.zbrojevi[self.w, V2] = float(np.einsum("ij,ij->", v, v))
+
+    def step_collisions(self, parna):
+        """Sudari u parnoj (s haloom) ili neparnoj traci ovog radnika; zbrojevi se skupljaju kroz obje"""
+        if parna:
+            self.virial[0] = 0.0
+            self.zbrojevi[self.w, SUDARA] = 0
+        self.zbrojevi[self.w, SUDARA] += self.collide(2 * self.w + (0 if parna else 1), halo=parna)
+        self.zbrojevi[self.w, VIRIAL] = self.virial[0]
+
+
+
+
+def _worker(ime, oblik, w, radnika, geometrija, pocetak, faza, kraj):
+    """Proces radnika: čeka naredbu, radi svoj dio koraka, usklađuje se s ostalima na barijerama"""
+    shm = shared_memory.SharedMemory(name=ime)
+    try:
+        zaglavlje, polja, razmjena = _views(shm, *oblik)
+        dio = Tile(polja, razmjena, w, radnika, *geometrija)
+        while True:
+            pocetak.wait()
+            if zaglavlje[0] == STOJ:
+                break
+            dio.predict()
+            faza.wait()
+            dio.adopt()
+            faza.wait()
+            dio.step_collisions(parna=True)
+            faza.wait()
+            dio.step_collisions(parna=False)
+            faza.wait()
+            dio.integrate()
+            kraj.wait()
+        del zaglavlje, polja, razmjena, dio
+    finally:
+        shm.close()
+
+
+
+
+def _layout(N, radnika):
+    """Polja u dijeljenoj memoriji: (oblik, dtype) redom kako stoje iza zaglavlja od 16 bajtova.
+
+    Popisi za razmjenu čestica ne mogu biti dulji od broja čestica jednog radnika, a on je
+    gotovo sigurno manji od dvostrukog prosjeka."""
+    dijelova = max(radnika, 1)
+    kapacitet = min(N, 2 * N // dijelova + 64)
+    return [((N, 2), np.float64), ((N, 2), np.float64), ((N, 2), np.float64), ((dijelova, 3), np.float64),
+            ((dijelova, 3), np.intp), ((dijelova, 3, kapacitet), np.intp)]
+
+
+def _views(shm, N, radnika):
+    """Zaglavlje (int64), polja position, v, r_next, zbrojevi i razmjena (brojevi, popisi) u jednom bloku dijeljene memorije"""
+    zaglavlje = np.ndarray((2,), dtype=np.int64, buffer=shm.buf)
+    pomak = 16
+    polja = []
+    for oblik, dtype in _layout(N, radnika):
+        polja.append(np.ndarray(oblik, dtype=dtype, buffer=shm.buf, offset=pomak))
+        pomak += polja[-1].nbytes
+    return zaglavlje, polja[:4], tuple(polja[4:])
+
+
+
+
+class PeriodicDomain:
+    """Plin tvrdih diskova u velikoj periodičnoj domeni, podijeljenoj na trake po radnicima.
+
+    Položaji i brzine su u dijeljenoj memoriji (multiprocessing.shared_memory); svaki od
+    `workers` procesa računa svoje dvije trake, a čestice na rubovima traka (halo) čita
+    izravno iz zajedničkih polja. workers=0 računa sve u ovom procesu. Jedinice su iste kao
+    u IdealGasSimulation: px, s i brzina kao temperatura, sve čestice imaju istu masu.
+    dt None je POMAK_PO_KORAKU * radius / v0; s njim je Z oko 1 % iznad Hendersonove jednadžbe."""
+    def __init__(self, N, width, height, radius, v0, dt=None, workers=None, seed=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if dt is None:
+            dt = POMAK_PO_KORAKU * radius / v0
+        self.N = N
+        self.width = float(width)
+        self.height = float(height)
+        self.radius = radius
+        self.v0 = v0
+        self.dt = dt
+        self.korak = 0
+        self.rng = np.random.default_rng(seed)
+        # Traka mora biti šira od dva promjera (vidi Tile), inače se smanjuje broj radnika
+        najvise = int(self.width // (8 * radius))
+        if self.height < 8 * radius or najvise < 1:
+            raise ValueError("Domena %gx%g je premala za čestice polumjera %g" % (width, height, radius))
+        self.workers = min(workers, najvise)
+
+        velicina = 16 + sum(int(np.prod(oblik)) * np.dtype(dtype).itemsize for oblik, dtype in _layout(N, self.workers))
+        self.shm = shared_memory.SharedMemory(create=True, size=velicina)
+        self.zaglavlje, polja, self.razmjena = _views(self.shm, N, self.workers)
+        self.position, self.v, self.r_next, self.zbrojevi = polja
+        self.position[:] = postavljanje.place_disks(N, (0, 0, self.width, self.height), radius, self.rng)
+        kutevi = self.rng.uniform(0, 2 * np.pi, size=N)
+        self.v[:, 0] = v0 * np.cos(kutevi)
+        self.v[:, 1] = v0 * np.sin(kutevi)
+        self.zbrojevi[:] = 0
+
+        geometrija = (self.width, self.height, radius, dt)
+        self.procesi = []
+        self.u_tijeku = False
+        if self.workers == 0:
+            self.dijelovi = [Tile(polja, self.razmjena, 0, 1, *geometrija)]
+            return
+        self.dijelovi = []
+        self.pocetak = multiprocessing.Barrier(self.workers + 1)
+        self.kraj = multiprocessing.Barrier(self.workers + 1)
+        faza = multiprocessing.Barrier(self.workers)
+        for w in range(self.workers):
+            proces = multiprocessing.Process(target=_worker, args=(self.shm.name, (N, self.workers), w, self.workers, geometrija,
+                                                                  self.pocetak, faza, self.kraj), daemon=True)
+            proces.start()
+            self.procesi.append(proces)
+
+    @property
+    def packing(self):
+        return self.N * math.pi * self.radius ** 2 / (self.width * self.height)
+
+    def begin_step(self):
+        """Pokreće jedan korak; radnici računaju dok pozivatelj radi nešto drugo (npr. crta)"""
+        if self.workers == 0:
+            self.step_inline()
+            return
+        self.zaglavlje[0] = KORAK
+        self.pocetak.wait()
+        self.u_tijeku = True
+
+    def finish_step(self):
+        """Čeka da radnici završe korak"""
+        if self.u_tijeku:
+            self.kraj.wait()
+            self.u_tijeku = False
+        self.korak += 1
+
+    def step(self):
+        self.begin_step()
+        self.finish_step()
+
+    def step_inline(self):
+        for dio in self.dijelovi:
+            dio.predict()
+        for dio in self.dijelovi:
+            dio.adopt()
+        for parna in (True, False):
+            for dio in self.dijelovi:
+                dio.step_collisions(parna)
+        for dio in self.dijelovi:
+            dio.integrate()
+
+    def run(self, n_steps):
+        for _ in range(n_steps):
+            self.step()
+        return self
+
+    def temperature(self):
+        """Kinetička temperatura (korijen srednjeg v^2) u zadnjem koraku"""
+        return math.sqrt(float(self.zbrojevi[:, V2].sum()) / self.N) if self.N else 0.0
+
+    def compressibility(self):
+        """Z = PA / NkT iz viralnog teorema: 1 + zbroj r_ij . dp_i / (2 dt N <v^2>/2) u zadnjem koraku.
+
+        Zbog fiksnog dt je malo veći od stvarnog, razlika raste s dt (vidi POMAK_PO_KORAKU)."""
+        kineticka = float(self.zbrojevi[:, V2].sum()) / 2
+        if kineticka <= 0:
+            return 1.0
+        return 1 + float(self.zbrojevi[:, VIRIAL].sum()) / (2 * self.dt * kineticka)
+
+    def collisions(self):
+        return int(self.zbrojevi[:, SUDARA].sum())
+
+    def close(self):
+        """Zaustavlja radnike i oslobađa dijeljenu memoriju"""
+        if self.shm is None:
+            return
+        if self.procesi:
+            if self.u_tijeku:
+                self.kraj.wait()
+                self.u_tijeku = False
+            self.zaglavlje[0] = STOJ
+            self.pocetak.wait()
+            for proces in self.procesi:
+                proces.join()
+            self.procesi = []
+        del self.zaglavlje, self.position, self.v, self.r_next, self.zbrojevi, self.razmjena
+        self.dijelovi = []
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+
+
+def domain_size(N, packing, radius, omjer=5 / 3):
+    """Širina i visina domene omjera `omjer` u kojoj N čestica zauzima udio površine `packing`"""
+    povrsina = N * math.pi * radius ** 2 / packing
+    sirina = math.sqrt(povrsina * omjer)
+    return sirina, sirina / omjer
+
+
+
+
+def scaling(N=10 ** 6, packing=0.2, radius=2, koraka=20, workers=None, min_efficiency=MIN_UCINKOVITOST):
+    """Koraka u sekundi za 1, 2, 4, ... radnika (do broja jezgri), vraća {radnika: koraka/s}.
+
+    Baca AssertionError ako je ubrzanje prema jednom radniku manje od min_efficiency * radnika
+    (None ne provjerava). Radnici kojih je više od jezgri se mjere, ali ne provjeravaju."""
+    jezgri = os.cpu_count() or 1
+    if workers is None:
+        workers = [1]
+        while workers[-1] * 2 <= jezgri:
+            workers.append(workers[-1] * 2)
+    workers = sorted(set(workers) | {1})
+    sirina, visina = domain_size(N, packing, radius)
+    rezultati = {}
+    losiji = []
+    for radnika in workers:
+        with PeriodicDomain(N, sirina, visina, radius, v0=100, workers=radnika, seed=0) as domena:
+            domena.run(2)
+            pocetak = time.perf_counter()
+            domena.run(koraka)
+            rezultati[radnika] = koraka / (time.perf_counter() - pocetak)
+        ubrzanje = rezultati[radnika] / rezultati[1]
+        print("%d radnika: %.2f koraka/s, ubrzanje %.2fx (učinkovitost %.0f %%)" % (radnika, rezultati[radnika], ubrzanje, 100 * ubrzanje / radnika),
+              flush=True)
+        if min_efficiency is not None and radnika <= jezgri and ubrzanje < min_efficiency * radnika:
+            losiji.append(radnika)
+    if jezgri == 1:
+        print("Samo jedna jezgra, skaliranje se ne može provjeriti.")
+    if losiji:
+        raise AssertionError("Ubrzanje s %s radnika je manje od %.0f %% broja radnika" % (losiji, 100 * min_efficiency))
+    return rezultati
+
+
+
+
+if __name__ == "__main__":
+    import sys
+    scaling(N=int(float(sys.argv[1])) if len(sys.argv) > 1 else 10 ** 6)
@@ -0,0 +1,349 @@
+"""Eksperimenti zadani datotekom: postavke simulacije i raspored promjena parametara.
+
+    python eksperiment.py pokus.json [drugi.toml ...] [-o rezultati] [--workers 4]
+    python eksperiment.py pokus.json --viewer
+    python eksperiment.py --schedule "ramp v0 100 1000 over 5000" --steps 6000 -o rampa
+
+Primjer datoteke (JSON ili TOML s istim ključevima):
+
+    {"name": "zagrijavanje", "steps": 6000, "sample_every": 10, "seeds": [1, 2, 3],
+     "simulation": {"N": 100, "volume": 300, "hard": 0, "barostat": true},
+     "schedule": ["ramp v0 100 1000 over 5000",
+                  {"param": "N", "to": 150, "at": 5500}],
+     "record": {"every": 10, "dtype": "float32"}}
+
+Svaki pokus (i svaki seed) piše u svoj direktorij config.json, mjerenja.csv (korak, vrijeme,
+N, volumen, tlak, temperatura, v0), summary.json, konačno stanje (stanje.plin, za
+spremanje.load) i po želji snimku (snimka/, za pregled u prikazu)."""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import ansambl
+import spremanje
+
+
+
+
+#Parametri koji se mogu mijenjati tijekom pokusa (isti koje admin može upisati u prikazu)
+PARAMETRI = ("v0", "N", "radius", "volume", "pressure")
+#Stupci datoteke mjerenja.csv
+STUPCI = ("korak", "vrijeme", "N", "volume", "pressure", "temperature", "v0")
+
+
+
+
+def set_parameter(sim, ime, vrijednost):
+    """Mijenja jedan parametar simulacije bez zaustavljanja: temperatura ide preko termostata,
+    volumen se mijenja preslikavanjem granice, čestice se dodaju ili miču.
+
+    Tlak je posljedica N, T i V, pa se može zadati samo kao cilj barostata; bez barostata je ValueError."""
+    if ime == "v0":
+        sim.change(2, sim.N, sim.volume, float(vrijednost))
+        sim.set_temperature(float(vrijednost))
+    elif ime == "N":
+        novi = max(int(round(vrijednost)), 1)
+        if novi != sim.N:
+            sim.change(1, novi, sim.volume, sim.v0)
+            sim.add_particles(novi)
+    elif ime == "radius":
+        sim.radius = float(vrijednost)
+    elif ime == "volume":
+        sim.change(3, sim.N, float(vrijednost), sim.v0)
+        sim.set_volume(float(vrijednost))
+    elif ime == "pressure":
+        if sim.barostat is None:
+            raise ValueError("Tlak se može zadati samo simulaciji s barostatom (klipom)")
+        sim.barostat.target = float(vrijednost)
+    else:
+        raise ValueError("Nepoznat parametar: %r (mogući su %s)" % (ime, ", ".join(PARAMETRI)))
+
+
+def get_parameter(sim, ime):
+    return float(getattr(sim, ime))
+
+
+
+
+class Ramp:
+    """Promjena parametra od koraka `start` kroz `steps` koraka, linearno od `od` do `do`.
+
+    steps=0 je skok na `do` u koraku `start`; od=None znači vrijednost koju parametar ima u
+    trenutku početka rampe. Nakon kraja rampe parametar ostaje na `do`."""
+    def __init__(self, param, do, start=0, steps=0, od=None):
+        if param not in PARAMETRI:
+            raise ValueError("Nepoznat parametar: %r (mogući su %s)" % (param, ", ".join(PARAMETRI)))
+        self.param = param
+        self.do = float(do)
+        self.start = int(start)
+        self.steps = max(int(steps), 0)
+        self.od = None if od is None else float(od)
+        self.pocetna = self.od
+        self.zadnja = None  # Zadnja postavljena vrijednost, ista se ne postavlja ponovno
+
+    def __repr__(self):
+        return "Ramp(%r, %r -> %r, start=%d, steps=%d)" % (self.param, self.od, self.do, self.start, self.steps)
+
+    def to_dict(self):
+        return {"param": self.param, "from": self.od, "to": self.do, "at": self.start, "steps": self.steps}
+
+    @property
+    def kraj(self):
+        return self.start + self.steps
+
+    def value(self, korak, trenutna):
+        """Vrijednost parametra u koraku `korak`, None prije početka rampe"""
+        if korak < self.start:
+            return None
+        if self.pocetna is None:
+            self.pocetna = trenutna
+        if korak >= self.kraj:
+            return self.do
+        return self.pocetna + (self.do - self.pocetna) * (korak - self.start) / self.steps
+
+    def apply(self, sim, korak):
+        vrijednost = self.value(korak, get_parameter(sim, self.param))
+        if vrijednost is None:
+            return
+        if self.param == "N":
+            vrijednost = float(round(vrijednost))
+        if vrijednost != self.zadnja:
+            set_parameter(sim, self.param, vrijednost)
+            self.zadnja = vrijednost
+
+
+KORAK_RASPOREDA = re.compile(
+    r"^\s*(?:(?P<ramp>ramp)\s+(?P<param>\w+)\s+(?:(?P<od>[-+\d.eE]+)\s*(?:->|→|\s)\s*)?(?P<do>[-+\d.eE]+)\s+over\s+(?P<steps>\d+)(?:\s+steps?)?"
+    r"|(?P<set>set)\s+(?P<param2>\w+)\s+(?:to\s+)?(?P<vrijednost>[-+\d.eE]+))"
+    r"(?:\s+(?:at|from)\s+(?:step\s+)?(?P<start>\d+))?\s*$", re.IGNORECASE)
+
+
+def parse_ramp(opis):
+    """Ramp iz teksta ("ramp v0 100 1000 over 5000", "ramp v0 100->1000 over 5000 steps at 200",
+    "set N 150 at 2000") ili rječnika {"param", "to", "from", "at", "steps"}"""
+    if isinstance(opis, Ramp):
+        return opis
+    if isinstance(opis, dict):
+        return Ramp(opis["param"], opis["to"], start=opis.get("at", 0), steps=opis.get("steps", 0), od=opis.get("from"))
+    m = KORAK_RASPOREDA.match(opis)
+    if m is None:
+        raise ValueError("Ne razumijem korak rasporeda: %r" % (opis,))
+    start = int(m.group("start") or 0)
+    if m.group("ramp"):
+        return Ramp(m.group("param"), m.group("do"), start=start, steps=int(m.group("steps")), od=m.group("od"))
+    return Ramp(m.group("param2"), m.group("vrijednost"), start=start)
+
+
+
+
+class Experiment:
+    """Jedan pokus: postavke simulacije (kao ansambl.make_simulation), broj koraka i raspored promjena.
+
+    attach() spaja pokus na simulaciju; ona nakon svakog koraka zove tick(), pa raspored radi
+    isto bez prozora (run()) i u prikazu, gdje simulacija radi u svojoj dretvi. Nakon
+    `steps` koraka pokus se sam zatvara i zapisuje rezultate u `output`."""
+    def __init__(self, simulation=None, steps=1000, schedule=(), sample_every=10, record=None, output=None, name=None, seed=None,
+                 save_state=True):
+        self.simulation = dict(simulation or {})
+        self.simulation.setdefault("thermostat", "berendsen")  # Bez termostata bi svaka promjena v0 ponovno slučajno postavila brzine
+        self.steps = int(steps)
+        self.schedule = [parse_ramp(opis) for opis in schedule]
+        if not self.simulation.get("barostat") and any(ramp.param == "pressure" for ramp in self.schedule):
+            raise ValueError("Raspored mijenja tlak, a simulacija nema barostat (dodajte \"barostat\": true)")
+        self.sample_every = max(1, int(sample_every))
+        self.record = record  # None, True ili {"every": ..., "dtype": ...} za snimanje.Recorder
+        self.name = name or "pokus"
+        self.output = output or self.name
+        self.seed = seed
+        self.save_state = save_state
+        self.sim = None
+        self.uzorci = []
+        self.pocetak = None
+        self.zavrsen = False
+
+    @classmethod
+    def from_config(cls, config, **promjene):
+        postavke = {ime: config[ime] for ime in ("simulation", "steps", "schedule", "sample_every", "record", "output", "name", "seed", "save_state")
+                    if ime in config}
+        postavke.update(promjene)
+        return cls(**postavke)
+
+    def to_dict(self):
+        return {"name": self.name, "steps": self.steps, "seed": self.seed, "sample_every": self.sample_every, "record": self.record,
+                "simulation": self.simulation, "schedule": [ramp.to_dict() for ramp in self.schedule]}
+
+    def make_simulation(self):
+        return ansambl.make_simulation(self.simulation, seed=self.seed)
+
+    def attach(self, sim):
+        """Spaja pokus na simulaciju i otvara izlaze; korak 0 je trenutni korak simulacije"""
+        self.sim = sim
+        self.korak_0 = sim.korak
+        self.uzorci = []
+        self.zavrsen = False
+        os.makedirs(self.output, exist_ok=True)
+        with open(os.path.join(self.output, "config.json"), "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        if self.record:
+            postavke = self.record if isinstance(self.record, dict) else {}
+            sim.start_recording(os.path.join(self.output, "snimka"), dtype=postavke.get("dtype", "float32"), every=postavke.get("every", 1))
+        for ramp in self.schedule:
+            ramp.pocetna, ramp.zadnja = ramp.od, None
+        self.pocetak = time.perf_counter()
+        sim.experiment = self
+        self.apply_schedule()
+        self.sample()
+        return sim
+
+    @property
+    def korak(self):
+        """Broj koraka od početka pokusa"""
+        return self.sim.korak - self.korak_0
+
+    def apply_schedule(self):
+        for ramp in self.schedule:
+            ramp.apply(self.sim, self.korak)  # Rasporedi računaju s koracima pokusa, ne simulacije
+
+    def sample(self):
+        sim = self.sim
+        self.uzorci.append((self.korak, self.korak * sim.dt, sim.N, sim.volume, float(sim.pressure), float(sim.temperature), float(sim.v0)))
+
+    def tick(self, sim):
+        """Zove ga simulacija nakon svakog koraka"""
+        if self.korak % self.sample_every == 0 or self.korak >= self.steps:
+            self.sample()
+        if self.korak >= self.steps:
+            self.finish()
+            return
+        self.apply_schedule()
+
+    def finish(self):
+        """Odspaja pokus i zapisuje rezultate, vraća sažetak"""
+        if self.zavrsen or self.sim is None:
+            return self.summary()
+        self.zavrsen = True
+        sim = self.sim
+        sim.experiment = None
+        if self.record:
+            sim.stop_recording()
+        np.savetxt(os.path.join(self.output, "mjerenja.csv"), np.array(self.uzorci, dtype=float).reshape(-1, len(STUPCI)),
+                   delimiter=",", header=",".join(STUPCI), comments="", fmt="%.10g")
+        if self.save_state:
+            spremanje.save(sim, os.path.join(self.output, "stanje.plin"))
+        self.sekunde = time.perf_counter() - self.pocetak
+        sazetak = self.summary()
+        with open(os.path.join(self.output, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(sazetak, f, indent=1)
+        return sazetak
+
+    def summary(self):
+        zadnji = dict(zip(STUPCI, self.uzorci[-1])) if self.uzorci else {}
+        return {"name": self.name, "seed": self.seed, "output": self.output, "steps": self.korak if self.sim is not None else 0,
+                "samples": len(self.uzorci), "seconds": getattr(self, "sekunde", None), "final": zadnji}
+
+    def run(self):
+        """Cijeli pokus bez prozora"""
+        sim = self.attach(self.make_simulation())
+        while not self.zavrsen:
+            sim.step()
+        return self.summary()
+
+
+
+
+def load_config(path):
+    """Rječnik postavki iz .json ili .toml datoteke"""
+    if path.lower().endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def expand(config, output=None):
+    """Pokusi iz jedne datoteke postavki: po jedan za svaki seed iz "seeds" (svaki u svom poddirektoriju)"""
+    ime = config.get("name", "pokus")
+    izlaz = os.path.join(output, ime) if output else config.get("output", ime)
+    seeds = config.get("seeds")
+    if not seeds:
+        return [Experiment.from_config(config, output=izlaz, name=ime)]
+    return [Experiment.from_config(config, output=os.path.join(izlaz, "seed_%s" % seed), name=ime, seed=seed) for seed in seeds]
+
+
+def _run(experiment):
+    return experiment.run()
+
+
+def run_batch(experiments, workers=1):
+    """Pokreće pokuse jedan za drugim (workers=1) ili u procesima, vraća sažetke istim redom"""
+    if workers == 1 or len(experiments) <= 1:
+        return [experiment.run() for experiment in experiments]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run, experiments))
+
+
+def run_viewer(experiment, prikaz=None):
+    """Pokus u prikazu: simulacija radi u dretvi, raspored se primjenjuje nakon svakog koraka.
+
+    prikaz je već učitan modul "Simulacija idealnog plina.py" (None = učitava se ovdje)."""
+    if prikaz is None:
+        import performanse
+        prikaz = performanse.load_viewer(dummy=False)
+    sim = experiment.attach(experiment.make_simulation())
+    prikaz.init_display()
+    try:
+        prikaz.Prikaz(sim, prikaz.screen_width, prikaz.screen_height, threaded=True, physics_rate=60, profiler=prikaz.profiler,
+                      autosave=prikaz.autosave).run_simulation()
+    finally:
+        sazetak = experiment.finish()  # I kad se prozor zatvori prije kraja, zapisuje se ono što je izračunato
+    return sazetak
+
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pokusi sa simulacijom idealnog plina zadani datotekom postavki")
+    parser.add_argument("configs", nargs="*", help=".json ili .toml datoteke s postavkama pokusa")
+    parser.add_argument("-o", "--output", help="direktorij u koji idu rezultati svih pokusa")
+    parser.add_argument("--workers", type=int, default=1, help="broj pokusa koji se računaju istovremeno (0 = broj jezgri)")
+    parser.add_argument("--viewer", action="store_true", help="prikazuje pokus u prozoru (samo jedan pokus)")
+    parser.add_argument("--schedule", action="append", default=[], metavar="KORAK", help='dodatni korak rasporeda, npr. "ramp v0 100 1000 over 5000"')
+    parser.add_argument("--steps", type=int, help="broj koraka (zamjenjuje onaj iz datoteke)")
+    parser.add_argument("--set", action="append", default=[], metavar="IME=VRIJEDNOST", help="postavka simulacije, npr. N=200 ili hard=0")
+    args = parser.parse_args(argv)
+
+    configs = [load_config(path) for path in args.configs] or [{"name": "pokus"}]
+    for config in configs:
+        config.setdefault("name", "pokus")
+        config["schedule"] = list(config.get("schedule", [])) + args.schedule
+        if args.steps is not None:
+            config["steps"] = args.steps
+        postavke = config.setdefault("simulation", {})
+        for par in args.set:
+            ime, _, vrijednost = par.partition("=")
+            postavke[ime] = json.loads(vrijednost) if re.match(r"^[-+\d.\[{]|^(true|false|null)$", vrijednost) else vrijednost
+    pokusi = [pokus for config in configs for pokus in expand(config, args.output)]
+
+    if args.viewer:
+        if len(pokusi) != 1:
+            parser.error("--viewer prikazuje samo jedan pokus")
+        sazeci = [run_viewer(pokusi[0])]
+    else:
+        sazeci = run_batch(pokusi, args.workers or os.cpu_count() or 1)
+    for sazetak in sazeci:
+        zadnji = sazetak["final"]
+        print("%-30s %6d koraka  V=%.4g L  P=%.4g atm  T=%.4g  -> %s" % (
+            os.path.basename(sazetak["output"].rstrip(os.sep)) if sazetak["seed"] is not None else sazetak["name"], sazetak["steps"],
+            zadnji.get("volume", 0), zadnji.get("pressure", 0), zadnji.get("temperature", 0), sazetak["output"]), flush=True)
+    return 0
+
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
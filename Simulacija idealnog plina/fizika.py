@@ -0,0 +1,501 @@
+import numpy as np
+import math 
+import dinamika
+import dogadaji
+import mjerenja
+import postavljanje
+import snimanje
+import termostati
+import kerneli
+import cestice
+import vrste
+import povijest
+
+
+
+
+def border_rect_for_volume(volume):
+    """Granica (x, y, širina, visina) za volumen u L, omjer stranica 500:300"""
+    new_border_width = ((((float(volume) * 500) * 1000) / 300) ** 0.5) 
+    new_border_height = new_border_width * (300 / 500) 
+    return (50, 150, new_border_width, new_border_height)
+
+
+
+
+#Fizika simulacije, ne ovisi o pygame-u pa se može pokretati bez prozora
+class IdealGasSimulation:
+    def __init__(self, N, molar_mass, radius, screen_width, screen_height, v0, duration, nsteps, border_rect, hard, admin=0, collision_engine="grid", integrator="fixed", pressure_mode="measured", seed=None, backend="numpy", species=None, potential=None, thermostat=None, barostat=None, dtype=None):
+        self.N = N  # Number of particles
+        self.M = molar_mass  # Molarna masa u kg/mol
+        self._radius = radius  # Radius
+
+        #Smjesa plinova: species je [(ime iz vrste.VRSTE ili vrste.Species, broj čestica), ...]
+        #M ostaje referentna masa za temperaturu, a radius je najveći polumjer (za postavljanje i crtanje)
+        if species is None:
+            self.species = [vrste.Species("plin", molar_mass, radius)]
+            broj_vrste = np.array([N])
+        else:
+            self.species, broj_vrste = vrste.species_table(species)
+            self.N = N = int(broj_vrste.sum())
+            self._radius = radius = max(vrsta.radius for vrsta in self.species)
+        self.screen_width = screen_width   # Duljina ekrana
+        self.duration = duration  # Trajanje (s)
+        self.nsteps = nsteps  # Broj intervala
+        self.dt = duration / nsteps  # Interval (s)
+        self.dt_array = np.full((self.N, 1), self.dt)
+        self.v0 = v0  # Početna brzina čestica koja zbog preglednosti simulacije služi kao Temperatura
+        self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M) #Prava brzina po računu u m/s 
+        self.border_rect = border_rect  # Border rectangle (x, y, širina, visina)
+        self.pressure = 1 #Tlak za simulaciju u atm
+        self.volume = float(float(border_rect[2]) * float(border_rect[3])) / 1000 #Volumen za simulaciju u L
+        
+        self.hard = hard #Određuje je li čvrst ili osjetljiv cilindar
+        self.admin = admin #Dozvoljava input
+        self.collision_engine = collision_engine #"grid" (mreža ćelija) ili "all_pairs" (referentna provjera svih parova)
+        self.integrator = integrator #"fixed" (fiksni dt), "event" (od sudara do sudara) ili "verlet" (meki potencijal)
+        self.pressure_mode = pressure_mode #"measured" (iz udaraca o zidove), "virial" (za "verlet") ili "proportional" (samo preko change())
+        self.potential = dinamika.make_potential(potential, v0) if integrator == "verlet" else None #LJ ili WCA za "verlet"
+        self.thermostat = termostati.make_thermostat(thermostat) #"rescale", "berendsen", "andersen" ili None (temperatura se mijenja skokom)
+        self.barostat = termostati.make_barostat(barostat) #Klip koji drži tlak u osjetljivom cilindru, None znači skokove volumena
+        self.wall_pressure = mjerenja.WallPressure() #Skuplja impuls predan zidovima
+        self.temperature = float(v0) #Izmjerena kinetička temperatura
+        self.seed = seed
+        self.rng = np.random.default_rng(seed) #Vlastiti generator slučajnih brojeva, isti seed daje istu simulaciju
+        self.korak = 0 #Broj izračunatih intervala
+        self.recorder = None #snimanje.Recorder ako se simulacija snima
+        self.autosave = None #spremanje.AutoSave ako se stanje povremeno sprema
+        self.experiment = None #eksperiment.Experiment čiji se raspored primjenjuje nakon svakog koraka
+        self.kernels = kerneli.make_kernels(backend) #"numpy" ili "numba", koraci s unaprijed alociranim poljima
+        self.backend = self.kernels.name
+        
+        #Povijest za graf (korak, volumen, tlak, temperatura) u prstenima stalne veličine
+        self.povijest = povijest.TimeSeries()
+        self.povijest.append(self.korak, self.volume/1000, self.pressure, self.v0)
+
+
+
+        self.k_N = ((self.volume/1000) * (self.pressure*101325) * 6.022 * (10**23)) / (8.314*self.v0 * self.N) #Za realan broj čestica, tj. nalik na mjernu jedinicu.
+
+        # Stvara nasumična mjesta
+        grid_size = int(np.ceil(np.sqrt(N)))  # Koristi za stvaranje čestica unutar granica
+        spacing = min((self.screen_width  - border_rect[2]) / grid_size, (self.screen_width  - border_rect[3]) / grid_size)  # Popravlja kako bi stale unutar granica
+        x = np.linspace(border_rect[0] + radius + spacing / 2, border_rect[0] + border_rect[2] - radius - spacing / 2, grid_size)
+        y = np.linspace(border_rect[1] + radius + spacing / 2, border_rect[1] + border_rect[3] - radius - spacing / 2, grid_size)
+        pos = [(xi, yi) for xi in x for yi in y]
+
+        #Stvara kuteve pod kojim se kreću i njihove brzine
+        Kutevi = self.rng.uniform(0, 2 * np.pi, size=self.N)
+        vx, vy = self.v0 * np.cos(Kutevi), self.v0 * np.sin(Kutevi)
+
+        #Čestice su u spremniku sa stupcima position, v, mass, radius; self.position i self.v su pogledi na aktivni dio
+        #dtype stanja: float32 ili float64, None znači float32 od cestice.VELIKI_N čestica
+        self.store = cestice.ParticleStore(N, dtype=cestice.default_dtype(N) if dtype is None else dtype)
+        if self.mixture:
+            #Smjesa: nasumična mjesta bez preklapanja i Maxwell-Boltzmannove brzine za svaku vrstu
+            vrsta = np.repeat(np.arange(len(self.species)), broj_vrste)
+            mase, polumjeri = vrste.columns(self.species, vrsta)
+            self.store.append(postavljanje.place_disks(N, border_rect, radius, self.rng), vrste.maxwell_boltzmann(self.rng, N, self.v0, mase, self.M),
+                              mase, polumjeri, vrsta)
+        else:
+            self.store.append(np.array(pos[:N]).reshape(-1, 2), np.stack((vx, vy), axis=1), self.M, self.radius)
+
+        # Integrator od sudara do sudara ili molekularna dinamika
+        self.events = self.make_integrator()
+
+    @property
+    def position(self):
+        return self.store.position
+
+    @position.setter
+    def position(self, vrijednosti):
+        self.store.set_column("position", vrijednosti)
+
+    @property
+    def v(self):
+        return self.store.v
+
+    @v.setter
+    def v(self, vrijednosti):
+        self.store.set_column("v", vrijednosti)
+
+    @property
+    def radius(self):
+        return self._radius
+
+    @radius.setter
+    def radius(self, vrijednost):
+        """Polumjer svih čestica: upisuje se i u stupac spremnika, pa ga integratori i kerneli vide odmah.
+
+        Smjesa ima polumjer svake vrste, pa se njen zajednički (najveći) polumjer ne može mijenjati."""
+        if self.mixture:
+            if vrijednost != max(vrsta.radius for vrsta in self.species):
+                raise ValueError("Smjesa ima polumjer svake vrste, zajednički polumjer se ne može promijeniti")
+            self._radius = vrijednost
+            return
+        self._radius = vrijednost
+        self.species[0].radius = vrijednost
+        self.store.radius[:] = vrijednost
+        self.store.verzija += 1
+
+    @property
+    def mixture(self):
+        """Ima li simulacija više vrsta čestica (tada se koriste polumjer i masa svake čestice)"""
+        return len(self.species) > 1
+
+    @property
+    def dtype(self):
+        return self.store.dtype
+
+    def weights(self):
+        """Mase čestica u odnosu na referentnu masu M, None ako su sve iste"""
+        return self.store.mass / self.M if self.mixture else None
+
+    def energy(self):
+        """Ukupna energija u jedinicama simulacije (masa M = 1): zbroj m v^2 / 2, uz potencijalnu za "verlet".
+
+        Zbraja se u float64 i kad je stanje u float32, pa pomak energije pokazuje samo grešku koraka."""
+        if self.integrator == "verlet" and self.events is not None:
+            return self.events.energy()
+        v2 = (self.v * self.v).sum(axis=1, dtype=np.float64)
+        weights = self.weights()
+        return 0.5 * float(v2.sum() if weights is None else np.dot(weights, v2))
+
+    def memory_bytes(self):
+        """Memorija stanja: spremnik čestica, međuspremnici kernela i bajtova po čestici za oboje"""
+        medjuspremnici = self.kernels.nbytes()
+        return {"store": self.store.nbytes(), "kernels": medjuspremnici,
+                "per_particle": self.store.bytes_per_particle() + medjuspremnici / max(self.N, 1)}
+
+
+
+    def make_integrator(self):
+        """Objekt koji računa cijeli interval umjesto check_collisions + integrate, None za fiksni dt"""
+        if self.integrator == "event":
+            return dogadaji.EventDriven(self)
+        if self.integrator == "verlet":
+            return dinamika.VelocityVerlet(self, self.potential)
+        return None
+
+    def check_collisions(self):
+        """Provjerava kada se sudare čestice ili kada udare o zid"""
+        r_next = self.kernels.predict(self.position, self.v, self.dt)
+
+        # Gleda kad se sudare sa zidom i pamti impuls predan zidu
+        radius = self.store.radius if self.mixture else self.radius
+        impulsi = self.kernels.reflect_walls(r_next, self.v, self.border_rect, radius, self.weights())
+        for zid in (mjerenja.LIJEVI, mjerenja.DESNI, mjerenja.GORNJI, mjerenja.DONJI):
+            self.wall_pressure.add(zid, impulsi[zid])
+
+        # Gleda kad se međusobno sudare čestice
+        if self.collision_engine == "grid":
+            self.kernels.collide(r_next, self.position, self.v, radius, self.border_rect, self.store.mass if self.mixture else None)
+            return
+
+        # Referentni način: provjerava svaki par posebno (samo za jednu vrstu čestica)
+        for i in range(self.N):
+            for j in range(i + 1, self.N):
+                if np.linalg.norm(r_next[i] - r_next[j]) < 2 * self.radius:
+                    rdiff = self.position[i] - self.position[j]  # Vektor za česticu [i] i česticu [j]
+                    vdiff = self.v[i] - self.v[j]
+                    self.v[i] = self.v[i] - rdiff.dot(vdiff) / rdiff.dot(rdiff) * rdiff  # Vraća brzinu za česticu [i]
+                    self.v[j] = self.v[j] + rdiff.dot(vdiff) / rdiff.dot(rdiff) * rdiff  # Vraća brzinu za česticu [j]
+
+
+
+
+
+
+
+
+    def step(self):
+        """Izračunava položaje u sljedećem intervalu"""
+        if self.events is not None:
+            self.events.advance(self.dt)
+        else:
+            self.check_collisions()
+            self.kernels.integrate(self.position, self.v, self.dt)
+        if self.thermostat is not None:
+            self.thermostat.apply(self)
+        if self.barostat is not None:
+            self.barostat.apply(self)
+        self.measure()
+        self.korak += 1
+        if self.recorder is not None:
+            self.recorder.record(self)
+        if self.autosave is not None:
+            self.autosave.tick(self)
+        if self.experiment is not None:
+            self.experiment.tick(self)
+
+    def velocities_changed(self, indices=None, scale=None):
+        """Brzine su promijenjene na mjestu (termostat), integrator od sudara do sudara mora ponovno predvidjeti sudare.
+
+        Ako su sve brzine pomnožene s `scale`, samo se skaliraju vremena događaja; ako su promijenjene
+        samo čestice `indices`, ponovno se predviđaju samo njihovi sudari."""
+        if self.integrator != "event" or self.events is None:
+            return
+        if scale is not None:
+            self.events.scale_velocities(scale)
+        elif indices is not None:
+            self.events.invalidate(indices)
+        else:
+            self.events.rebuild()
+
+    def walls_moved(self):
+        """Klip je pomaknuo desni i donji zid (barostat) bez pomicanja čestica"""
+        if self.integrator == "event" and self.events is not None:
+            self.events.walls_moved()
+
+    @property
+    def pressure_measured(self):
+        """Računa li se tlak iz mjerenja (udarci o zidove ili viral); inače ga mijenja samo change()"""
+        return self.pressure_mode == "measured" or (self.pressure_mode == "virial" and self.integrator == "verlet")
+
+    def measure(self):
+        """Zatvara interval mjerenja tlaka i temperature.
+
+        Dok prsten nema dovoljno intervala (na početku i nakon svakog reseta mjerenja), tlak je
+        onaj idealnog plina za trenutni N, temperaturu i granicu."""
+        self.wall_pressure.end_step(self.dt, self.v, self.weights())
+        self.temperature = self.wall_pressure.temperature()
+        if not self.pressure_measured:
+            return
+        if self.wall_pressure.broj < self.wall_pressure.prozor // 4:
+            tlak_2d = mjerenja.ideal_pressure_2d(self.N, self.temperature, self.border_rect)
+        elif self.pressure_mode == "virial":
+            tlak_2d = self.events.virial_pressure_2d()
+        else:
+            tlak_2d = self.wall_pressure.pressure_2d(self.border_rect)
+        self.pressure = mjerenja.to_atm(tlak_2d, self.k_N, self.temperature)
+
+    def add_particles(self, new_N):
+        """Nadodava i miče čestice."""
+        if new_N > self.N:
+            #Nove čestice na slobodnim mjestima, bez preklapanja s postojećim
+            new_positions = postavljanje.place_disks(new_N - self.N, self.border_rect, self.radius, self.rng, existing=self.position)
+
+            #Dodaje ih na kraj spremnika (bez kopiranja postojećih dok ima mjesta)
+            if self.mixture:
+                #Vrste novih čestica su u omjeru u kojem su već u smjesi
+                udjeli = vrste.counts(self.store, len(self.species)) + 1e-12
+                vrsta = self.rng.choice(len(self.species), size=len(new_positions), p=udjeli / udjeli.sum())
+                mase, polumjeri = vrste.columns(self.species, vrsta)
+                self.store.append(new_positions, vrste.maxwell_boltzmann(self.rng, len(new_positions), self.v0, mase, self.M),
+                                  mase, polumjeri, vrsta)
+            else:
+                self.store.append(new_positions, self.rng.uniform(-self.v0, self.v0, size=(len(new_positions), 2)), self.M, self.radius)
+        elif new_N < self.N:
+            # Miče nasumično odabrane čestice, na njihova mjesta dolaze zadnje
+            self.store.remove(self.rng.choice(self.N, size=self.N - new_N, replace=False))
+        self.N = new_N
+        self.wall_pressure.reset()
+
+
+
+
+
+
+
+
+
+    def adjust_particle_positions(self, new_volume, rescale=False):
+        """Popravlja poziciju čestica kad se mijenja volumen.
+
+        Ako je rescale True, položaji se samo afino preslikaju u novu granicu (brzine ostaju iste)."""
+        
+        if float(new_volume) != self.volume:
+            if float(new_volume) <= 150:
+                new_volume = 150
+            if float(new_volume) >= 500:
+                new_volume = 500
+
+            #Izračuna novu granicu rectengla po volumenu
+            new_border_rect = border_rect_for_volume(new_volume)
+
+            # Stvara čestice unutar granice
+            if rescale:
+                new_positions = postavljanje.rescale_positions(self.position, self.border_rect, new_border_rect, self.radius, self.rng)
+            else:
+                new_positions = postavljanje.place_disks(len(self.position), new_border_rect, self.radius, self.rng)
+
+            # Updatea čestice i granice
+            self.position = new_positions
+            self.border_rect = new_border_rect
+            self.volume = float(new_volume)
+            self.wall_pressure.reset()
+            if self.barostat is not None:
+                self.barostat.reset()
+
+    def set_volume(self, new_volume):
+        """Mijenja volumen na gumb ili unos.
+
+        S barostatom se cilj tlaka promijeni po Boyleovom zakonu i klip postupno dođe do novog
+        volumena; bez njega se granica odmah promijeni, a položaji se afino preslikaju u nju."""
+        if self.barostat is None:
+            self.adjust_particle_positions(new_volume, rescale=True)
+            return
+        new_volume = min(max(float(new_volume), self.barostat.najmanji), self.barostat.najveci)
+        if self.barostat.target is None:
+            self.barostat.target = float(self.pressure)
+        self.barostat.target *= self.volume / new_volume
+
+
+
+
+
+
+
+
+
+
+
+    def crtanje_grafa(self):
+        """Dodaje vrijednosti u povijest pri svakoj promijeni (memorija ostaje ista koliko god se zove)"""
+        self.povijest.append(self.korak, self.volume / 1000, self.pressure, self.v0)
+
+
+
+
+
+
+
+
+
+
+    
+    def set_temperature(self, new_velocity, reseed=False):
+        """Postavlja novu temperaturu.
+
+        S termostatom se mijenja samo cilj i čestice se postupno zagriju ili ohlade; bez njega
+        (ili s reseed=True) čestice odmah dobiju nove nasumične brzine."""
+        if self.thermostat is not None and not reseed:
+            self.v0 = float(new_velocity)
+            self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M)
+            return
+        global Kutevi
+        Kutevi = self.rng.uniform(0, 2 * np.pi, size=self.N) 
+        self.v0 = float(new_velocity)
+        if self.mixture:
+            self.v = vrste.maxwell_boltzmann(self.rng, self.N, self.v0, self.store.mass, self.M)
+        else:
+            vx, vy = self.v0 * np.cos(Kutevi), self.v0 * np.sin(Kutevi)
+            self.v = np.stack((vx, vy), axis=1)
+        self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M)
+
+    def species_counts(self):
+        """Broj čestica svake vrste"""
+        return vrste.counts(self.store, len(self.species))
+
+    def species_temperatures(self):
+        """Kinetička temperatura svake vrste (u ravnoteži su sve jednake sim.temperature)"""
+        return vrste.temperatures(self.store, len(self.species), self.M)
+
+    def partial_pressures(self):
+        """Parcijalni tlak svake vrste u atm, zbroj je sim.pressure"""
+        return vrste.partial_pressures(self.store, len(self.species), self.pressure)
+
+
+
+
+
+
+
+    def start_recording(self, path, dtype=np.float32, every=1):
+        """Počinje snimati position, v i makroskopske veličine u direktorij path"""
+        self.stop_recording()
+        self.recorder = snimanje.Recorder(path, dtype=dtype, every=every)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+
+
+
+
+
+
+    def run(self, n_steps):
+        """Pokreće simulaciju bez crtanja za n_steps intervala"""
+        for _ in range(n_steps):
+            self.step()
+        return self
+
+
+
+
+
+
+
+
+
+    #Služi za računanje promjene na razini proporcionalnosti po formuli PV = NkT
+    def change(self, promjena, new_N, new_volume, new_velocity):
+        if self.hard == 0 and self.barostat is not None: #Osjetljivi cilindar s barostatom: klip sam prati tlak (volumen preko set_volume)
+            return
+        proporcionalno = not self.pressure_measured #Izmjereni tlak se ovdje ne dira, measure() ga računa iz novog stanja
+
+        if self.hard == 0: #Ako je osjetljivi cilindar
+            if promjena == 1:
+                k = (new_N/ self.N)
+                k_volume = k * self.volume
+                if k_volume> 500:
+                    if proporcionalno:
+                        self.pressure = (k / (500/(k_volume/k))) * self.pressure
+                    self.adjust_particle_positions(500)
+                if k_volume< 150:
+                    if proporcionalno:
+                        self.pressure = (k / (150/(k_volume/k))) * self.pressure
+                    self.adjust_particle_positions(150)
+                else:
+                    self.adjust_particle_positions(k_volume)
+
+
+            if promjena == 2:
+                k = (new_velocity/ self.v0)
+                k_volume = k * self.volume
+                if k_volume> 500:
+                    if proporcionalno:
+                        self.pressure = (k / (500/(k_volume/k))) * self.pressure
+                    self.volume = 500
+                    self.adjust_particle_positions(500)
+                if k_volume< 150:
+                    if proporcionalno:
+                        self.pressure = (k / (150/(k_volume/k))) * self.pressure
+                    self.volume = 150
+                    self.adjust_particle_positions(150)
+                else:
+                    self.adjust_particle_positions(k_volume)
+
+            if promjena == 3 and proporcionalno:
+                if new_volume < 150:
+                    new_volume = 150
+                if new_volume > 500:
+                    new_volume = 500
+                k = (new_volume/ self.volume)
+                self.pressure = float(self.pressure) / k
+            
+
+        if self.hard == 1 and proporcionalno: #Ako je čvrsti cilindar
+            if promjena == 1:
+                if new_N == 0 or self.N == 0:
+                    self.pressure = 0
+                else:
+                    k = (new_N/ self.N)
+                    self.pressure = k * self.pressure
+
+            if promjena == 2:
+                k = (new_velocity/ self.v0)
+                self.pressure = k * self.pressure
+
+            if promjena == 3:
+                if new_volume < 150:
+                    new_volume = 150
+                if new_volume > 500:
+                    new_volume = 500
+                k = (new_volume/ self.volume)
+                self.pressure = float(self.pressure) / k
+            
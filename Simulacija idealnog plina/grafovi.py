@@ -0,0 +1,204 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+
+
+
+STUPCI = ("volume", "pressure", "temperature")
+#Zaglavlje prstena (int64): broj upisanih redaka, kapacitet, generacija (mijenja se kad se povijest obriše), zatvoreno
+UPISANO, KAPACITET, GENERACIJA, ZATVORENO = range(4)
+ZAGLAVLJE = 4
+
+
+
+
+class PlotRing:
+    """Prsten uzoraka u dijeljenoj memoriji: prikaz piše, proces s grafovima čita, nitko ne čeka"""
+    def __init__(self, capacity=4096, name=None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=8 * ZAGLAVLJE + 8 * capacity * len(STUPCI))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Čitač ne smije obrisati memoriju kad završi, to radi onaj koji ju je stvorio
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.zaglavlje = np.ndarray((ZAGLAVLJE,), dtype=np.int64, buffer=self.shm.buf)
+        if name is None:
+            self.zaglavlje[:] = 0
+            self.zaglavlje[KAPACITET] = capacity
+        self.capacity = int(self.zaglavlje[KAPACITET])
+        self.podaci = np.ndarray((self.capacity, len(STUPCI)), dtype=np.float64, buffer=self.shm.buf, offset=8 * ZAGLAVLJE)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def push(self, redci):
+        """Dopisuje retke (volume, pressure, temperature); stariji od kapaciteta se prepisuju"""
+        redci = np.asarray(redci, dtype=np.float64).reshape(-1, len(STUPCI))[-self.capacity:]
+        pocetak = int(self.zaglavlje[UPISANO])
+        mjesta = (pocetak + np.arange(len(redci))) % self.capacity
+        self.podaci[mjesta] = redci
+        self.zaglavlje[UPISANO] = pocetak + len(redci)  # Tek nakon podataka, da čitač ne vidi napola upisan redak
+
+    def clear(self):
+        """Briše povijest (npr. kad se vrati spremljeno stanje)"""
+        self.zaglavlje[GENERACIJA] += 1
+
+    def read(self, od):
+        """Retci upisani od rednog broja `od` (najviše zadnjih capacity), novi redni broj i generacija"""
+        do = int(self.zaglavlje[UPISANO])
+        od = max(od, do - self.capacity)
+        return self.podaci[np.arange(od, do) % self.capacity], do, int(self.zaglavlje[GENERACIJA])
+
+    def close(self, unlink=False):
+        del self.zaglavlje, self.podaci  # Pogledi na memoriju moraju nestati prije zatvaranja
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+
+
+class Decimator:
+    """Čuva najviše max_tocaka točaka: kad se napuni, zadržava svaku drugu i udvostručuje korak"""
+    def __init__(self, max_tocaka=2000):
+        self.max_tocaka = max_tocaka
+        self.clear()
+
+    def clear(self):
+        self.tocke = np.empty((0, len(STUPCI)))
+        self.korak = 1
+        self.primljeno = 0
+
+    def add(self, redci):
+        uzeti = (self.primljeno + np.arange(len(redci))) % self.korak == 0
+        self.primljeno += len(redci)
+        self.tocke = np.concatenate((self.tocke, redci[uzeti]))
+        while len(self.tocke) > self.max_tocaka:
+            self.tocke = self.tocke[::2]
+            self.korak *= 2
+
+
+
+
+class LivePlot:
+    """Grafovi P-V, V-T i P-T u zasebnom procesu.
+
+    Prikaz svaki frame zove sync(), koji samo dopisuje nove točke iz sim.povijest u prsten;
+    otvaranje i zatvaranje prozora s grafovima nikad ne zaustavlja simulaciju."""
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.ring = None
+        self.proces = None
+        self.poslano = 0
+        self.izvor = None  # Povijest iz koje su poslane točke
+
+    @property
+    def open(self):
+        return self.proces is not None and self.proces.poll() is None
+
+    def show(self, sim):
+        """Otvara prozor s grafovima (ako već nije otvoren) i šalje mu cijelu dosadašnju povijest"""
+        if self.open:
+            return
+        self.close()
+        self.ring = PlotRing(self.capacity)
+        self.proces = subprocess.Popen([sys.executable, os.path.abspath(__file__), self.ring.name])
+        self.send_history(sim)
+
+    def send_history(self, sim):
+        """Šalje cijelu povijest, dugu preko srednjih vrijednosti razina sažetka"""
+        self.izvor = sim.povijest
+        self.ring.push(sim.povijest.downsample(self.capacity)["mean"][:, 1:])
+        self.poslano = sim.povijest.upisano
+
+    def sync(self, sim):
+        """Šalje točke dodane od zadnjeg poziva, O(broj novih točaka)"""
+        if self.ring is None:
+            return
+        if not self.open:
+            self.close()
+            return
+        if sim.povijest is not self.izvor:
+            # Povijest je zamijenjena (npr. vraćeno spremljeno stanje), grafovi kreću ispočetka
+            self.ring.clear()
+            self.send_history(sim)
+            return
+        if sim.povijest.upisano == self.poslano:
+            return
+        self.ring.push(sim.povijest.rows(self.poslano)[:, 1:])
+        self.poslano = sim.povijest.upisano
+
+    def close(self, timeout=2.0):
+        """Javlja procesu s grafovima da se zatvori, čeka ga (najviše timeout s, zatim ga gasi) i oslobađa dijeljenu memoriju"""
+        if self.ring is not None:
+            self.ring.zaglavlje[ZATVORENO] = 1
+        if self.proces is not None:
+            try:
+                self.proces.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.proces.terminate()
+                self.proces.wait()
+            self.proces = None
+        if self.ring is not None:
+            self.ring.close(unlink=True)
+            self.ring = None
+
+
+
+
+def plot_process(name, interval=100, max_tocaka=2000):
+    """Proces s grafovima: svakih `interval` ms čita nove točke iz prstena i osvježava linije"""
+    import matplotlib.pyplot as plt
+
+    ring = PlotRing(name=name)
+    podaci = Decimator(max_tocaka)
+    fig, osi = plt.subplots(1, 3, figsize=(12, 4))
+    #(os, stupac na x osi, stupac na y osi, naslov, oznake)
+    grafovi = (
+        (osi[0], 0, 1, 'P-V graf', 'Volumen (m^3)', 'Tlak (atm)'),
+        (osi[1], 2, 0, 'V-T graf', 'Temperatura (K)', 'Volumen (m^3)'),
+        (osi[2], 2, 1, 'P-T', 'Temperatura (K)', 'Tlak (atm)'),
+    )
+    linije = []
+    for ax, _, _, naslov, x_oznaka, y_oznaka in grafovi:
+        linije.append(ax.plot([], [])[0])
+        ax.set_title(naslov)
+        ax.set_xlabel(x_oznaka)
+        ax.set_ylabel(y_oznaka)
+    fig.tight_layout()
+    stanje = {"od": 0, "generacija": 0}
+
+    def osvjezi():
+        if ring.zaglavlje[ZATVORENO]:
+            plt.close(fig)
+            return
+        redci, stanje["od"], generacija = ring.read(stanje["od"])
+        if generacija != stanje["generacija"]:
+            stanje["generacija"] = generacija
+            podaci.clear()
+        if not len(redci):
+            return
+        podaci.add(redci)
+        for linija, (ax, x, y, *_) in zip(linije, grafovi):
+            linija.set_data(podaci.tocke[:, x], podaci.tocke[:, y])
+            ax.relim()
+            ax.autoscale_view()
+        fig.canvas.draw_idle()
+
+    timer = fig.canvas.new_timer(interval=interval)
+    timer.add_callback(osvjezi)
+    timer.start()
+    osvjezi()
+    plt.show()
+    timer.stop()
+    ring.close()
+
+
+
+
+if __name__ == "__main__":
+    plot_process(sys.argv[1])
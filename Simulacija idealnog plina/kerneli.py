@@ -0,0 +1,345 @@
+import functools
+import importlib.util
+import warnings
+import numpy as np
+import sudari
+
+_numba = False  # Modul numba nakon prvog load_numba() (None ako nije instaliran); False dok se ne traži
+
+
+
+
+def numba_available():
+    """Je li Numba instalirana, bez uvoza (uvoz traje desetinke sekunde)"""
+    return importlib.util.find_spec("numba") is not None
+
+
+def load_numba():
+    """Uvozi Numbu kad je prvi put potrebna, vraća modul ili None"""
+    global _numba
+    if _numba is False:
+        try:
+            import numba
+        except ImportError:
+            numba = None
+        _numba = numba
+    return _numba
+
+
+def lazy_njit(funkcija):
+    """numba.njit(cache=True) tek pri prvom pozivu; prevedena funkcija zatim zamijeni omotač u modulu"""
+    @functools.wraps(funkcija)
+    def omotac(*args):
+        prevedena = load_numba().njit(cache=True)(funkcija)
+        globals()[funkcija.__name__] = prevedena
+        return prevedena(*args)
+    return omotac
+
+
+
+
+class NumpyKernels:
+    """Koraci simulacije u NumPy-u, s unaprijed alociranim međuspremnicima.
+
+    Međuspremnici imaju dtype stanja (float64 ili float32), a impulsi se zbrajaju u float64."""
+    name = "numpy"
+
+    def __init__(self):
+        self.N = -1
+        self.dtype = None
+        self.impulsi = np.zeros(4)
+        self.kandidati = np.zeros(1, dtype=np.int64)  # Parova iz susjednih ćelija u zadnjem collide(), prije provjere udaljenosti
+        self.parova = 0  # Od njih parova koji se preklapaju
+        self.sudara = 0  # Od njih onih koji su se približavali, tj. stvarno se sudarili
+
+    def buffers(self, N, dtype):
+        """Alocira međuspremnike samo kad se promijeni broj čestica ili dtype stanja"""
+        if N != self.N or dtype != self.dtype:
+            self.N = N
+            self.dtype = dtype
+            self.r_next = np.empty((N, 2), dtype=dtype)
+            self.pomak = np.empty((N, 2), dtype=dtype)
+
+    def nbytes(self):
+        """Memorija svih međuspremnika kernela"""
+        return sum(polje.nbytes for polje in vars(self).values() if isinstance(polje, np.ndarray))
+
+    def predict(self, position, v, dt):
+        """Položaji u sljedećem intervalu, u istom međuspremniku svaki put"""
+        self.buffers(len(position), position.dtype)
+        np.multiply(v, dt, out=self.pomak)
+        np.add(position, self.pomak, out=self.r_next)
+        return self.r_next
+
+    def reflect_walls(self, r_next, v, border_rect, radius, weights=None):
+        """Odbija čestice od zidova i vraća impuls predan svakom zidu (lijevi, desni, gornji, donji).
+
+        radius može biti broj ili polje polumjera, weights su mase čestica u odnosu na referentnu."""
+        zidovi = (
+            (0, r_next[:, 0] < border_rect[0] + radius),  # S lijevim
+            (0, r_next[:, 0] > border_rect[0] + border_rect[2] - radius),  # Desnim
+            (1, r_next[:, 1] < border_rect[1] + radius),  # Gornjim
+            (1, r_next[:, 1] > border_rect[1] + border_rect[3] - radius),  # Donjim
+        )
+        for zid, (os_, udarci) in enumerate(zidovi):
+            if weights is None:
+                self.impulsi[zid] = 2 * np.abs(v[udarci, os_]).sum()
+            else:
+                self.impulsi[zid] = 2 * (np.abs(v[udarci, os_]) * weights[udarci]).sum()
+            v[udarci, os_] *= -1
+        return self.impulsi
+
+    def collide(self, r_next, position, v, radius, border_rect, mass=None):
+        """Sudari čestica preko mreže ćelija, vraća broj parova koji se preklapaju (radius i mass kao u reflect_walls)"""
+        if np.ndim(radius):
+            i, j = sudari.pairs_grid(r_next, 0, border_rect, radii=radius, kandidati=self.kandidati)
+        else:
+            i, j = sudari.pairs_grid(r_next, radius, border_rect, kandidati=self.kandidati)
+        self.sudara = sudari.resolve_pairs(position, v, i, j, mass)
+        self.parova = len(i)
+        return self.parova
+
+    def integrate(self, position, v, dt):
+        """position += v * dt bez novih polja"""
+        self.buffers(len(position), position.dtype)
+        np.multiply(v, dt, out=self.pomak)
+        position += self.pomak
+
+
+
+
+@lazy_njit
+def _predict(position, v, dt, out):
+    for k in range(position.shape[0]):
+        out[k, 0] = position[k, 0] + v[k, 0] * dt
+        out[k, 1] = position[k, 1] + v[k, 1] * dt
+
+
+@lazy_njit
+def _reflect_walls(r_next, v, x0, y0, w, h, radii, weights, impulsi):
+    impulsi[:] = 0.0
+    for k in range(r_next.shape[0]):
+        r = radii[k]
+        if r_next[k, 0] < x0 + r:
+            impulsi[0] += 2 * abs(v[k, 0]) * weights[k]
+            v[k, 0] = -v[k, 0]
+        if r_next[k, 0] > x0 + w - r:
+            impulsi[1] += 2 * abs(v[k, 0]) * weights[k]
+            v[k, 0] = -v[k, 0]
+        if r_next[k, 1] < y0 + r:
+            impulsi[2] += 2 * abs(v[k, 1]) * weights[k]
+            v[k, 1] = -v[k, 1]
+        if r_next[k, 1] > y0 + h - r:
+            impulsi[3] += 2 * abs(v[k, 1]) * weights[k]
+            v[k, 1] = -v[k, 1]
+
+
+@lazy_njit
+def _find_pairs(r_next, radii, x0, y0, sirina_x, sirina_y, nx, ny, glava, sljedeca, celija, par_i, par_j):
+    N = r_next.shape[0]
+    # Povezane liste čestica po ćelijama
+    glava[:] = -1
+    for k in range(N):
+        cx = min(max(int((r_next[k, 0] - x0) // sirina_x), 0), nx - 1)
+        cy = min(max(int((r_next[k, 1] - y0) // sirina_y), 0), ny - 1)
+        c = cx * ny + cy
+        celija[k] = c
+        sljedeca[k] = glava[c]
+        glava[c] = k
+
+    # Parovi se upisuju dok ima mjesta, vraća se ukupan broj (veći od mjesta znači da treba ponoviti)
+    # i broj kandidata (parova iz susjednih ćelija prije provjere udaljenosti)
+    broj = 0
+    kandidata = 0
+    for i in range(N):
+        cx = celija[i] // ny
+        cy = celija[i] % ny
+        for ox in range(-1, 2):
+            for oy in range(-1, 2):
+                sx = cx + ox
+                sy = cy + oy
+                if sx < 0 or sx >= nx or sy < 0 or sy >= ny:
+                    continue
+                j = glava[sx * ny + sy]
+                while j != -1:
+                    if j > i:
+                        kandidata += 1
+                        dx = r_next[i, 0] - r_next[j, 0]
+                        dy = r_next[i, 1] - r_next[j, 1]
+                        if dx * dx + dy * dy < (radii[i] + radii[j]) ** 2:
+                            if broj < par_i.shape[0]:
+                                par_i[broj] = i
+                                par_j[broj] = j
+                            broj += 1
+                    j = sljedeca[j]
+    return broj, kandidata
+
+
+@lazy_njit
+def _resolve_pairs(position, v, mass, par_i, par_j, broj):
+    # Redom po (i, j), isto kao sudari.resolve_pairs
+    N = position.shape[0]
+    redoslijed = np.argsort(par_i[:broj] * N + par_j[:broj])
+    sudara = 0
+    for k in redoslijed:
+        i = par_i[k]
+        j = par_j[k]
+        rx = position[i, 0] - position[j, 0]
+        ry = position[i, 1] - position[j, 1]
+        rr = rx * rx + ry * ry
+        rv = rx * (v[i, 0] - v[j, 0]) + ry * (v[i, 1] - v[j, 1])
+        if rr > 0 and rv < 0:
+            f = rv / rr
+            fi = f * (2 * mass[j] / (mass[i] + mass[j]))
+            fj = f * (2 * mass[i] / (mass[i] + mass[j]))
+            v[i, 0] -= fi * rx
+            v[i, 1] -= fi * ry
+            v[j, 0] += fj * rx
+            v[j, 1] += fj * ry
+            sudara += 1
+    return sudara
+
+
+@lazy_njit
+def _integrate(position, v, dt):
+    for k in range(position.shape[0]):
+        position[k, 0] += v[k, 0] * dt
+        position[k, 1] += v[k, 1] * dt
+
+
+
+
+class NumbaKernels(NumpyKernels):
+    """Isti koraci kao NumpyKernels, prevedeni Numbom (jedan prolaz po česticama, bez privremenih polja)"""
+    name = "numba"
+
+    def buffers(self, N, dtype):
+        if N != self.N or dtype != self.dtype:
+            super().buffers(N, dtype)
+            self.sljedeca = np.empty(N, dtype=np.int64)
+            self.celija = np.empty(N, dtype=np.int64)
+            self.par_i = np.empty(N, dtype=np.int64)
+            self.par_j = np.empty(N, dtype=np.int64)
+            self.jedinice = np.ones(N, dtype=dtype)
+            self.polumjeri = np.empty(N, dtype=dtype)
+            self.polumjer = None
+
+    def radii(self, radius):
+        """Polje polumjera; za jedan polumjer puni se samo kad se promijeni"""
+        if np.ndim(radius):
+            return radius
+        if self.polumjer != radius:
+            self.polumjeri[:] = radius
+            self.polumjer = radius
+        return self.polumjeri
+
+    def predict(self, position, v, dt):
+        self.buffers(len(position), position.dtype)
+        _predict(position, v, dt, self.r_next)
+        return self.r_next
+
+    def reflect_walls(self, r_next, v, border_rect, radius, weights=None):
+        self.buffers(len(r_next), r_next.dtype)
+        _reflect_walls(r_next, v, border_rect[0], border_rect[1], border_rect[2], border_rect[3], self.radii(radius),
+                       self.jedinice if weights is None else weights, self.impulsi)
+        return self.impulsi
+
+    def collide(self, r_next, position, v, radius, border_rect, mass=None):
+        self.buffers(len(position), position.dtype)
+        polumjeri = self.radii(radius)
+        velicina = max(2 * float(polumjeri.max()) if len(polumjeri) else 0.0, 1e-9)
+        nx = max(1, int(border_rect[2] // velicina))
+        ny = max(1, int(border_rect[3] // velicina))
+        if not hasattr(self, "glava") or len(self.glava) != nx * ny:
+            self.glava = np.empty(nx * ny, dtype=np.int64)
+        while True:
+            broj, self.kandidati[0] = _find_pairs(r_next, polumjeri, float(border_rect[0]), float(border_rect[1]), border_rect[2] / nx, border_rect[3] / ny,
+                               nx, ny, self.glava, self.sljedeca, self.celija, self.par_i, self.par_j)
+            if broj <= len(self.par_i):
+                break
+            self.par_i = np.empty(2 * broj, dtype=np.int64)
+            self.par_j = np.empty(2 * broj, dtype=np.int64)
+        self.sudara = _resolve_pairs(position, v, self.jedinice if mass is None else mass, self.par_i, self.par_j, broj)
+        self.parova = broj
+        return broj
+
+    def integrate(self, position, v, dt):
+        _integrate(position, v, dt)
+
+
+
+
+def make_kernels(backend):
+    """Vraća kernele za "numpy" ili "numba"; ako Numba nije instalirana, koristi NumPy"""
+    if backend == "numba":
+        if load_numba() is not None:
+            return NumbaKernels()
+        warnings.warn("Numba nije instalirana, koristi se NumPy.")
+    elif backend != "numpy":
+        raise ValueError("Nepoznat backend: %r" % (backend,))
+    return NumpyKernels()
+
+
+
+
+def compare_backends(N=500, koraka=200, tol=1e-9, seed=0, species=None):
+    """Vrti istu simulaciju s oba backenda i vraća najveću razliku u položajima i brzinama nakon jednog koraka.
+
+    Prije svakog koraka numba simulacija dobiva stanje numpy simulacije, jer se sudari čvrstih
+    diskova kaotično šire pa bi se razlike u zaokruživanju inače eksponencijalno povećavale.
+    Baca AssertionError ako je razlika veća od tol."""
+    import fizika
+    if load_numba() is None:
+        raise RuntimeError("Numba nije instalirana, nema se s čim usporediti.")
+    postavke = dict(N=N, molar_mass=0.032, radius=3, screen_width=1600, screen_height=900, v0=300, duration=10, nsteps=1000,
+                    border_rect=(50, 150, 913, 548), hard=1, seed=seed, species=species)
+    a = fizika.IdealGasSimulation(backend="numpy", **postavke)
+    b = fizika.IdealGasSimulation(backend="numba", **postavke)
+    razlika = 0.0
+    for _ in range(koraka):
+        b.position[:] = a.position
+        b.v[:] = a.v
+        a.step()
+        b.step()
+        razlika = max(razlika, float(np.abs(a.position - b.position).max()), float(np.abs(a.v - b.v).max()))
+    assert razlika <= tol, "Backendi se razlikuju za %g" % razlika
+    return razlika
+
+
+
+
+def compare_precision(N=2000, koraka=1000, tol=1e-5, seed=0, backend="numpy", integrator="fixed"):
+    """Vrti istu simulaciju u float64 i float32 i vraća najveći relativni pomak energije za svaki dtype.
+
+    Sudari čvrstih diskova čuvaju energiju, pa je pomak samo nakupljena greška zaokruživanja.
+    Putanje dviju simulacija se kaotično razilaze, zato se uspoređuju očuvane veličine, a ne
+    položaji; uz pomak se vraća i relativna razlika srednjeg izmjerenog tlaka (statistička, ne
+    ovisi o dtype-u). Termostat je isključen.
+    Baca AssertionError ako je pomak za float32 veći od tol."""
+    import fizika
+    postavke = dict(N=N, molar_mass=0.032, radius=3, screen_width=1600, screen_height=900, v0=300, duration=10, nsteps=1000,
+                    border_rect=(50, 150, 913, 548), hard=1, seed=seed, backend=backend, integrator=integrator)
+    rezultat = {}
+    tlakovi = {}
+    for dtype in (np.float64, np.float32):
+        sim = fizika.IdealGasSimulation(dtype=dtype, **postavke)
+        E0 = sim.energy()
+        pomak = 0.0
+        zbroj = 0.0
+        for _ in range(koraka):
+            sim.step()
+            pomak = max(pomak, abs(sim.energy() - E0) / E0)
+            zbroj += float(sim.pressure)
+        rezultat[np.dtype(dtype).name] = pomak
+        tlakovi[np.dtype(dtype).name] = zbroj / koraka
+    rezultat["pressure"] = abs(tlakovi["float32"] / tlakovi["float64"] - 1)
+    assert rezultat["float32"] <= tol, "Energija u float32 se pomakla za %g" % rezultat["float32"]
+    return rezultat
+
+
+
+
+if __name__ == "__main__":
+    print("Najveća razlika numpy/numba:", compare_backends())
+    print("Najveća razlika numpy/numba za smjesu:", compare_backends(species=[("N2", 390), ("O2", 105), ("He", 5)]))
+    print("Pomak energije float64/float32:", compare_precision())
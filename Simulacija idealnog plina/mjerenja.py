@@ -0,0 +1,108 @@
+import numpy as np
+
+
+
+
+R = 8.314  # Plinska konstanta J/(mol K)
+N_A = 6.022 * (10**23)  # Avogadrova konstanta
+ATM = 101325  # Pa u atm
+
+LIJEVI, DESNI, GORNJI, DONJI = 0, 1, 2, 3  # Redni brojevi zidova
+
+
+
+
+class WallPressure:
+    """Mjeri tlak iz impulsa predanog zidovima, preko zadnjih `prozor` intervala"""
+    def __init__(self, prozor=200):
+        self.prozor = prozor
+        self.impuls = np.zeros((prozor, 4))  # Impuls po zidu za svaki interval (prsten)
+        self.vrijeme = np.zeros(prozor)  # Trajanje svakog intervala
+        self.v2 = np.zeros(prozor)  # Srednji kvadrat brzine u svakom intervalu
+        self.reset()
+
+    def reset(self):
+        """Briše sva mjerenja (npr. kad se promijeni volumen)"""
+        self.impuls[:] = 0
+        self.vrijeme[:] = 0
+        self.v2[:] = 0
+        self.zbroj_impuls = np.zeros(4)
+        self.zbroj_vrijeme = 0.0
+        self.zbroj_v2 = 0.0
+        self.broj = 0  # Koliko je intervala u prstenu
+        self.mjesto = 0  # Sljedeće mjesto u prstenu
+        self.trenutni = np.zeros(4)  # Impuls u intervalu koji još traje
+
+    def add(self, zid, impuls):
+        """Dodaje impuls 2*m*|v_okomito| predan zidu u trenutnom intervalu"""
+        self.trenutni[zid] += impuls
+
+    def end_step(self, dt, v, weights=None):
+        """Zatvara interval i stavlja ga u prsten, O(1) osim srednjeg kvadrata brzine.
+
+        weights su mase čestica u odnosu na referentnu (za smjese), tada je v2 srednji m*v^2/M.
+        Zbraja se u float64 i kad su brzine u float32."""
+        if not len(v):
+            v2 = 0.0
+        elif weights is None:
+            v2 = float((v * v).sum(dtype=np.float64) / len(v))
+        else:
+            v2 = float(np.dot(weights, (v * v).sum(axis=1, dtype=np.float64)) / len(v))
+        k = self.mjesto
+        # Izbacuje najstariji interval iz zbroja i dodaje novi
+        self.zbroj_impuls += self.trenutni - self.impuls[k]
+        self.zbroj_vrijeme += dt - self.vrijeme[k]
+        self.zbroj_v2 += v2 - self.v2[k]
+        self.impuls[k] = self.trenutni
+        self.vrijeme[k] = dt
+        self.v2[k] = v2
+        self.trenutni[:] = 0
+        self.mjesto = (k + 1) % self.prozor
+        self.broj = min(self.broj + 1, self.prozor)
+        if self.mjesto == 0:
+            # Jednom po krugu ponovno zbraja cijeli prsten da se ne nakupi greška zaokruživanja
+            self.zbroj_impuls = self.impuls.sum(axis=0)
+            self.zbroj_vrijeme = float(self.vrijeme.sum())
+            self.zbroj_v2 = float(self.v2.sum())
+
+    def pressure_2d(self, border_rect):
+        """Sila po jedinici duljine zida (jedinice simulacije, m = 1)"""
+        if self.zbroj_vrijeme <= 0:
+            return 0.0
+        opseg = 2 * (border_rect[2] + border_rect[3])
+        return float(self.zbroj_impuls.sum()) / (self.zbroj_vrijeme * opseg)
+
+    def wall_pressures(self, border_rect):
+        """Tlak na svaki zid posebno (lijevi, desni, gornji, donji)"""
+        if self.zbroj_vrijeme <= 0:
+            return np.zeros(4)
+        duljine = np.array([border_rect[3], border_rect[3], border_rect[2], border_rect[2]], dtype=float)
+        return self.zbroj_impuls / (self.zbroj_vrijeme * duljine)
+
+    def temperature(self):
+        """Kinetička temperatura: korijen srednjeg kvadrata brzine (brzina u simulaciji služi kao temperatura)"""
+        if self.broj == 0:
+            return 0.0
+        return (self.zbroj_v2 / self.broj) ** 0.5
+
+    def pressure_atm(self, border_rect, k_N):
+        """Tlak u atm po PV = NkT, uz temperaturu jednaku brzini kao u ostatku simulacije"""
+        return to_atm(self.pressure_2d(border_rect), k_N, self.temperature())
+
+
+
+
+def ideal_pressure_2d(N, T, border_rect):
+    """Tlak idealnog plina u jedinicama simulacije, P A = N <m v^2> / 2 (vrijedi dok prsten nema dovoljno intervala)"""
+    povrsina = border_rect[2] * border_rect[3]
+    return N * T * T / (2 * povrsina) if povrsina > 0 else 0.0
+
+
+
+
+def to_atm(pressure_2d, k_N, T):
+    """Tlak u jedinicama simulacije (sila po jedinici duljine) u atm, uz temperaturu jednaku brzini"""
+    if T <= 0:
+        return 0.0
+    # P_2D * površina = N * <v^2> / 2, a površina u px^2 je volumen u m^3 puta 10^6
+    return 2 * (10**6) * k_N * R * pressure_2d / (N_A * ATM * T)
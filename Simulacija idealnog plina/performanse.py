@@ -0,0 +1,330 @@
+"""Mjerenje brzine simulacije i usporedba s ranije spremljenim rezultatima.
+
+    python performanse.py run -o rezultati.json [--quick] [--max-n 100000]
+    python performanse.py compare baseline.json rezultati.json [--tolerance 0.15]
+    python performanse.py startup [--repeats 5]
+    python performanse.py scaling [--n 100000] [--min-efficiency 0.6]
+
+Sve radi bez zaslona: crtanje se mjeri preko SDL-ovog "dummy" video drivera."""
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import domena
+import fizika
+import kerneli
+
+
+
+
+DIREKTORIJ = os.path.dirname(os.path.abspath(__file__))
+PRIKAZ = os.path.join(DIREKTORIJ, "Simulacija idealnog plina.py")
+
+#Metrike kod kojih je veće bolje; za ostale (memorija, bajtovi, vrijeme uvoza) je manje bolje
+BRZINE = ("steps_per_s", "placements_per_s", "frames_per_s", "speedup", "parallel_efficiency")
+#Pomak energije je šum zaokruživanja (1e-16 do 1e-7), pa se ne uspoređuje relativno nego s apsolutnom granicom
+GRANICE_POMAKA = {"drift_float64": 1e-12, "drift_float32": 1e-5}
+
+#Kod koji se mjeri u novom interpreteru za vrijeme uvoza; uvoz prikaza ne smije pokrenuti pygame ni otvoriti prozor
+UVOZI = {
+    "fizika": "import fizika",
+    "eksperiment": "import eksperiment",
+    "prikaz": ("import importlib.util\n"
+               "spec = importlib.util.spec_from_file_location('prikaz', %r)\n"
+               "modul = importlib.util.module_from_spec(spec)\n"
+               "spec.loader.exec_module(modul)\n"
+               "assert not modul.pygame.display.get_init() and modul.screen is None, 'uvoz prikaza pokreće pygame'" % PRIKAZ),
+}
+#Najdulje dopušteno vrijeme uvoza (ms) za naredbu startup
+BUDZET_UVOZA = {"fizika": 250, "eksperiment": 300, "prikaz": 600}
+
+
+
+
+def make_simulation(N, packing=0.05, v0=100, radius=None, backend="numpy", seed=0, dtype=None):
+    """Simulacija s N čestica u granici omjera 5:3 tolikoj da je udio površine pod česticama `packing`.
+
+    dtype None je zadani za taj N (float32 od cestice.VELIKI_N)."""
+    if radius is None:
+        radius = 5 if N <= 1000 else 2 if N <= 100000 else 1
+    povrsina = N * math.pi * radius ** 2 / packing
+    sirina = math.sqrt(povrsina * 5 / 3)
+    border_rect = (0, 0, sirina, sirina * 3 / 5)
+    sim = fizika.IdealGasSimulation(N=N, molar_mass=0.032, radius=radius, screen_width=sirina, screen_height=sirina * 3 / 5, v0=v0,
+                                    duration=10, nsteps=1000, border_rect=border_rect, hard=1, seed=seed, backend=backend, dtype=dtype)
+    # Početna mreža iz konstruktora nije za ovakve granice, čestice se postavljaju ispočetka
+    sim.position = fizika.postavljanje.place_disks(N, border_rect, radius, sim.rng)
+    return sim
+
+
+
+
+def timed(funkcija, min_time, min_repeats=1):
+    """Ponavlja funkciju dok ne prođe min_time sekundi, vraća (ponavljanja, sekunde)"""
+    ponavljanja = 0
+    pocetak = time.perf_counter()
+    while True:
+        funkcija()
+        ponavljanja += 1
+        proslo = time.perf_counter() - pocetak
+        if proslo >= min_time and ponavljanja >= min_repeats:
+            return ponavljanja, proslo
+
+
+
+
+def peak_bytes(funkcija):
+    """Najviše bajtova koje NumPy i Python zauzmu tijekom jednog poziva funkcije (privremena polja)"""
+    tracemalloc.start()
+    try:
+        funkcija()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def peak_memory(funkcija):
+    """Isto kao peak_bytes, u MB"""
+    return peak_bytes(funkcija) / 2 ** 20
+
+
+
+
+def bench_steps(sim, min_time, warmup=5):
+    """Koraci u sekundi i memorija: bajtova stanja po čestici i bajtova po čestici i koraku.
+
+    Bajtovi po koraku su donja granica prometa memorije: stanje i međuspremnici kernela
+    (svaki se u koraku barem jednom pročita) i najveći zbroj privremenih polja u koraku."""
+    sim.run(warmup)
+    koraci, sekunde = timed(sim.step, min_time)
+    privremeni = peak_bytes(sim.step)
+    memorija = sim.memory_bytes()
+    return {"N": sim.N, "steps_per_s": koraci / sekunde, "peak_mb": privremeni / 2 ** 20, "bytes_per_particle": memorija["per_particle"],
+            "bytes_per_particle_step": memorija["per_particle"] + privremeni / max(sim.N, 1)}
+
+
+def bench_placement(N, min_time):
+    """Brzina adjust_particle_positions: posuda se naizmjenično postavlja na 400 i 500 L"""
+    sim = make_simulation(N)
+    volumeni = [400.0, 500.0]
+
+    def promjena():
+        volumeni.reverse()
+        sim.adjust_particle_positions(volumeni[0])
+
+    ponavljanja, sekunde = timed(promjena, min_time)
+    return {"N": N, "placements_per_s": ponavljanja / sekunde, "peak_mb": peak_memory(promjena)}
+
+
+def bench_domain(N, workers, min_time):
+    """Koraci periodične domene s `workers` procesa (trake po jezgrama)"""
+    with domena.PeriodicDomain(N, *domena.domain_size(N, 0.2, 2), 2, v0=100, workers=workers, seed=0) as d:
+        d.run(2)
+        koraci, sekunde = timed(d.step, min_time)
+        return {"N": N, "workers": d.workers, "steps_per_s": koraci / sekunde}
+
+
+def load_viewer(dummy=True):
+    """Učitava prikaz kao modul, s SDL dummy driverom (bez prozora) ako je dummy True.
+
+    Uvoz ne pokreće pygame; prozor i fontovi nastaju tek s prvim Prikaz-om (init_display)."""
+    if dummy:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    spec = importlib.util.spec_from_file_location("prikaz", PRIKAZ)
+    modul = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modul)
+    return modul
+
+
+def bench_render(prikaz_modul, N, min_time):
+    sim = fizika.IdealGasSimulation(N=N, molar_mass=0.032, radius=5 if N <= 1000 else 2, screen_width=1600, screen_height=900, v0=100,
+                                    duration=10, nsteps=1000, border_rect=(50, 150, 913, 548), hard=1, seed=0)
+    prikaz = prikaz_modul.Prikaz(sim, 1600, 900)
+    prikaz.draw_particles()
+    frameovi, sekunde = timed(prikaz.draw_particles, min_time)
+    return {"N": N, "frames_per_s": frameovi / sekunde}
+
+
+def bench_startup(ime, repeats=5):
+    """Vrijeme uvoza (ms) u novom interpreteru, najkraće od `repeats` pokretanja; greška ako uvoz ne uspije"""
+    kod = "import time\npocetak = time.perf_counter()\n%s\nprint(1000 * (time.perf_counter() - pocetak))" % UVOZI[ime]
+    okolina = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    vremena = []
+    for _ in range(repeats):
+        izlaz = subprocess.run([sys.executable, "-c", kod], cwd=DIREKTORIJ, env=okolina, capture_output=True, text=True)
+        if izlaz.returncode:
+            raise RuntimeError("Uvoz %s nije uspio:\n%s" % (ime, izlaz.stderr))
+        vremena.append(float(izlaz.stdout.split()[-1]))
+    return {"import_ms": min(vremena)}
+
+
+def bench_precision(N, koraka, backend="numpy"):
+    """Pomak energije u float64 i float32 (kerneli.compare_precision), bez provjere granice"""
+    pomaci = kerneli.compare_precision(N=N, koraka=koraka, tol=math.inf, backend=backend)
+    return {"N": N, "drift_float64": pomaci["float64"], "drift_float32": pomaci["float32"]}
+
+
+
+
+def run_suite(quick=False, max_n=None, render=True):
+    """Pokreće sva mjerenja i vraća rječnik za JSON"""
+    min_time = 0.2 if quick else 1.0
+    if max_n is None:
+        max_n = 10000 if quick else 10 ** 6
+    backendi = ["numpy"] + (["numba"] if kerneli.numba_available() else [])
+    rezultati = {}
+
+    def zapisi(ime, rezultat):
+        rezultati[ime] = rezultat
+        print("%-36s %s" % (ime, ", ".join("%s=%.4g" % (k, v) for k, v in rezultat.items() if k not in ("N", "workers"))), flush=True)
+
+    for ime in UVOZI:
+        zapisi("startup/%s" % ime, bench_startup(ime, repeats=3 if quick else 5))
+
+    for backend in backendi:
+        for N in (10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6):
+            if N <= max_n:
+                zapisi("steps/N=%d/%s" % (N, backend), bench_steps(make_simulation(N, backend=backend), min_time))
+        for packing in (0.01, 0.05, 0.2, 0.4):
+            zapisi("steps/packing=%g/%s" % (packing, backend), bench_steps(make_simulation(1000, packing=packing, backend=backend), min_time))
+        for v0 in (100, 300, 1000):
+            zapisi("steps/v0=%d/%s" % (v0, backend), bench_steps(make_simulation(1000, v0=v0, backend=backend), min_time))
+        for N in (10 ** 4, 10 ** 5, 10 ** 6):
+            if N <= max_n:
+                for dtype in ("float64", "float32"):
+                    zapisi("dtype/N=%d/%s/%s" % (N, backend, dtype), bench_steps(make_simulation(N, backend=backend, dtype=dtype), min_time))
+        zapisi("precision/%s" % backend, bench_precision(500 if quick else 2000, 200 if quick else 1000, backend))
+
+    for N in (100, 1000, 10 ** 4):  # Više od 10^4 čestica ne stane u 500 L
+        if N <= max_n:
+            zapisi("placement/N=%d" % N, bench_placement(N, min_time))
+
+    N = min(max_n, 10 ** 6)
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        rezultat = bench_domain(N, workers, min_time)
+        if workers == 1:
+            jedan = rezultat["steps_per_s"]
+        rezultat["speedup"] = rezultat["steps_per_s"] / jedan
+        rezultat["parallel_efficiency"] = rezultat["speedup"] / workers
+        zapisi("domain/N=%d/workers=%d" % (N, workers), rezultat)
+        workers *= 2
+
+    if render:
+        prikaz_modul = load_viewer()
+        for N in (100, 1000, 10 ** 4):
+            if N <= max_n:
+                zapisi("render/N=%d" % N, bench_render(prikaz_modul, N, min_time))
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "numba": getattr(kerneli.load_numba(), "__version__", None),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "quick": quick,
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "results": rezultati,
+    }
+
+
+
+
+def compare(baseline, novi, tolerance=0.15):
+    """Uspoređuje dva rezultata, vraća popis (ime, metrika, stara, nova, omjer, lošije)"""
+    redci = []
+    for ime, stari in baseline["results"].items():
+        if ime not in novi["results"]:
+            continue
+        for metrika, stara in stari.items():
+            nova = novi["results"][ime].get(metrika)
+            if metrika in ("N", "workers") or nova is None:
+                continue
+            if metrika in GRANICE_POMAKA:
+                # Pomak se gleda samo prema granici, pa i baseline 0.0 vrijedi
+                omjer = nova / stara if stara else (math.inf if nova else 1.0)
+                redci.append((ime, metrika, stara, nova, omjer, nova > GRANICE_POMAKA[metrika]))
+                continue
+            if not stara:
+                continue
+            omjer = nova / stara
+            if metrika in BRZINE:
+                losije = omjer < 1 - tolerance
+            else:
+                losije = omjer > 1 + tolerance
+            redci.append((ime, metrika, stara, nova, omjer, losije))
+    return redci
+
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mjerenje brzine simulacije idealnog plina")
+    naredbe = parser.add_subparsers(dest="naredba", required=True)
+    run = naredbe.add_parser("run", help="pokreće mjerenja i sprema JSON")
+    run.add_argument("-o", "--output", default="performanse.json")
+    run.add_argument("--quick", action="store_true", help="kraća mjerenja i N najviše 10^4")
+    run.add_argument("--max-n", type=int, default=None)
+    run.add_argument("--no-render", action="store_true")
+    usporedi = naredbe.add_parser("compare", help="uspoređuje rezultate s baseline-om")
+    usporedi.add_argument("baseline")
+    usporedi.add_argument("results")
+    usporedi.add_argument("--tolerance", type=float, default=0.15, help="dopušteno relativno pogoršanje (0.15 = 15%%)")
+    pokretanje = naredbe.add_parser("startup", help="provjerava da uvoz modula ne traje dulje od BUDZET_UVOZA")
+    pokretanje.add_argument("--repeats", type=int, default=5)
+    skaliranje = naredbe.add_parser("scaling", help="provjerava da periodična domena ubrzava s brojem radnika (domena.scaling)")
+    skaliranje.add_argument("--n", type=float, default=10 ** 5, help="broj čestica")
+    skaliranje.add_argument("--min-efficiency", type=float, default=domena.MIN_UCINKOVITOST, help="najmanje dopušteno ubrzanje / broj radnika")
+    args = parser.parse_args(argv)
+
+    if args.naredba == "scaling":
+        try:
+            domena.scaling(N=int(args.n), min_efficiency=args.min_efficiency)
+        except AssertionError as greska:
+            print(greska)
+            return 1
+        return 0
+
+    if args.naredba == "startup":
+        preko = 0
+        for ime, budzet in BUDZET_UVOZA.items():
+            ms = bench_startup(ime, args.repeats)["import_ms"]
+            preko += ms > budzet
+            print("%-12s %8.1f ms  (budžet %d ms)%s" % (ime, ms, budzet, "  PREKORAČENO" if ms > budzet else ""))
+        return 1 if preko else 0
+
+    if args.naredba == "run":
+        rezultat = run_suite(quick=args.quick, max_n=args.max_n, render=not args.no_render)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rezultat, f, indent=1)
+        print("Rezultati spremljeni u", args.output)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.results, encoding="utf-8") as f:
+        novi = json.load(f)
+    redci = compare(baseline, novi, args.tolerance)
+    for ime, metrika, stara, nova, omjer, losije in redci:
+        print("%-36s %-17s %12.4g -> %12.4g  %6.2fx%s" % (ime, metrika, stara, nova, omjer, "  SPORIJE" if losije else ""))
+    losijih = sum(r[5] for r in redci)
+    print("%d od %d mjerenja je lošije od baseline-a za više od %d%%" % (losijih, len(redci), round(args.tolerance * 100)))
+    return 1 if losijih else 0
+
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import numpy as np
+import sudari
+
+
+
+
+class PlacementError(ValueError):
+    """Čestice ne stanu u zadanu granicu bez preklapanja"""
+
+
+
+
+def lattice_sites(border_rect, radius, razmak):
+    """Mjesta na pravokutnoj mreži s razmakom `razmak` unutar granice"""
+    x0, y0 = border_rect[0] + radius, border_rect[1] + radius
+    sirina = border_rect[2] - 2 * radius
+    visina = border_rect[3] - 2 * radius
+    nx = int(sirina // razmak) + 1
+    ny = int(visina // razmak) + 1
+    # Mreža je centrirana, višak prostora ide u pomak
+    pocetak_x = x0 + (sirina - (nx - 1) * razmak) / 2
+    pocetak_y = y0 + (visina - (ny - 1) * razmak) / 2
+    xs, ys = np.meshgrid(pocetak_x + razmak * np.arange(nx), pocetak_y + razmak * np.arange(ny), indexing="ij")
+    return np.stack((xs.ravel(), ys.ravel()), axis=1)
+
+
+
+
+def place_disks(n, border_rect, radius, rng, existing=None, min_distance=None):
+    """Postavlja n diskova bez preklapanja u otprilike linearnom vremenu.
+
+    Koristi mrežu s najvećim razmakom u koji stane n čestica i svaku točku nasumično
+    pomakne unutar njene ćelije. Ako čestice ne stanu ni na najmanjem razmaku, baca PlacementError."""
+    if min_distance is None:
+        min_distance = 2 * radius
+    if existing is None:
+        existing = np.empty((0, 2))
+    if n <= 0:
+        return np.empty((0, 2))
+
+    sirina = border_rect[2] - 2 * radius
+    visina = border_rect[3] - 2 * radius
+    if sirina < 0 or visina < 0:
+        raise PlacementError("Granica %s je premala za čestice polumjera %s" % (tuple(border_rect), radius))
+
+    # Najveći razmak za koji bi mreža imala n slobodnih mjesta, smanjuje se dok ne stane
+    slobodno = max(sirina * visina - len(existing) * min_distance ** 2, 0.0)
+    razmak = max((slobodno / n) ** 0.5 if slobodno > 0 else min_distance, min_distance)
+    while True:
+        mjesta = lattice_sites(border_rect, radius, razmak)
+        if len(mjesta) >= n:
+            pomak = (razmak - min_distance) / 2  # Susjedna mjesta ostaju barem min_distance udaljena
+            mjesta = mjesta + rng.uniform(-pomak, pomak, size=mjesta.shape)
+            mjesta[:, 0] = np.clip(mjesta[:, 0], border_rect[0] + radius, border_rect[0] + border_rect[2] - radius)
+            mjesta[:, 1] = np.clip(mjesta[:, 1], border_rect[1] + radius, border_rect[1] + border_rect[3] - radius)
+            if len(existing):
+                mjesta = mjesta[free_of(mjesta, existing, min_distance, border_rect)]
+            if len(mjesta) >= n:
+                return mjesta[rng.choice(len(mjesta), size=n, replace=False)]
+        if razmak <= min_distance:
+            raise PlacementError("%d čestica polumjera %s ne stane u granicu %s" % (n + len(existing), radius, tuple(border_rect)))
+        razmak = max(razmak * 0.9, min_distance)
+
+
+
+
+def free_of(mjesta, existing, min_distance, border_rect):
+    """Maska mjesta koja su barem min_distance udaljena od svih postojećih čestica"""
+    sve = np.concatenate((existing, mjesta))
+    i, j = sudari.pairs_grid(sve, min_distance / 2, border_rect)
+    zauzeto = np.zeros(len(sve), dtype=bool)
+    mijesani = (i < len(existing)) != (j < len(existing))  # Parovi postojeća - novo mjesto
+    zauzeto[i[mijesani]] = True
+    zauzeto[j[mijesani]] = True
+    return ~zauzeto[len(existing):]
+
+
+
+
+def rescale_positions(position, old_rect, new_rect, radius, rng):
+    """Afino preslikava položaje u novu granicu; čestice koje se nakon sabijanja preklapaju postavlja ponovno"""
+    nova = np.empty_like(position)
+    for os_ in (0, 1):
+        stari_pocetak = old_rect[os_] + radius
+        stara_duljina = max(old_rect[2 + os_] - 2 * radius, 1e-12)
+        novi_pocetak = new_rect[os_] + radius
+        nova_duljina = max(new_rect[2 + os_] - 2 * radius, 0.0)
+        udio = np.clip((position[:, os_] - stari_pocetak) / stara_duljina, 0, 1)
+        nova[:, os_] = novi_pocetak + udio * nova_duljina
+
+    i, j = sudari.pairs_grid(nova, radius, new_rect)
+    if len(i):
+        preklopljene = np.zeros(len(nova), dtype=bool)
+        preklopljene[np.maximum(i, j)] = True  # Iz svakog para se miče samo jedna
+        ostale = nova[~preklopljene]
+        nova[preklopljene] = place_disks(int(preklopljene.sum()), new_rect, radius, rng, existing=ostale)
+    return nova
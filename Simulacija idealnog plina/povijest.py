@@ -0,0 +1,129 @@
+import json
+import numpy as np
+
+
+
+
+#Stupci povijesti za grafove: korak simulacije, volumen u m^3, tlak u atm i temperatura (v0)
+STUPCI = ("korak", "volume", "pressure", "temperature")
+
+
+
+
+class Level:
+    """Jedna razina sažetka: prsten kanti s najmanjom, najvećom i srednjom vrijednošću svakog stupca"""
+    def __init__(self, capacity, stupaca):
+        self.capacity = capacity
+        self.min = np.zeros((capacity, stupaca))
+        self.max = np.zeros((capacity, stupaca))
+        self.mean = np.zeros((capacity, stupaca))
+        self.upisano = 0
+        # Kanta koja se još puni
+        self.k_min = np.full(stupaca, np.inf)
+        self.k_max = np.full(stupaca, -np.inf)
+        self.k_zbroj = np.zeros(stupaca)
+        self.k_broj = 0
+
+    def add(self, mn, mx, srednja, broj):
+        """Dodaje sažetak (ili jedan uzorak, kad su mn = mx = srednja) u kantu koja se puni"""
+        np.minimum(self.k_min, mn, out=self.k_min)
+        np.maximum(self.k_max, mx, out=self.k_max)
+        self.k_zbroj += srednja * broj
+        self.k_broj += broj
+
+    def close_bucket(self):
+        """Zatvara kantu, stavlja ju u prsten i vraća (min, max, mean, broj) za sljedeću razinu"""
+        k = self.upisano % self.capacity
+        self.min[k] = self.k_min
+        self.max[k] = self.k_max
+        self.mean[k] = self.k_zbroj / self.k_broj
+        self.upisano += 1
+        sazetak = (self.min[k], self.max[k], self.mean[k], self.k_broj)
+        self.k_min = np.full_like(self.k_min, np.inf)
+        self.k_max = np.full_like(self.k_max, -np.inf)
+        self.k_zbroj = np.zeros_like(self.k_zbroj)
+        self.k_broj = 0
+        return sazetak
+
+    def chronological(self, polje):
+        n = min(self.upisano, self.capacity)
+        return polje[(self.upisano - n + np.arange(n)) % self.capacity]
+
+    def summary(self, max_tocaka):
+        """Zadnjih najviše max_tocaka kanti kronološki, s kantom koja se još puni na kraju"""
+        sazetak = {"min": self.chronological(self.min), "max": self.chronological(self.max), "mean": self.chronological(self.mean)}
+        if self.k_broj:
+            zadnja = {"min": self.k_min, "max": self.k_max, "mean": self.k_zbroj / self.k_broj}
+            sazetak = {ime: np.vstack((polje, zadnja[ime])) for ime, polje in sazetak.items()}
+        return {ime: polje[-max_tocaka:] for ime, polje in sazetak.items()}
+
+
+
+
+class TimeSeries:
+    """Povijest makroskopskih veličina u unaprijed alociranim NumPy prstenima, memorija je stalna.
+
+    Razina 0 su zadnjih `capacity` uzoraka. Svaka sljedeća razina sažima po `faktor`
+    kanti prethodne (min/max/mean), pa s `levels` razina pokriva capacity * faktor^levels
+    uzoraka, a append je O(1) (amortizirano)."""
+    def __init__(self, capacity=4096, faktor=16, levels=3, stupci=STUPCI):
+        self.stupci = tuple(stupci)
+        self.capacity = capacity
+        self.faktor = faktor
+        self.podaci = np.zeros((capacity, len(self.stupci)))
+        self.upisano = 0
+        self.razine = [Level(capacity, len(self.stupci)) for _ in range(levels)]
+
+    def __len__(self):
+        return min(self.upisano, self.capacity)
+
+    def append(self, *vrijednosti):
+        """Dodaje jedan uzorak, vrijednosti su redom kao stupci"""
+        redak = self.podaci[self.upisano % self.capacity]
+        redak[:] = vrijednosti
+        self.upisano += 1
+        sazetak = (redak, redak, redak, 1)
+        for broj, razina in enumerate(self.razine, start=1):
+            razina.add(*sazetak)
+            if razina.k_broj < self.faktor ** broj:  # Kanta razine broj ima faktor^broj uzoraka
+                break
+            sazetak = razina.close_bucket()
+
+    def rows(self, od=0):
+        """Retci od rednog broja `od` (od početka snimanja) koji su još u prstenu, kronološki"""
+        od = max(od, self.upisano - self.capacity)
+        return self.podaci[np.arange(od, self.upisano) % self.capacity]
+
+    def column(self, ime):
+        """Cijeli stupac zadnjih `capacity` uzoraka, kronološki"""
+        return self.rows()[:, self.stupci.index(ime)]
+
+    def clear(self):
+        self.__init__(self.capacity, self.faktor, len(self.razine), self.stupci)
+
+    def downsample(self, max_tocaka=1000):
+        """Najfinija razina koja cijelu povijest prikaže s najviše max_tocaka točaka.
+
+        Vraća rječnik {"min", "max", "mean"} polja (točke, stupci); za sirove uzorke su sva tri ista."""
+        if self.upisano <= min(max_tocaka, self.capacity):
+            redci = self.rows()
+            return {"min": redci, "max": redci, "mean": redci}
+        for razina in self.razine:
+            # Razina pokriva cijelu povijest dok joj prsten nije prepisan
+            if razina.upisano < min(max_tocaka, razina.capacity) or razina is self.razine[-1]:
+                return razina.summary(max_tocaka)
+
+    def to_csv(self, path):
+        """Sprema sirove uzorke (zadnjih capacity) kao CSV s imenima stupaca u prvom retku"""
+        np.savetxt(path, self.rows(), delimiter=",", header=",".join(self.stupci), comments="")
+
+    def to_columns(self, path):
+        """Sprema povijest stupac po stupac (.npz): sirovi uzorci i sve razine sažetka"""
+        polja = {"raw_" + ime: self.column(ime) for ime in self.stupci}
+        for broj, razina in enumerate(self.razine, start=1):
+            for vrsta in ("min", "max", "mean"):
+                redci = razina.chronological(getattr(razina, vrsta))
+                for k, ime in enumerate(self.stupci):
+                    polja["level%d_%s_%s" % (broj, vrsta, ime)] = redci[:, k]
+        meta = {"columns": list(self.stupci), "faktor": self.faktor, "levels": len(self.razine), "samples": self.upisano}
+        np.savez(path, meta=np.array(json.dumps(meta)), **polja)
@@ -0,0 +1,137 @@
+import json
+import os
+import numpy as np
+import ansambl
+import ravnoteza
+
+
+
+
+def snake_product(osi):
+    """Sve kombinacije vrijednosti, poredane tako da su susjedne točke i susjedne u mreži"""
+    if not osi:
+        yield ()
+        return
+    ostale = list(snake_product(osi[1:]))
+    for k, x in enumerate(osi[0]):
+        for r in (reversed(ostale) if k % 2 else ostale):
+            yield (x,) + r
+
+
+
+
+def point_key(v0, volume, N, hard):
+    return (float(v0), float(min(max(float(volume), 150), 500)), int(N), int(hard))
+
+
+
+
+def load_done(path):
+    """Čita već gotove točke iz datoteke (jedan JSON po retku)"""
+    gotove = {}
+    if not os.path.exists(path):
+        return gotove
+    # Briše nedovršen zadnji redak ako je pretraga prekinuta usred pisanja
+    with open(path, "rb+") as f:
+        sadrzaj = f.read()
+        if sadrzaj and not sadrzaj.endswith(b"\n"):
+            f.truncate(sadrzaj.rfind(b"\n") + 1)
+    with open(path, encoding="utf-8") as f:
+        for redak in f:
+            try:
+                zapis = json.loads(redak)
+            except ValueError:
+                continue
+            gotove[point_key(zapis["v0"], zapis["volume"], zapis["N"], zapis["hard"])] = zapis
+    return gotove
+
+
+
+
+def warm_start(sim, v0, volume, N, hard):
+    """Prebacuje uravnoteženu simulaciju susjedne točke na nove parametre"""
+    sim.hard = hard
+    if N != sim.N:
+        sim.add_particles(N)
+    if volume != sim.volume:
+        sim.adjust_particle_positions(volume, rescale=True)
+    if v0 != sim.v0:
+        # Skalira brzine umjesto novih nasumičnih smjerova, raspodjela ostaje ista
+        sim.v = sim.v * (v0 / sim.v0)
+        sim.v0 = float(v0)
+        sim.brzina_graf = (3 * 8.314 * sim.v0 / sim.M) ** 0.5
+    sim.wall_pressure.reset()
+
+
+
+
+def equilibrate(sim, blok, max_blokova, tol):
+    """Vrti simulaciju u blokovima dok se prosječni tlak bloka ne prestane mijenjati"""
+    prosli = None
+    for broj in range(1, max_blokova + 1):
+        tlak = 0.0
+        for _ in range(blok):
+            sim.step()
+            tlak += sim.pressure
+        tlak /= blok
+        if prosli is not None and abs(tlak - prosli) <= tol * max(abs(prosli), 1e-12):
+            return broj * blok
+        prosli = tlak
+    return max_blokova * blok
+
+
+
+
+def measure_point(sim, n_steps, sample_every):
+    tlak = []
+    temperatura = []
+    for korak in range(1, n_steps + 1):
+        sim.step()
+        if korak % sample_every == 0:
+            tlak.append(sim.pressure)
+            temperatura.append(sim.temperature)
+    return np.array(tlak), np.array(temperatura)
+
+
+
+
+def run_sweep(path, v0s, volumes, Ns, hards=(1,), n_steps=1000, sample_every=10, blok=200, max_blokova=20, tol=0.02, seed=0, config=None,
+              detector=False):
+    """Prolazi mrežu (hard, N, volumen, v0), svaku točku uravnoteži i odmah zapiše u path.
+
+    Točke koje su već u datoteci preskače, pa se prekinuta pretraga može nastaviti.
+    Ako je detector True, ravnoteža se traži preko H-funkcije i autokorelacije brzina
+    (ravnoteza.EquilibrationDetector) umjesto preko ustaljenja tlaka po blokovima."""
+    gotove = load_done(path)
+    sim = None
+    with open(path, "a", encoding="utf-8") as f:
+        for hard, N, volume, v0 in snake_product([list(hards), list(Ns), list(volumes), list(v0s)]):
+            kljuc = point_key(v0, volume, N, hard)
+            if kljuc in gotove:
+                sim = None  # Stanje te točke nije spremljeno, sljedeća kreće ispočetka
+                continue
+            v0, volume, N, hard = kljuc
+
+            toplo = sim is not None
+            if toplo:
+                warm_start(sim, v0, volume, N, hard)
+            else:
+                postavke = dict(config or {})
+                postavke.update(N=N, v0=v0, volume=volume, hard=hard)
+                sim = ansambl.make_simulation(postavke, seed)
+            if detector:
+                koraci = ravnoteza.run_until_equilibrium(sim, blok * max_blokova)
+            else:
+                koraci = equilibrate(sim, blok, max_blokova, tol)
+            tlak, temperatura = measure_point(sim, n_steps, sample_every)
+
+            zapis = {
+                "v0": v0, "volume": volume, "N": N, "hard": hard,
+                "pressure": float(tlak.mean()), "pressure_std": float(tlak.std()),
+                "temperature": float(temperatura.mean()),
+                "equilibration_steps": koraci, "warm_start": toplo,
+            }
+            f.write(json.dumps(zapis) + "\n")
+            f.flush()
+            gotove[kljuc] = zapis
+    return list(gotove.values())
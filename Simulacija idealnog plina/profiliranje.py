@@ -0,0 +1,215 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import numpy as np
+
+
+
+
+#Dijelovi koji se mjere svaki frame, redom kako se prikazuju
+SEKCIJE = ("step", "check_collisions", "adjust_particle_positions", "change", "events", "draw_particles")
+#Brojači koji se zbrajaju po frameu: parovi iz susjednih ćelija, od njih oni koji se preklapaju, od njih stvarni sudari
+BROJACI = ("candidates", "overlaps", "collisions")
+
+
+
+
+class TimingHistogram:
+    """Histogram trajanja s logaritamskim pretincima (1 µs do 10 s), memorija je stalna.
+
+    Pamti i zadnjih `capacity` vrijednosti u prstenu za prikaz na ekranu."""
+    def __init__(self, capacity=240, bins=70, najmanje=1e-6, najvise=10.0):
+        self.rubovi = np.geomspace(najmanje, najvise, bins + 1)
+        self.counts = np.zeros(bins + 2, dtype=np.int64)  # Prvi i zadnji su ispod i iznad raspona
+        self.zadnje = np.zeros(capacity)
+        self.upisano = 0
+        self.zbroj = 0.0
+        self.najvece = 0.0
+
+    def add(self, vrijednost):
+        self.counts[np.searchsorted(self.rubovi, vrijednost, side="right")] += 1
+        self.zadnje[self.upisano % len(self.zadnje)] = vrijednost
+        self.upisano += 1
+        self.zbroj += vrijednost
+        self.najvece = max(self.najvece, vrijednost)
+
+    def recent(self):
+        return self.zadnje[:min(self.upisano, len(self.zadnje))]
+
+    def last(self):
+        return float(self.zadnje[(self.upisano - 1) % len(self.zadnje)]) if self.upisano else 0.0
+
+    def percentile(self, p):
+        """Gornji rub pretinca u kojem je p-ti percentil (procjena iz histograma)"""
+        if self.upisano == 0:
+            return 0.0
+        k = int(np.searchsorted(np.cumsum(self.counts), p / 100 * self.upisano))
+        return float(self.rubovi[min(max(k, 0), len(self.rubovi) - 1)])
+
+    def summary(self):
+        """Trajanja u ms: zadnje, srednje, p50, p95, p99 i najveće"""
+        return {
+            "frames": self.upisano,
+            "last_ms": self.last() * 1e3,
+            "mean_ms": self.zbroj / self.upisano * 1e3 if self.upisano else 0.0,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p95_ms": self.percentile(95) * 1e3,
+            "p99_ms": self.percentile(99) * 1e3,
+            "max_ms": self.najvece * 1e3,
+        }
+
+
+
+
+class Profiler:
+    """Mjerenje trajanja po frameu za prikaz, uključuje se po potrebi.
+
+    Dok je isključen, ništa nije omotano i add()/end_frame() se odmah vraćaju.
+    start() zamijeni metode zadanih objekata (npr. sim.step) omotačima koji mjere
+    vrijeme; stop() ih vraća. Vrijeme svake sekcije se zbraja kroz frame (fizika u
+    dretvi može napraviti više koraka po frameu) i na end_frame() ide u histogram.
+    capture(n) snima sljedećih n frameova cProfileom, posebno za dretvu s fizikom."""
+    def __init__(self, enabled=False, capacity=240, dump_path=None):
+        self.enabled = enabled
+        self.overlay = enabled  # Prikazuje li se tablica s vremenima na ekranu
+        self.dump_path = dump_path  # Kamo se spremaju rezultati na kraju (None = nikamo)
+        self.histogrami = {ime: TimingHistogram(capacity) for ime in SEKCIJE + ("frame",)}
+        self.brojaci = {ime: TimingHistogram(capacity, najmanje=1, najvise=1e7) for ime in BROJACI}
+        self.okvir = dict.fromkeys(SEKCIJE + BROJACI, 0)
+        self.pocetak_okvira = None
+        self.omotani = []  # (objekt, imena metoda)
+        self.profil = None
+        self.profil_fizike = None
+        self.preostalo = 0
+        self.dretva = None  # Dretva sučelja za vrijeme snimanja cProfileom
+
+    def start(self, ciljevi):
+        """Uključuje mjerenje; ciljevi su parovi (objekt, imena metoda)"""
+        self.release()
+        for objekt, imena in ciljevi:
+            self.instrument(objekt, imena)
+        self.enabled = True
+        self.pocetak_okvira = None
+
+    def stop(self):
+        self.release()
+        self.enabled = False
+        self.overlay = False
+
+    def instrument(self, objekt, imena):
+        """Omata metode objekta tako da se mjeri njihovo vrijeme (sekcija = ime metode)"""
+        for ime in imena:
+            objekt.__dict__[ime] = self.wrap(getattr(objekt, ime), ime, objekt)
+        self.omotani.append((objekt, tuple(imena)))
+
+    def release(self, objekt=None):
+        """Vraća izvorne metode (svim objektima ako objekt nije zadan)"""
+        for par in list(self.omotani):
+            if objekt is None or par[0] is objekt:
+                for ime in par[1]:
+                    par[0].__dict__.pop(ime, None)
+                self.omotani.remove(par)
+
+    def wrap(self, metoda, ime, objekt):
+        kernels = getattr(objekt, "kernels", None) if ime == "check_collisions" else None
+
+        def omotac(*args, **kwargs):
+            pocetak = time.perf_counter()
+            try:
+                if ime == "step" and self.profil_fizike is not None and threading.get_ident() != self.dretva:
+                    # cProfile vidi samo dretvu u kojoj je uključen, korake iz dretve s fizikom snima posebno
+                    return self.profil_fizike.runcall(metoda, *args, **kwargs)
+                return metoda(*args, **kwargs)
+            finally:
+                self.okvir[ime] += time.perf_counter() - pocetak
+                if kernels is not None:
+                    self.okvir["candidates"] += int(kernels.kandidati[0])
+                    self.okvir["overlaps"] += kernels.parova
+                    self.okvir["collisions"] += kernels.sudara
+        omotac.__wrapped__ = metoda
+        return omotac
+
+    def add(self, ime, sekunde):
+        """Dodaje vrijeme sekciji koja se mjeri ručno (npr. obrada događaja)"""
+        if self.enabled:
+            self.okvir[ime] += sekunde
+
+    def end_frame(self):
+        """Zatvara frame: zbrojena vremena idu u histograme"""
+        if not self.enabled:
+            return
+        sada = time.perf_counter()
+        if self.pocetak_okvira is not None:
+            self.histogrami["frame"].add(sada - self.pocetak_okvira)
+        self.pocetak_okvira = sada
+        okvir, self.okvir = self.okvir, dict.fromkeys(SEKCIJE + BROJACI, 0)
+        for ime in SEKCIJE:
+            self.histogrami[ime].add(okvir[ime])
+        for ime in BROJACI:
+            self.brojaci[ime].add(okvir[ime])
+        if self.profil is not None:
+            self.preostalo -= 1
+            if self.preostalo <= 0:
+                self.finish_capture()
+
+    def capture(self, frames, path=None):
+        """Snima sljedećih `frames` frameova cProfileom; rezultat ide u path (.prof) i na izlaz.
+
+        Frameovi se broje preko end_frame(), pa mjerenje mora biti uključeno (start())."""
+        if self.profil is not None:
+            return
+        self.preostalo = frames
+        self.putanja_profila = path or time.strftime("profil_%Y%m%d_%H%M%S.prof")
+        self.dretva = threading.get_ident()
+        self.profil_fizike = cProfile.Profile()
+        self.profil = cProfile.Profile()
+        self.profil.enable()
+
+    def finish_capture(self):
+        self.profil.disable()
+        ispis = io.StringIO()
+        statistika = pstats.Stats(self.profil, stream=ispis)
+        profil_fizike, self.profil_fizike = self.profil_fizike, None
+        if profil_fizike.getstats():
+            statistika.add(profil_fizike)
+        self.profil = None
+        statistika.dump_stats(self.putanja_profila)
+        statistika.sort_stats("cumulative").print_stats(25)
+        print(ispis.getvalue())
+        print("cProfile spremljen u", self.putanja_profila)
+
+    def summary(self):
+        """Sažetak svih sekcija i brojača, za ispis ili JSON"""
+        preklapanja = self.brojaci["overlaps"].zbroj
+        return {
+            "sections": {ime: h.summary() for ime, h in self.histogrami.items()},
+            "counters": {ime: {"mean_per_frame": h.zbroj / h.upisano if h.upisano else 0.0, "max_per_frame": h.najvece, "total": h.zbroj}
+                         for ime, h in self.brojaci.items()},
+            # Koliko kandidata uska faza provjeri po paru koji se stvarno preklapa
+            "candidates_per_overlap": self.brojaci["candidates"].zbroj / preklapanja if preklapanja else None,
+        }
+
+    def overlay_rows(self):
+        """Ćelije tablice za prikaz na ekranu: zadnje, srednje i najveće vrijeme u zadnjih `capacity` frameova"""
+        redci = [("ms", "zadnje", "sred.", "maks.")]
+        for ime in ("frame",) + SEKCIJE:
+            h = self.histogrami[ime]
+            if h.upisano:
+                redci.append((ime,) + tuple("%.2f" % (x * 1e3) for x in (h.last(), h.recent().mean(), h.recent().max())))
+        for ime in BROJACI:
+            h = self.brojaci[ime]
+            if h.upisano:
+                redci.append((ime + " / frame", "%d" % h.last(), "%.1f" % h.recent().mean(), "%d" % h.recent().max()))
+        return redci
+
+    def dump(self, path=None):
+        """Sprema sažetak i histograme (rubovi u sekundama) kao JSON"""
+        path = path or self.dump_path or time.strftime("profil_%Y%m%d_%H%M%S.json")
+        podaci = self.summary()
+        podaci["histograms"] = {ime: {"edges_s": h.rubovi.tolist(), "counts": h.counts.tolist()} for ime, h in self.histogrami.items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(podaci, f, indent=1)
+        return path
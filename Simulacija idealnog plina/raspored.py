@@ -0,0 +1,100 @@
+import collections
+import threading
+import time
+
+
+
+
+class Snapshot:
+    """Kopija stanja koju crta prikaz, nakon objave se više ne mijenja"""
+    def __init__(self, sim, korak, vrijeme):
+        self.position = sim.position.copy()
+        self.border_rect = tuple(sim.border_rect)
+        self.radius = sim.radius
+        self.N = len(self.position)
+        self.vrste = sim.store.species.copy() if sim.mixture else None  # Za crtanje vrsta različitim bojama
+        self.korak = korak  # Broj izračunatih intervala
+        self.vrijeme = vrijeme  # Stvarno vrijeme objave (perf_counter)
+
+
+
+
+class PhysicsLoop(threading.Thread):
+    """Računa simulaciju u svojoj dretvi, neovisno o crtanju.
+
+    tick_rate je broj intervala u sekundi (None = najbrže moguće). Prikaz uzima zadnje
+    objavljeno stanje preko latest() ili interpolated() bez zaključavanja; promjene
+    simulacije iz sučelja šalje kao naredbe (submit), a dretva ih izvodi između dva koraka,
+    pa ni jedna strana ne čeka drugu."""
+    def __init__(self, sim, tick_rate=None, publish_rate=120):
+        super().__init__(daemon=True)
+        self.sim = sim
+        self.tick_rate = tick_rate
+        self.publish_rate = publish_rate
+        self.naredbe = collections.deque()  # append i popleft su atomski, pa red ne treba lock
+        self.zaustavi = threading.Event()
+        self.koraci = 0
+        self.zadnja_objava = 0.0
+        self.brzina = 0.0  # Izmjereni broj intervala u sekundi
+        # Dva zadnja stanja u jednoj n-torki, zamjena je jedna (atomska) dodjela
+        prvi = Snapshot(sim, 0, time.perf_counter())
+        self.par = (prvi, prvi)
+
+    def publish(self, sada):
+        self.par = (self.par[1], Snapshot(self.sim, self.koraci, sada))
+        self.zadnja_objava = sada
+
+    def submit(self, naredba):
+        """Naredba (funkcija bez argumenata) koja mijenja simulaciju, izvodi se prije sljedećeg koraka"""
+        self.naredbe.append(naredba)
+
+    def run(self):
+        sljedeci = time.perf_counter()
+        mjerenje_od, mjerenje_koraci = sljedeci, 0
+        while not self.zaustavi.is_set():
+            while self.naredbe:
+                self.naredbe.popleft()()
+            self.sim.step()
+            self.koraci += 1
+            sada = time.perf_counter()
+            if sada - self.zadnja_objava >= 1 / self.publish_rate:
+                self.publish(sada)
+
+            if sada - mjerenje_od >= 1:
+                self.brzina = (self.koraci - mjerenje_koraci) / (sada - mjerenje_od)
+                mjerenje_od, mjerenje_koraci = sada, self.koraci
+
+            if self.tick_rate:
+                sljedeci += 1 / self.tick_rate
+                if sljedeci < sada - 0.25:
+                    sljedeci = sada  # Previše kasni, ne pokušava nadoknaditi
+                time.sleep(max(0.0, sljedeci - sada))
+            else:
+                time.sleep(0)  # Pušta sučelje da dođe do GIL-a
+
+    def stop(self):
+        self.zaustavi.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+    def latest(self):
+        return self.par[1]
+
+    def interpolated(self, sada=None):
+        """Položaji između dva zadnja objavljena stanja i zadnje stanje (za granicu, polumjer i vrste).
+
+        Prikaz kasni jednu objavu; oboje dolazi iz istog para, pa N uvijek odgovara."""
+        prosli, zadnji = self.par
+        if prosli is zadnji or prosli.N != zadnji.N or prosli.border_rect != zadnji.border_rect:
+            return zadnji.position, zadnji
+        if sada is None:
+            sada = time.perf_counter()
+        razmak = zadnji.vrijeme - prosli.vrijeme
+        if razmak <= 0:
+            return zadnji.position, zadnji
+        alfa = min(max((sada - zadnji.vrijeme) / razmak, 0.0), 1.0)
+        pozicije = prosli.position + (zadnji.position - prosli.position) * alfa
+        # Čestice koje su u međuvremenu preskočile (npr. ponovno postavljene) se ne interpoliraju
+        skok = ((zadnji.position - prosli.position) ** 2).sum(axis=1) > (4 * zadnji.radius) ** 2
+        pozicije[skok] = zadnji.position[skok]
+        return pozicije, zadnji
@@ -0,0 +1,173 @@
+import math
+from collections import deque
+import numpy as np
+
+
+
+
+class SpeedHistogram:
+    """Histogram brzina koji se puni postupno, svaki uzorak je jedan np.bincount (O(N)).
+
+    Zadnji pretinac skuplja sve brzine iznad v_max. Za smjese se brzine množe s
+    korijenom relativne mase (weights), pa sve vrste u ravnoteži imaju istu raspodjelu."""
+    def __init__(self, v_max, bins=40):
+        self.v_max = float(v_max)
+        self.bins = int(bins)
+        self.rubovi = np.linspace(0, self.v_max, self.bins + 1)
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros(self.bins + 1, dtype=np.int64)
+        self.zbroj_v2 = 0.0
+        self.uzoraka = 0
+
+    def sample_counts(self, v, weights=None, skala=1.0):
+        """Broj čestica u svakom pretincu za jedno stanje, bez dodavanja u histogram"""
+        v2 = np.einsum("ij,ij->i", v, v)
+        if weights is not None:
+            v2 = v2 * weights
+        k = np.minimum((np.sqrt(v2) * (self.bins / (self.v_max * skala))).astype(np.intp), self.bins)
+        return np.bincount(k, minlength=self.bins + 1), float(v2.sum()) / skala ** 2
+
+    def add(self, v, weights=None, skala=1.0):
+        """Dodaje jedno stanje u histogram i vraća brojeve za to stanje"""
+        counts, zbroj_v2 = self.sample_counts(v, weights, skala)
+        self.counts += counts
+        self.zbroj_v2 += zbroj_v2
+        self.uzoraka += 1
+        return counts
+
+    def mean_v2(self):
+        ukupno = self.counts.sum()
+        return self.zbroj_v2 / ukupno if ukupno else 0.0
+
+    def density(self):
+        """Gustoća vjerojatnosti brzine u svakom pretincu (bez pretinca iznad v_max)"""
+        ukupno = self.counts.sum()
+        if ukupno == 0:
+            return np.zeros(self.bins)
+        return self.counts[:-1] / (ukupno * np.diff(self.rubovi))
+
+    def distance(self):
+        """Udaljenost od 2D Maxwell-Boltzmannove raspodjele s istim <v^2> (0 = ista, 1 = bez preklapanja)"""
+        ukupno = self.counts.sum()
+        if ukupno == 0:
+            return 1.0
+        return total_variation(self.counts / ukupno, mb_probabilities(self.rubovi, self.mean_v2()))
+
+
+
+
+def mb_probabilities(rubovi, mean_v2):
+    """Vjerojatnost svakog pretinca za 2D MB raspodjelu brzina, zadnja je za brzine iznad rubovi[-1].
+
+    U 2D je F(v) = 1 - exp(-v^2 / <v^2>)."""
+    if mean_v2 <= 0:
+        p = np.zeros(len(rubovi))
+        p[0] = 1.0
+        return p
+    rep = np.exp(-rubovi ** 2 / mean_v2)
+    return np.append(rep[:-1] - rep[1:], rep[-1])
+
+
+def total_variation(p, q):
+    return 0.5 * float(np.abs(p - q).sum())
+
+
+
+
+def h_function(counts, rubovi, mean_v2):
+    """Boltzmannova H-funkcija iz histograma brzina, minus njen minimum za MB raspodjelu.
+
+    H = integral f ln f d^2v, s f(v) = p(v) / (2 pi v). Za MB je H = -1 - ln(pi <v^2>).
+    Histogram s malo čestica daje prenisku entropiju, pa se dodaje Miller-Madowljeva ispravka."""
+    n = counts[:-1].sum()
+    if n == 0 or mean_v2 <= 0:
+        return 0.0
+    p = counts[:-1] / n
+    sredine = (rubovi[:-1] + rubovi[1:]) / 2
+    ima = p > 0
+    H = float((p[ima] * np.log(p[ima] / (2 * math.pi * sredine[ima] * np.diff(rubovi)[ima]))).sum())
+    H -= (np.count_nonzero(ima) - 1) / (2 * n)
+    return H + 1 + math.log(math.pi * mean_v2)
+
+
+
+
+class EquilibrationDetector:
+    """Prati H-funkciju i autokorelaciju brzina i javlja kad je plin u ravnoteži.
+
+    Svakih `every` koraka uzme jedan uzorak (O(N)). Ravnoteža je kad je H-funkcija u
+    zadnjih `window` uzoraka bila unutar h_tol od MB minimuma i kad je autokorelacija
+    brzina s početnim stanjem pala ispod c_tol. Brzine se mjere u jedinicama korijena
+    iz <v^2>, pa detektor ne ovisi o temperaturi."""
+    def __init__(self, bins=40, every=10, window=10, h_tol=0.05, c_tol=0.1):
+        self.histogram = SpeedHistogram(4.0, bins)
+        self.every = every
+        self.h_tol = h_tol
+        self.c_tol = c_tol
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """Počinje ispočetka (npr. nakon promjene temperature ili broja čestica)"""
+        self.histogram.reset()
+        self.h = deque(maxlen=self.window)
+        self.autocorrelation = 1.0
+        self.v_start = None
+        self.verzija = None
+        self.korak = 0
+        self.equilibrated_at = None  # Korak (od reseta) u kojem je prvi put postignuta ravnoteža
+
+    @property
+    def equilibrated(self):
+        return self.equilibrated_at is not None
+
+    def sample(self, sim):
+        """Zove se nakon svakog koraka simulacije, vraća je li plin u ravnoteži"""
+        if self.verzija != sim.store.verzija:
+            # Čestice su promijenjene izvana, prošli uzorci više ne vrijede
+            self.reset()
+            self.verzija = sim.store.verzija
+        self.korak += 1
+        if self.korak % self.every:
+            return self.equilibrated
+
+        v = sim.v
+        weights = sim.weights()
+        if self.v_start is None:
+            self.v_start = v.copy()
+            self.norma = float(np.einsum("ij,ij->", v, v)) or 1.0
+        self.autocorrelation = float(np.einsum("ij,ij->", self.v_start, v)) / self.norma
+
+        v2 = np.einsum("ij,ij->i", v, v)
+        mean_v2 = float((v2 if weights is None else v2 * weights).mean()) if len(v2) else 0.0
+        counts = self.histogram.add(v, weights, math.sqrt(mean_v2) if mean_v2 > 0 else 1.0)
+        self.h.append(h_function(counts, self.histogram.rubovi, 1.0))
+
+        if (self.equilibrated_at is None and len(self.h) == self.window and abs(float(np.mean(self.h))) < self.h_tol
+                and abs(self.autocorrelation) < self.c_tol):
+            self.equilibrated_at = self.korak
+        return self.equilibrated
+
+    def state(self):
+        """Trenutne vrijednosti za ispis ili zapis"""
+        return {
+            "h_excess": float(self.h[-1]) if self.h else None,
+            "autocorrelation": self.autocorrelation,
+            "mb_distance": self.histogram.distance(),
+            "equilibrated_at": self.equilibrated_at,
+        }
+
+
+
+
+def run_until_equilibrium(sim, max_steps, detector=None):
+    """Vrti simulaciju dok detektor ne javi ravnotežu (najviše max_steps koraka), vraća broj koraka"""
+    if detector is None:
+        detector = EquilibrationDetector()
+    for korak in range(1, max_steps + 1):
+        sim.step()
+        if detector.sample(sim):
+            return korak
+    return max_steps
@@ -0,0 +1,166 @@
+import json
+import math
+import os
+import numpy as np
+
+
+
+
+VERZIJA = 1
+#Stupci makroskopskih veličina, jedan redak po spremljenom frameu
+STUPCI = ("korak", "vrijeme", "pressure", "temperature", "volume", "v0", "N", "radius", "border_x", "border_y", "border_w", "border_h")
+
+
+
+
+class Recorder:
+    """Sprema position i v svakog `every`-tog intervala u binarne komade u direktoriju path.
+
+    Svaki komad ima stalan broj čestica (novi komad počinje kad se N promijeni ili kad je
+    komad pun), a header.json opisuje komade. Frameovi se samo dopisuju na kraj datoteke,
+    pa je snimka čitljiva i ako je program prekinut. Snimka u postojećem direktoriju
+    zamjenjuje staru (macro.bin i komadi se pišu ispočetka)."""
+    def __init__(self, path, dtype=np.float32, every=1, chunk_frames=10000):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.every = max(1, int(every))
+        self.chunk_frames = chunk_frames
+        os.makedirs(path, exist_ok=True)
+        for ime in os.listdir(path):
+            if ime.startswith("frames_") and ime.endswith(".bin"):
+                os.remove(os.path.join(path, ime))  # Komadi stare snimke bi se inače miješali s novima
+        self.komadi = []
+        self.datoteka = None
+        self.makro = open(os.path.join(path, "macro.bin"), "wb")
+        self.frameovi = 0
+        self.write_header()
+
+    def write_header(self):
+        header = {
+            "version": VERZIJA,
+            "dtype": self.dtype.str,
+            "every": self.every,
+            "columns": list(STUPCI),
+            "frames": self.frameovi,
+            "chunks": self.komadi,
+        }
+        privremena = os.path.join(self.path, "header.json.tmp")
+        with open(privremena, "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=1)
+        os.replace(privremena, os.path.join(self.path, "header.json"))
+
+    def new_chunk(self, N):
+        if self.datoteka is not None:
+            self.datoteka.close()
+        ime = "frames_%05d.bin" % len(self.komadi)
+        self.komadi.append({"file": ime, "N": int(N), "start": self.frameovi, "frames": 0})
+        self.datoteka = open(os.path.join(self.path, ime), "wb")
+        self.write_header()
+
+    def record(self, sim):
+        """Sprema trenutno stanje ako je na redu (svaki every-ti interval)"""
+        if sim.korak % self.every:
+            return
+        N = len(sim.position)
+        if not self.komadi or self.komadi[-1]["N"] != N or self.komadi[-1]["frames"] >= self.chunk_frames:
+            self.new_chunk(N)
+        frame = np.empty((N, 4), dtype=self.dtype)
+        frame[:, :2] = sim.position
+        frame[:, 2:] = sim.v
+        self.datoteka.write(frame.tobytes())
+        redak = np.array([sim.korak, sim.korak * sim.dt, sim.pressure, sim.temperature, sim.volume, sim.v0, N, sim.radius, *sim.border_rect], dtype=np.float64)
+        self.makro.write(redak.tobytes())
+        self.komadi[-1]["frames"] += 1
+        self.frameovi += 1
+
+    def flush(self):
+        if self.datoteka is not None:
+            self.datoteka.flush()
+        self.makro.flush()
+        self.write_header()
+
+    def close(self):
+        self.flush()
+        if self.datoteka is not None:
+            self.datoteka.close()
+            self.datoteka = None
+        self.makro.close()
+
+
+
+
+class Playback:
+    """Čita snimku preko memory-mapa, u RAM se učitavaju samo frameovi koji se gledaju"""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "header.json"), encoding="utf-8") as f:
+            self.header = json.load(f)
+        if self.header["version"] > VERZIJA:
+            raise ValueError("Snimka je verzije %s, podržana je do %s" % (self.header["version"], VERZIJA))
+        self.dtype = np.dtype(self.header["dtype"])
+        self.stupci = {ime: k for k, ime in enumerate(self.header["columns"])}
+
+        # Broj frameova se računa iz veličine datoteka, header može zaostajati ako je snimanje prekinuto
+        self.komadi = []
+        pocetak = 0
+        for komad in self.header["chunks"]:
+            ime = os.path.join(path, komad["file"])
+            velicina_framea = komad["N"] * 4 * self.dtype.itemsize
+            frameovi = os.path.getsize(ime) // velicina_framea if velicina_framea else komad["frames"]
+            if frameovi == 0:
+                continue
+            podaci = np.memmap(ime, dtype=self.dtype, mode="r", shape=(frameovi, komad["N"], 4))
+            self.komadi.append((pocetak, podaci))
+            pocetak += frameovi
+        self.frameovi = pocetak
+
+        makro = os.path.join(path, "macro.bin")
+        redaka = min(os.path.getsize(makro) // (8 * len(self.stupci)), self.frameovi)
+        self.makro = np.memmap(makro, dtype=np.float64, mode="r", shape=(redaka, len(self.stupci))) if redaka else np.zeros((0, len(self.stupci)))
+        self.frameovi = min(self.frameovi, redaka)
+        self.pocetci = np.array([p for p, _ in self.komadi], dtype=np.int64)
+
+    def __len__(self):
+        return self.frameovi
+
+    def frame(self, k):
+        """Vraća (position, v) za frame k, bez kopiranja"""
+        if not 0 <= k < self.frameovi:
+            raise IndexError(k)
+        komad = int(np.searchsorted(self.pocetci, k, side="right")) - 1
+        pocetak, podaci = self.komadi[komad]
+        frame = podaci[k - pocetak]
+        return frame[:, :2], frame[:, 2:]
+
+    def macro(self, k):
+        """Makroskopske veličine za frame k kao rječnik"""
+        redak = self.makro[k]
+        return {ime: float(redak[i]) for ime, i in self.stupci.items()}
+
+    def column(self, ime):
+        """Cijeli stupac makroskopskih veličina (npr. 'pressure') za sve frameove"""
+        return self.makro[:self.frameovi, self.stupci[ime]]
+
+
+
+
+class ReplayState:
+    """Glumi simulaciju za prikaz: ima iste atribute koje prikaz čita, puni se iz snimke"""
+    def __init__(self, snimka, M=0.032):
+        self.snimka = snimka
+        self.M = M
+        self.admin = 0
+        self.show(0)
+
+    def show(self, k):
+        self.k = k
+        self.position, self.v = self.snimka.frame(k)
+        makro = self.snimka.macro(k)
+        self.N = int(makro["N"])
+        self.radius = makro["radius"]
+        self.v0 = makro["v0"]
+        self.volume = makro["volume"]
+        self.pressure = makro["pressure"]
+        self.temperature = makro["temperature"]
+        self.border_rect = (makro["border_x"], makro["border_y"], makro["border_w"], makro["border_h"])
+        self.brzina_graf = math.sqrt((3*8.314*self.v0)/self.M) if self.v0 > 0 else 0.0
@@ -0,0 +1,233 @@
+import json
+import os
+import queue
+import threading
+import time
+import warnings
+import numpy as np
+import cestice
+import dinamika
+import fizika
+import termostati
+import vrste
+import povijest
+
+
+
+
+MAGIC = b"PLIN"
+VERZIJA = 2  # 2: stupci čestica, vrste, povijest, backend, dtype, potencijal, termostat i barostat
+PORAVNANJE = 64  # Polja počinju na višekratniku od 64 bajta
+
+#Skalari koji se spremaju, imena su ista kao atributi IdealGasSimulation
+SKALARI = ("N", "M", "radius", "screen_width", "duration", "nsteps", "dt", "v0", "brzina_graf", "pressure", "volume", "hard", "admin",
+           "collision_engine", "integrator", "pressure_mode", "seed", "temperature", "korak", "k_N")
+LISTE = ("lista_volume", "lista_pressure", "lista_temperatura")  # Povijest u stanjima verzije 1
+
+
+
+
+def obican(x):
+    """numpy broj u običan Python broj (za JSON)"""
+    return x.item() if isinstance(x, np.generic) else x
+
+
+
+
+def state_dict(sim):
+    """Kopira cijelo stanje simulacije: (skalari, polja). Brzo, pa se može zvati iz petlje"""
+    meta = {ime: obican(getattr(sim, ime)) for ime in SKALARI}
+    meta["border_rect"] = [float(x) for x in sim.border_rect]
+    meta["rng_state"] = sim.rng.bit_generator.state
+    meta["backend"] = sim.backend
+    meta["dtype"] = sim.dtype.name
+    meta["species"] = [[s.name, s.molar_mass, s.radius, list(s.boja)] for s in sim.species]
+    meta["potential"] = sim.potential.to_dict() if getattr(sim, "potential", None) is not None else None
+    meta["thermostat"] = sim.thermostat.to_dict() if sim.thermostat is not None else None
+    meta["barostat"] = sim.barostat.to_dict() if sim.barostat is not None else None
+    meta["barostat_tlak"] = sim.barostat.tlak_2d if sim.barostat is not None else None  # Izglađeni tlak, da se klip nastavi isto micati
+    mjerac = sim.wall_pressure
+    meta["wall_pressure"] = {"prozor": mjerac.prozor, "broj": mjerac.broj, "mjesto": mjerac.mjesto}
+    polja = {
+        "position": np.array(sim.position, dtype=np.float64),
+        "v": np.array(sim.v, dtype=np.float64),
+        "particle_mass": sim.store.mass.copy(),
+        "particle_radius": sim.store.radius.copy(),
+        "species": sim.store.species.copy(),
+        "wall_impuls": mjerac.impuls.copy(),
+        "wall_vrijeme": mjerac.vrijeme.copy(),
+        "wall_v2": mjerac.v2.copy(),
+    }
+    polja["povijest"] = sim.povijest.rows()  # Sirovi uzorci, razine sažetka se iz njih ponovno grade
+    return meta, polja
+
+
+
+
+def write_state(path, meta, polja):
+    """Piše header (JSON) i poravnana polja u jednu datoteku, atomski preko privremene datoteke"""
+    opisi = []
+    pomak = 0
+    for ime, polje in polja.items():
+        polje = np.ascontiguousarray(polje)
+        opisi.append({"name": ime, "dtype": polje.dtype.str, "shape": list(polje.shape), "offset": pomak})
+        pomak += -(-polje.nbytes // PORAVNANJE) * PORAVNANJE
+    header = json.dumps({"version": VERZIJA, "meta": meta, "arrays": opisi}).encode("utf-8")
+    pocetak = -(-(len(MAGIC) + 8 + len(header)) // PORAVNANJE) * PORAVNANJE
+
+    privremena = path + ".tmp"
+    with open(privremena, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for opis, polje in zip(opisi, polja.values()):
+            f.seek(pocetak + opis["offset"])
+            f.write(np.ascontiguousarray(polje).tobytes())
+        f.truncate(pocetak + pomak)
+    os.replace(privremena, path)
+
+
+
+
+def save(sim, path):
+    """Sprema stanje simulacije u datoteku path"""
+    meta, polja = state_dict(sim)
+    write_state(path, meta, polja)
+
+
+
+
+def read_state(path):
+    """Čita header i vraća polja kao memory-map (copy-on-write), bez kopiranja podataka"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s nije spremljena simulacija" % path)
+        duljina = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(duljina).decode("utf-8"))
+    if not 1 <= header["version"] <= VERZIJA:
+        raise ValueError("Spremljeno stanje je verzije %s, podržane su 1 do %s" % (header["version"], VERZIJA))
+    pocetak = -(-(len(MAGIC) + 8 + duljina) // PORAVNANJE) * PORAVNANJE
+    polja = {}
+    for opis in header["arrays"]:
+        oblik = tuple(opis["shape"])
+        if np.prod(oblik) == 0:
+            polja[opis["name"]] = np.zeros(oblik, dtype=opis["dtype"])
+        else:
+            polja[opis["name"]] = np.memmap(path, dtype=opis["dtype"], mode="c", offset=pocetak + opis["offset"], shape=oblik)
+    meta = header["meta"]
+    if header["version"] == 1:
+        migrate_v1(meta, polja)
+    return meta, polja
+
+
+
+
+def migrate_v1(meta, polja):
+    """Dopunjuje stanje verzije 1 onim što ono nema: jedna vrsta čestica, float64 na NumPyju, bez potencijala,
+    termostata i barostata; povijest se gradi iz lista_* (redni broj uzorka je vrijeme)"""
+    for ime, zadano in (("backend", "numpy"), ("dtype", "float64"), ("species", None), ("potential", None),
+                        ("thermostat", None), ("barostat", None), ("barostat_tlak", None)):
+        meta.setdefault(ime, zadano)
+    N = meta["N"]
+    polja.setdefault("particle_mass", np.full(N, meta["M"]))
+    polja.setdefault("particle_radius", np.full(N, meta["radius"]))
+    polja.setdefault("species", np.zeros(N, dtype=np.int64))
+    if "povijest" not in polja:
+        stare = [np.asarray(polja.pop(ime)) for ime in LISTE]
+        polja["povijest"] = np.column_stack([np.arange(len(stare[0]))] + stare)
+
+
+
+
+def restore_into(sim, path):
+    """Vraća spremljeno stanje u postojeću simulaciju (npr. onu koju prikaz već crta).
+
+    Spremnik čestica dobiva spremljeni dtype. Backend ostaje onaj koji simulacija već ima,
+    jer oba daju isti rezultat; ako se razlikuje od spremljenog, to se samo javlja."""
+    meta, polja = read_state(path)
+    if meta["species"] is not None:
+        sim.species = [vrste.Species(*s) for s in meta["species"]]  # Prije polumjera, jer za smjesu on ovisi o vrstama
+    if np.dtype(meta["dtype"]) != sim.dtype:
+        spremnik = cestice.ParticleStore(meta["N"], dtype=meta["dtype"])  # Stupci se pune ispod
+        spremnik.verzija = sim.store.verzija + 1  # Da integratori i mjerači vide promjenu
+        sim.store = spremnik
+    if meta["backend"] != sim.backend:
+        warnings.warn("Stanje je spremljeno s backendom %s, nastavlja se s %s." % (meta["backend"], sim.backend))
+    for ime in SKALARI:
+        setattr(sim, ime, meta[ime])
+    sim.border_rect = tuple(meta["border_rect"])
+    sim.dt_array = np.full((sim.N, 1), sim.dt)
+    sim.position = polja["position"]
+    sim.v = polja["v"]
+    for ime, stupac in (("particle_mass", "mass"), ("particle_radius", "radius"), ("species", "species")):
+        sim.store.set_column(stupac, polja[ime])
+    sim.rng = np.random.default_rng()
+    sim.rng.bit_generator.state = meta["rng_state"]
+    sim.povijest = povijest.TimeSeries()
+    for redak in np.asarray(polja["povijest"]):
+        sim.povijest.append(*redak)
+
+    mjerac = sim.wall_pressure
+    if mjerac.prozor != meta["wall_pressure"]["prozor"]:
+        mjerac.__init__(meta["wall_pressure"]["prozor"])
+    mjerac.reset()
+    mjerac.impuls[:] = polja["wall_impuls"]
+    mjerac.vrijeme[:] = polja["wall_vrijeme"]
+    mjerac.v2[:] = polja["wall_v2"]
+    mjerac.broj = meta["wall_pressure"]["broj"]
+    mjerac.mjesto = meta["wall_pressure"]["mjesto"]
+    mjerac.zbroj_impuls = mjerac.impuls.sum(axis=0)
+    mjerac.zbroj_vrijeme = float(mjerac.vrijeme.sum())
+    mjerac.zbroj_v2 = float(mjerac.v2.sum())
+
+    sim.potential = dinamika.make_potential(meta["potential"], sim.v0) if sim.integrator == "verlet" else None
+    sim.thermostat = termostati.make_thermostat(meta["thermostat"])
+    sim.barostat = termostati.make_barostat(meta["barostat"])
+    if sim.barostat is not None:
+        sim.barostat.tlak_2d = meta["barostat_tlak"]
+    sim.events = sim.make_integrator()
+    return sim
+
+
+
+
+def load(path):
+    """Stvara novu simulaciju iz spremljenog stanja"""
+    meta, _ = read_state(path)
+    sim = fizika.IdealGasSimulation(N=meta["N"], molar_mass=meta["M"], radius=meta["radius"], screen_width=meta["screen_width"], screen_height=0,
+                                    v0=meta["v0"], duration=meta["duration"], nsteps=meta["nsteps"], border_rect=tuple(meta["border_rect"]),
+                                    hard=meta["hard"], admin=meta["admin"], collision_engine=meta["collision_engine"], pressure_mode=meta["pressure_mode"],
+                                    seed=meta["seed"], backend=meta["backend"], dtype=meta["dtype"])
+    return restore_into(sim, path)
+
+
+
+
+class AutoSave(threading.Thread):
+    """Svakih `interval` sekundi sprema simulaciju; u petlji se samo kopira stanje, pisanje je u ovoj dretvi"""
+    def __init__(self, path, interval=60):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.zadnje = time.perf_counter()
+        self.red = queue.Queue(maxsize=1)
+        self.start()
+
+    def tick(self, sim):
+        """Zove se nakon svakog koraka, kopira stanje kad je vrijeme za spremanje"""
+        sada = time.perf_counter()
+        if sada - self.zadnje < self.interval or self.red.full():
+            return
+        self.zadnje = sada
+        self.red.put(state_dict(sim))
+
+    def run(self):
+        while True:
+            stanje = self.red.get()
+            if stanje is None:
+                return
+            write_state(self.path, *stanje)
+
+    def stop(self):
+        self.red.put(None)
+        self.join()
@@ -0,0 +1,161 @@
+import numpy as np
+
+
+
+
+#Susjedne ćelije koje se gledaju (pola susjedstva da se par ne broji dvaput)
+SUSJEDI = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+
+
+def pairs_all(r_next, radius):
+    """Referentna provjera svih parova (O(N^2)), služi za usporedbu s mrežom"""
+    N = len(r_next)
+    i, j = np.triu_indices(N, k=1)
+    d = r_next[i] - r_next[j]
+    blizu = (d * d).sum(axis=1) < (2 * radius) ** 2
+    return i[blizu], j[blizu]
+
+
+
+
+def grid_shape(radius, border_rect):
+    """Broj ćelija po osima za mrežu u kojoj ćelija nikad nije manja od 2*radius"""
+    velicina = max(2 * radius, 1e-9)
+    return max(1, int(border_rect[2] // velicina)), max(1, int(border_rect[3] // velicina))
+
+
+
+
+def grid_cells(r, border_rect, nx, ny):
+    """Ćelija (cx, cy) svake čestice, čestice izvan granice idu u rubne ćelije"""
+    cx = np.clip(((r[:, 0] - border_rect[0]) // (border_rect[2] / nx)).astype(np.intp), 0, nx - 1)
+    cy = np.clip(((r[:, 1] - border_rect[1]) // (border_rect[3] / ny)).astype(np.intp), 0, ny - 1)
+    return cx, cy
+
+
+
+
+def pairs_grid(r_next, radius, border_rect, radii=None, kandidati=None):
+    """Traži parove čestica koje se sudaraju pomoću mreže ćelija veličine 2*radius.
+
+    Ako su zadani polumjeri svake čestice (radii), ćelije su veličine najvećeg promjera,
+    a par se sudara kad je udaljenost manja od zbroja njihovih polumjera. Ako je zadan
+    kandidati (polje s jednim elementom), u njega se upiše broj parova iz susjednih ćelija
+    prije provjere udaljenosti."""
+    N = len(r_next)
+    if kandidati is not None:
+        kandidati[0] = 0
+    if N < 2:
+        prazno = np.empty(0, dtype=np.intp)
+        return prazno, prazno
+    if radii is not None:
+        radius = float(radii.max())
+
+    nx, ny = grid_shape(radius, border_rect)
+    cx, cy = grid_cells(r_next, border_rect, nx, ny)
+    celija = cx * ny + cy
+
+    # Sortira čestice po ćelijama, start i broj čestica za svaku ćeliju
+    redoslijed = np.argsort(celija, kind="stable")
+    broj = np.bincount(celija, minlength=nx * ny)
+    start = np.concatenate(([0], np.cumsum(broj)[:-1]))
+    s_cx = cx[redoslijed]
+    s_cy = cy[redoslijed]
+    mjesto = np.arange(N) - start[celija[redoslijed]]  # Indeks čestice unutar svoje ćelije
+    najvise = int(broj.max())
+
+    lista_i = []
+    lista_j = []
+    for ox, oy in SUSJEDI:
+        ncx = s_cx + ox
+        ncy = s_cy + oy
+        unutra = (ncx >= 0) & (ncx < nx) & (ncy >= 0) & (ncy < ny)
+        if not unutra.any():
+            continue
+        a = np.nonzero(unutra)[0]
+        susjed = ncx[a] * ny + ncy[a]
+        for k in range(najvise):
+            # k-ta čestica u susjednoj ćeliji
+            ima = k < broj[susjed]
+            if ox == 0 and oy == 0:
+                ima &= k > mjesto[a]  # U istoj ćeliji samo parovi i < j
+            if not ima.any():
+                continue
+            lista_i.append(a[ima])
+            lista_j.append(start[susjed[ima]] + k)
+
+    if not lista_i:
+        prazno = np.empty(0, dtype=np.intp)
+        return prazno, prazno
+    si = np.concatenate(lista_i)
+    sj = np.concatenate(lista_j)
+    if kandidati is not None:
+        kandidati[0] = len(si)
+
+    # Uska faza: stvarna udaljenost manja od 2*radius (ili zbroja polumjera)
+    i = redoslijed[si]
+    j = redoslijed[sj]
+    d = r_next[i] - r_next[j]
+    blizu = (d * d).sum(axis=1) < ((2 * radius) ** 2 if radii is None else (radii[i] + radii[j]) ** 2)
+    i, j = i[blizu], j[blizu]
+    zamjena = i > j
+    i[zamjena], j[zamjena] = j[zamjena], i[zamjena]
+    return i, j
+
+
+
+
+def resolve_pairs(position, v, i, j, mass=None, pomak=None, virial=None):
+    """Elastični sudar parova (jednake mase, ili mase svake čestice iz mass).
+
+    Rezultat je isti kao da se parovi računaju redom po (i, j) kao u referentnoj petlji,
+    jer zbrajanje više impulsa iz istih starih brzina ne čuva energiju. Parovi se računaju
+    u krugovima: u svakom krugu odjednom idu svi parovi kojima nijedna čestica nema
+    ranijeg neizračunatog para. Vraća broj parova koji su se stvarno sudarili.
+
+    pomak (parovi x 2) se oduzima od position[i] - position[j], npr. slika čestice j preko
+    periodične granice. Ako je zadan virial (polje s jednim elementom), dodaje mu se
+    zbroj r_ij . dp_i po sudarima (za tlak iz viralnog teorema)."""
+    if len(i) == 0:
+        return 0
+    preostali = np.lexsort((j, i))
+    sudara = 0
+    while len(preostali):
+        # Prvo pojavljivanje svake čestice među preostalim parovima (redom po (i, j))
+        _, prvo = np.unique(np.stack((i[preostali], j[preostali]), axis=1).ravel(), return_index=True)
+        spreman = np.bincount(prvo // 2, minlength=len(preostali)) == 2
+        k = preostali[spreman]
+        sudara += collide_disjoint(position, v, i[k], j[k], mass, None if pomak is None else pomak[k], virial)
+        preostali = preostali[~spreman]
+    return sudara
+
+
+
+
+def collide_disjoint(position, v, i, j, mass=None, pomak=None, virial=None):
+    """Elastični sudar parova u kojima se nijedna čestica ne ponavlja, vraća broj sudara"""
+    rdiff = position[i] - position[j]  # Vektor za česticu [i] i česticu [j]
+    if pomak is not None:
+        rdiff -= pomak
+    vdiff = v[i] - v[j]
+    rr = (rdiff * rdiff).sum(axis=1)
+    rr[rr == 0] = np.inf  # Čestice na istom mjestu se ne diraju
+    rv = (rdiff * vdiff).sum(axis=1)
+    rv[rv > 0] = 0  # Par koji se već udaljava (npr. još se preklapa od prošlog sudara) se ne sudara ponovno
+    impuls = (rv / rr)[:, None] * rdiff
+    sudara = int(np.count_nonzero((rv < 0) & (rr < np.inf)))
+    if mass is None:
+        if virial is not None:
+            virial[0] -= float(rv[rr < np.inf].sum())  # r . dp_i = -rv za jednake mase
+        v[i] -= impuls
+        v[j] += impuls
+        return sudara
+    # Promjena brzine je obrnuto razmjerna masi: 2*m_j/(m_i+m_j) za i, 2*m_i/(m_i+m_j) za j
+    ukupna = (mass[i] + mass[j])[:, None]
+    if virial is not None:
+        virial[0] -= float((rv * 2 * mass[i] * mass[j] / ukupna[:, 0])[rr < np.inf].sum())
+    v[i] -= impuls * (2 * mass[j][:, None] / ukupna)
+    v[j] += impuls * (2 * mass[i][:, None] / ukupna)
+    return sudara
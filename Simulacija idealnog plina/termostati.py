@@ -0,0 +1,234 @@
+import math
+import numpy as np
+import mjerenja
+import vrste
+
+
+
+
+def kinetic_temperature(v, weights=None):
+    """Trenutna kinetička temperatura: korijen srednjeg m v^2 / M (kao WallPressure.temperature, ali za jedno stanje)"""
+    if not len(v):
+        return 0.0
+    v2 = np.einsum("ij,ij->i", v, v, dtype=np.float64)
+    return math.sqrt(float(v2.mean() if weights is None else np.dot(weights, v2) / len(v2)))
+
+
+
+
+class Thermostat:
+    """Zajednički dio termostata: cilj je sim.v0 (ili zadani `target`), primjenjuje se svakih `every` koraka.
+
+    Brzine se mijenjaju na mjestu, pa položaji i ravnoteža ostaju; integrator od sudara
+    do sudara se obavještava preko sim.velocities_changed() onim što thermalize vrati
+    (faktor skaliranja ili indekse promijenjenih čestica), da ne mora ponovno predvidjeti sve sudare."""
+    kind = None
+
+    def __init__(self, target=None, every=1):
+        self.target = target
+        self.every = max(1, int(every))
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join("%s=%r" % par for par in self.to_dict().items() if par[0] != "kind"))
+
+    def to_dict(self):
+        return {"kind": self.kind, "target": self.target, "every": self.every}
+
+    def apply(self, sim):
+        """Zove se nakon svakog koraka simulacije"""
+        if sim.korak % self.every or not sim.N:
+            return
+        T0 = float(sim.v0 if self.target is None else self.target)
+        promjena = self.thermalize(sim, T0, self.every * sim.dt)
+        if promjena is not None:
+            sim.velocities_changed(**promjena)
+
+    def thermalize(self, sim, T0, dt):
+        """Mijenja brzine prema temperaturi T0 nakon vremena dt.
+
+        Vraća None ako brzine nisu promijenjene, inače argumente za sim.velocities_changed
+        ({"scale": faktor} ili {"indices": indeksi})."""
+        raise NotImplementedError
+
+
+
+
+class Rescale(Thermostat):
+    """Skaliranje brzina: kinetička temperatura se svaki put postavi točno na cilj"""
+    kind = "rescale"
+
+    def thermalize(self, sim, T0, dt):
+        T = kinetic_temperature(sim.v, sim.weights())
+        if T <= 0:
+            return None
+        v = sim.v  # Na mjestu; sim.v *= ... bi kroz setter zamijenio cijeli stupac
+        v *= T0 / T
+        return {"scale": T0 / T}
+
+
+
+
+class Berendsen(Thermostat):
+    """Berendsenov termostat: kinetička energija se eksponencijalno približava cilju s vremenskom konstantom tau (s).
+
+    Za T0 različit od trenutne temperature daje glatku rampu umjesto skoka."""
+    kind = "berendsen"
+
+    def __init__(self, tau=0.2, target=None, every=1):
+        super().__init__(target, every)
+        self.tau = tau
+
+    def to_dict(self):
+        podaci = super().to_dict()
+        podaci["tau"] = self.tau
+        return podaci
+
+    def thermalize(self, sim, T0, dt):
+        T = kinetic_temperature(sim.v, sim.weights())
+        if T <= 0:
+            return None
+        # Temperatura je brzina, pa je energija razmjerna T^2
+        faktor = math.sqrt(max(1 + min(dt / self.tau, 1.0) * ((T0 / T) ** 2 - 1), 0.0))
+        v = sim.v
+        v *= faktor
+        return {"scale": faktor}
+
+
+
+
+class Andersen(Thermostat):
+    """Andersenov termostat: svaka čestica se s učestalošću `frequency` (1/s) "sudari s kupkom"
+    i dobije novu brzinu iz Maxwell-Boltzmannove raspodjele na temperaturi cilja"""
+    kind = "andersen"
+
+    def __init__(self, frequency=2.0, target=None, every=1):
+        super().__init__(target, every)
+        self.frequency = frequency
+
+    def to_dict(self):
+        podaci = super().to_dict()
+        podaci["frequency"] = self.frequency
+        return podaci
+
+    def thermalize(self, sim, T0, dt):
+        odabrane = np.nonzero(sim.rng.random(sim.N) < -math.expm1(-self.frequency * dt))[0]
+        if not len(odabrane):
+            return None
+        sim.v[odabrane] = vrste.maxwell_boltzmann(sim.rng, len(odabrane), T0, sim.store.mass[odabrane], sim.M)
+        return {"indices": odabrane}
+
+
+
+
+TERMOSTATI = {klasa.kind: klasa for klasa in (Rescale, Berendsen, Andersen)}
+
+
+def make_thermostat(thermostat):
+    """Termostat iz imena ("rescale", "berendsen", "andersen"), rječnika (kao to_dict) ili postojećeg objekta"""
+    if thermostat is None or isinstance(thermostat, Thermostat):
+        return thermostat
+    if isinstance(thermostat, str):
+        thermostat = {"kind": thermostat}
+    postavke = dict(thermostat)
+    kind = postavke.pop("kind")
+    if kind not in TERMOSTATI:
+        raise ValueError("Nepoznat termostat: %r" % (kind,))
+    return TERMOSTATI[kind](**postavke)
+
+
+
+
+class Barostat:
+    """Klip koji drži tlak: granica se svaki korak malo pomakne prema volumenu u kojem je izmjereni tlak jednak cilju.
+
+    Tlak se mjeri iz impulsa predanog zidovima u zadnjem koraku, izglađeno s vremenskom
+    konstantom `smoothing` (s). Volumen se mijenja Berendsenovim pravilom
+    dV/V = dt/tau * (P - P0) / P0 (za idealni plin je stlačivost 1/P), najviše za `max_promjena`
+    po koraku i unutar [najmanji, najveci] L. Slobodni zidovi (desni i donji) se miču zajedno,
+    pa omjer stranica ostaje isti, a položaji se afino preslikaju u novu granicu.
+    S integratorom od sudara do sudara se čestice ne preslikavaju (to bi poništilo sve predviđene
+    sudare): klip pri sabijanju staje na najisturenijoj čestici, pa se ponovno predviđaju samo sudari sa zidom.
+    target je tlak u atm; None znači tlak kakav je bio kad je barostat prvi put primijenjen."""
+    def __init__(self, target=None, tau=2.0, smoothing=0.5, max_promjena=0.005, najmanji=150, najveci=500):
+        self.target = target
+        self.tau = tau
+        self.smoothing = smoothing
+        self.max_promjena = max_promjena
+        self.najmanji = najmanji
+        self.najveci = najveci
+        self.reset()
+
+    def __repr__(self):
+        return "Barostat(target=%r, tau=%r)" % (self.target, self.tau)
+
+    def to_dict(self):
+        return {"target": self.target, "tau": self.tau, "smoothing": self.smoothing, "max_promjena": self.max_promjena,
+                "najmanji": self.najmanji, "najveci": self.najveci}
+
+    def reset(self):
+        """Zaboravlja izglađeni tlak (npr. nakon skoka volumena ili broja čestica)"""
+        self.tlak_2d = None
+
+    def measure(self, sim):
+        """Izglađeni tlak u jedinicama simulacije iz impulsa u koraku koji upravo završava"""
+        x, y, w, h = sim.border_rect
+        trenutni = float(sim.wall_pressure.trenutni.sum()) / (sim.dt * 2 * (w + h))
+        if self.tlak_2d is None:
+            # Prvi uzorak: prosjek iz WallPressure ako ga ima, inače trenutni
+            self.tlak_2d = sim.wall_pressure.pressure_2d(sim.border_rect) if sim.wall_pressure.broj else trenutni
+        else:
+            self.tlak_2d += min(sim.dt / self.smoothing, 1.0) * (trenutni - self.tlak_2d)
+        return self.tlak_2d
+
+    def apply(self, sim):
+        """Zove se nakon svakog koraka, prije zatvaranja mjerenja (dok je impuls koraka još u wall_pressure.trenutni)"""
+        if not sim.N:
+            return
+        if self.target is None:
+            self.target = float(sim.pressure)
+        P = mjerenja.to_atm(self.measure(sim), sim.k_N, sim.temperature)
+        if P <= 0 or self.target <= 0:
+            return
+        promjena = min(max(sim.dt / self.tau * (P - self.target) / self.target, -self.max_promjena), self.max_promjena)
+        volume = min(max(sim.volume * (1 + promjena), self.najmanji), self.najveci)
+        if volume != sim.volume:
+            self.move_piston(sim, volume)
+
+    def move_piston(self, sim, volume):
+        """Postavlja granicu za novi volumen i afino preslikava položaje, bez novih polja i bez brisanja mjerenja"""
+        x, y, w, h = sim.border_rect
+        skala = math.sqrt(volume / sim.volume)
+        polumjeri = sim.store.radius[:, None] if sim.mixture else sim.radius
+        position = sim.position
+        if sim.integrator == "event" and skala < 1:
+            # Zid ne smije prijeći nijednu česticu
+            dalje = (position + polumjeri).max(axis=0)
+            skala = max(skala, (dalje[0] - x) / w, (dalje[1] - y) / h)
+            if skala >= 1:
+                return
+            volume = sim.volume * skala ** 2
+        nova = (x, y, w * skala, h * skala)
+        if sim.integrator == "event":
+            sim.border_rect = nova
+            sim.volume = float(volume)
+            sim.walls_moved()
+            return
+        pocetak = np.array((x, y))
+        # Unutrašnjost [x + r, x + w - r] ide u [x + r, x + w' - r], pa nijedna čestica ne izađe iz granice
+        udio = (np.array(nova[2:]) - 2 * polumjeri) / np.maximum(np.array((w, h)) - 2 * polumjeri, 1e-12)
+        position -= pocetak + polumjeri
+        position *= udio
+        position += pocetak + polumjeri
+        sim.border_rect = nova
+        sim.volume = float(volume)
+
+
+
+
+def make_barostat(barostat):
+    """Barostat iz True (zadane postavke), rječnika (kao to_dict) ili postojećeg objekta; None ili False znači bez barostata"""
+    if barostat is None or barostat is False or isinstance(barostat, Barostat):
+        return barostat or None
+    if barostat is True:
+        return Barostat()
+    return Barostat(**barostat)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+#Moduli simulacije su u direktoriju iznad testova (nije paket)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
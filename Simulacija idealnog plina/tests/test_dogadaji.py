@@ -0,0 +1,86 @@
+import numpy as np
+import dogadaji
+import fizika
+
+
+def simulacija(N=150, species=None, seed=2):
+    return fizika.IdealGasSimulation(N=N, molar_mass=0.032, radius=5, screen_width=800, screen_height=600, v0=100, duration=10, nsteps=1000,
+                                     border_rect=(50, 150, 500, 300), hard=1, seed=seed, integrator="event", species=species)
+
+
+def razmaci(sim):
+    """Najmanji razmak rubova svih parova diskova"""
+    p, r = sim.position, sim.store.radius
+    i, j = np.triu_indices(len(p), 1)
+    return np.sqrt(((p[i] - p[j]) ** 2).sum(axis=1)) - r[i] - r[j]
+
+
+class SviParovi(dogadaji.EventDriven):
+    """Referenca: sudari se traže sa svim česticama, a ne samo u susjednim ćelijama"""
+    def neighbours(self, i):
+        ostale = np.arange(self.N)
+        return ostale[ostale != i]
+
+
+def test_energija_i_bez_preklapanja():
+    sim = simulacija()
+    E0 = sim.energy()
+    for _ in range(200):
+        sim.step()
+    assert abs(sim.energy() / E0 - 1) < 1e-12
+    assert razmaci(sim).min() > -1e-9
+    x, y, w, h = sim.border_rect
+    assert (sim.position >= (x + 5 - 1e-9, y + 5 - 1e-9)).all() and (sim.position <= (x + w - 5 + 1e-9, y + h - 5 + 1e-9)).all()
+
+
+def test_smjesa_bez_preklapanja():
+    sim = simulacija(species=[(fizika.vrste.Species("a", 0.004, 3), 100), (fizika.vrste.Species("b", 0.04, 8), 50)])
+    E0 = sim.energy()
+    for _ in range(200):
+        sim.step()
+    assert abs(sim.energy() / E0 - 1) < 1e-12
+    assert razmaci(sim).min() > -1e-9
+
+
+def test_celije_kao_svi_parovi():
+    a, b = simulacija(N=200), simulacija(N=200)
+    mreza, referenca = dogadaji.EventDriven(a), SviParovi(b)
+    assert mreza.nx * mreza.ny > 1
+    sudara = [0, 0]
+    for _ in range(50):
+        sudara[0] += mreza.advance(0.01)
+        sudara[1] += referenca.advance(0.01)
+    assert sudara[0] == sudara[1] > 0
+    assert np.abs(a.position - b.position).max() < 1e-6
+
+
+def test_skaliranje_i_invalidacija_kao_rebuild():
+    a, b = simulacija(), simulacija()
+    for _ in range(20):
+        a.step()
+        b.step()
+    for sim in (a, b):
+        v = sim.v
+        v *= 1.3
+        v[:10] *= -1
+    a.events.scale_velocities(1.3)
+    a.events.invalidate(np.arange(10))
+    b.events.rebuild()
+    for _ in range(50):
+        a.step()
+        b.step()
+    assert np.abs(a.position - b.position).max() < 1e-6
+
+
+def test_klip_bez_preklapanja():
+    sim = fizika.IdealGasSimulation(N=150, molar_mass=0.032, radius=5, screen_width=800, screen_height=600, v0=100, duration=10, nsteps=1000,
+                                    border_rect=(50, 150, 500, 300), hard=1, seed=2, integrator="event", barostat={"target": 5.0, "tau": 0.05})
+    sim.barostat.najmanji = 60
+    V0, E0 = sim.volume, sim.energy()
+    for _ in range(200):
+        sim.step()
+    assert sim.volume < V0
+    assert abs(sim.energy() / E0 - 1) < 1e-12
+    assert razmaci(sim).min() > -1e-9
+    x, y, w, h = sim.border_rect
+    assert (sim.position >= (x + 5 - 1e-9, y + 5 - 1e-9)).all() and (sim.position <= (x + w - 5 + 1e-9, y + h - 5 + 1e-9)).all()
@@ -0,0 +1,19 @@
+import pytest
+import ansambl
+import eksperiment
+
+
+def test_tlak_je_cilj_barostata():
+    sim = ansambl.make_simulation({"N": 50, "hard": 0, "barostat": True}, seed=1)
+    tlak = sim.pressure
+    eksperiment.set_parameter(sim, "pressure", 2.5)
+    assert sim.barostat.target == 2.5
+    assert sim.pressure == tlak
+
+
+def test_tlak_bez_barostata():
+    sim = ansambl.make_simulation({"N": 50, "hard": 0}, seed=1)
+    with pytest.raises(ValueError):
+        eksperiment.set_parameter(sim, "pressure", 2.5)
+    with pytest.raises(ValueError):
+        eksperiment.Experiment({"N": 50}, schedule=["ramp pressure 1 2 over 100"])
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+import kerneli
+
+
+pytest.importorskip("numba")
+
+
+TOL = 1e-9
+
+
+def test_backendi_jedna_vrsta():
+    razlika = kerneli.compare_backends(N=300, koraka=100, tol=TOL)
+    assert razlika <= TOL
+
+
+def test_backendi_smjesa():
+    razlika = kerneli.compare_backends(N=300, koraka=100, tol=TOL, species=[("N2", 230), ("O2", 65), ("He", 5)])
+    assert razlika <= TOL
+
+
+def test_kandidati_isti_u_oba_backenda():
+    rng = np.random.default_rng(1)
+    polozaji = rng.uniform(0, 500, (2000, 2))
+    brzine = rng.normal(0, 1, (2000, 2))
+    brojevi = []
+    for backend in ("numpy", "numba"):
+        k = kerneli.make_kernels(backend)
+        k.collide(polozaji.copy(), polozaji.copy(), brzine.copy(), 5.0, (0, 0, 500, 500))
+        brojevi.append((int(k.kandidati[0]), k.parova, k.sudara))
+    assert brojevi[0] == brojevi[1]
+    assert brojevi[0][0] >= brojevi[0][1] >= brojevi[0][2] > 0
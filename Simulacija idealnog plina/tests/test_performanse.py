@@ -0,0 +1,31 @@
+import performanse
+
+
+def rezultati(**mjerenja):
+    return {"results": {ime: dict(vrijednosti) for ime, vrijednosti in mjerenja.items()}}
+
+
+def losija(redci):
+    return {(ime, metrika) for ime, metrika, stara, nova, omjer, losije in redci if losije}
+
+
+def test_brzine_i_memorija_relativno():
+    baseline = rezultati(steps={"N": 100, "steps_per_s": 100.0, "peak_mb": 10.0})
+    assert losija(performanse.compare(baseline, rezultati(steps={"N": 100, "steps_per_s": 90.0, "peak_mb": 11.0}))) == set()
+    assert losija(performanse.compare(baseline, rezultati(steps={"N": 100, "steps_per_s": 80.0, "peak_mb": 12.0}))) == {
+        ("steps", "steps_per_s"), ("steps", "peak_mb")}
+
+
+def test_pomak_energije_prema_granici():
+    baseline = rezultati(precision={"drift_float64": 1e-16, "drift_float32": 1e-7})
+    # Sto puta veći pomak, ali ispod granice, nije lošiji
+    assert losija(performanse.compare(baseline, rezultati(precision={"drift_float64": 1e-14, "drift_float32": 1e-6}))) == set()
+    assert losija(performanse.compare(baseline, rezultati(precision={"drift_float64": 1e-10, "drift_float32": 1e-6}))) == {
+        ("precision", "drift_float64")}
+
+
+def test_pomak_s_baselineom_nula():
+    baseline = rezultati(precision={"drift_float64": 0.0, "drift_float32": 0.0})
+    redci = performanse.compare(baseline, rezultati(precision={"drift_float64": 1e-10, "drift_float32": 0.0}))
+    assert losija(redci) == {("precision", "drift_float64")}
+    assert len(redci) == 2
@@ -0,0 +1,78 @@
+import warnings
+import numpy as np
+import pytest
+import fizika
+import spremanje
+
+
+def simulacija(**postavke):
+    return fizika.IdealGasSimulation(N=60, molar_mass=0.032, radius=5, screen_width=800, screen_height=600, v0=100, duration=10, nsteps=1000,
+                                     border_rect=(50, 150, 500, 300), hard=1, seed=3, **postavke)
+
+
+def test_nastavak_nakon_ucitavanja(tmp_path):
+    """Učitana simulacija nastavlja točno kao ona iz koje je spremljena"""
+    a = simulacija()
+    a.run(30)
+    put = str(tmp_path / "stanje.plin")
+    spremanje.save(a, put)
+    b = spremanje.load(put)
+    a.run(30)
+    b.run(30)
+    assert np.array_equal(a.position, b.position) and np.array_equal(a.v, b.v)
+    assert a.korak == b.korak and a.pressure == b.pressure
+
+
+def test_vraca_spremljeni_dtype(tmp_path):
+    a = simulacija(dtype="float32")
+    a.run(10)
+    put = str(tmp_path / "stanje.plin")
+    spremanje.save(a, put)
+    b = simulacija(dtype="float64")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        spremanje.restore_into(b, put)
+    assert b.dtype == np.float32 and b.position.dtype == np.float32
+    a.run(10)
+    b.run(10)
+    assert np.array_equal(a.position, b.position)
+
+
+def test_verzija_1(tmp_path):
+    """Stanje kakvo je pisala verzija 1: bez stupaca čestica, vrsta, dtype-a i povijesti (samo lista_*)"""
+    a = simulacija()
+    a.run(20)
+    meta, polja = spremanje.state_dict(a)
+    for ime in ("backend", "dtype", "species", "potential", "thermostat", "barostat", "barostat_tlak"):
+        del meta[ime]
+    for ime in ("particle_mass", "particle_radius", "species"):
+        del polja[ime]
+    redci = polja.pop("povijest")
+    for k, ime in enumerate(spremanje.LISTE):
+        polja[ime] = redci[:, k + 1]
+    put = str(tmp_path / "v1.plin")
+    verzija = spremanje.VERZIJA
+    try:
+        spremanje.VERZIJA = 1
+        spremanje.write_state(put, meta, polja)
+    finally:
+        spremanje.VERZIJA = verzija
+
+    b = spremanje.load(put)
+    assert b.dtype == np.float64 and b.backend == "numpy" and b.thermostat is None
+    assert np.array_equal(b.position, a.position)
+    assert (b.store.radius == 5).all() and (b.store.mass == 0.032).all() and (b.store.species == 0).all()
+    assert len(b.povijest.rows()) == len(redci)
+
+
+def test_nepoznata_verzija(tmp_path):
+    meta, polja = spremanje.state_dict(simulacija())
+    put = str(tmp_path / "v9.plin")
+    verzija = spremanje.VERZIJA
+    try:
+        spremanje.VERZIJA = 9
+        spremanje.write_state(put, meta, polja)
+    finally:
+        spremanje.VERZIJA = verzija
+    with pytest.raises(ValueError):
+        spremanje.load(put)
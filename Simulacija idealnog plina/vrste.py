@@ -0,0 +1,85 @@
+import numpy as np
+
+
+
+
+class Species:
+    """Vrsta čestica u smjesi: ime, molarna masa (kg/mol), polumjer (px) i boja za crtanje"""
+    def __init__(self, name, molar_mass, radius, boja=(0, 0, 0)):
+        self.name = name
+        self.molar_mass = molar_mass
+        self.radius = radius
+        self.boja = tuple(boja)
+
+    def __repr__(self):
+        return "Species(%r, %r, %r)" % (self.name, self.molar_mass, self.radius)
+
+
+#Česti plinovi, polumjeri su kinetički promjeri u istom omjeru kao O2 s polumjerom 5
+VRSTE = {
+    "O2": Species("O2", 0.032, 5.0, (0, 0, 0)),
+    "N2": Species("N2", 0.028, 5.3, (30, 60, 200)),
+    "Ar": Species("Ar", 0.040, 4.9, (200, 40, 40)),
+    "He": Species("He", 0.004, 3.8, (220, 160, 0)),
+    "Xe": Species("Xe", 0.131, 5.9, (120, 0, 160)),
+}
+
+
+
+
+def species_table(species):
+    """Pretvara [(ime ili Species, broj), ...] u (popis vrsta, broj čestica svake vrste)"""
+    popis = []
+    brojevi = []
+    for vrsta, broj in species:
+        popis.append(VRSTE[vrsta] if isinstance(vrsta, str) else vrsta)
+        brojevi.append(int(broj))
+    return popis, np.array(brojevi, dtype=np.int64)
+
+
+
+
+def columns(species, vrsta):
+    """Molarne mase i polumjeri čestica zadanih vrsta (vrsta je polje indeksa u species)"""
+    mase = np.array([s.molar_mass for s in species], dtype=float)[vrsta]
+    polumjeri = np.array([s.radius for s in species], dtype=float)[vrsta]
+    return mase, polumjeri
+
+
+
+
+def maxwell_boltzmann(rng, n, v0, molar_mass, reference_mass):
+    """Brzine n čestica iz 2D Maxwell-Boltzmannove raspodjele.
+
+    v0 je temperatura u jedinicama simulacije: čestica mase reference_mass ima srednji
+    kvadrat brzine v0^2, lakše su brže za sqrt(reference_mass / molar_mass)."""
+    sigma = v0 * np.sqrt(reference_mass / np.asarray(molar_mass, dtype=float) / 2)
+    return rng.normal(size=(n, 2)) * np.reshape(sigma, (-1, 1))
+
+
+
+
+def counts(store, broj_vrsta):
+    """Broj aktivnih čestica svake vrste"""
+    return np.bincount(store.species, minlength=broj_vrsta)
+
+
+def kinetic(store, broj_vrsta):
+    """Zbroj m*v^2 po vrstama (m je molarna masa)"""
+    v2 = np.einsum("ij,ij->i", store.v, store.v)
+    return np.bincount(store.species, weights=store.mass * v2, minlength=broj_vrsta)
+
+
+def temperatures(store, broj_vrsta, reference_mass):
+    """Kinetička temperatura svake vrste u jedinicama simulacije (kao sim.temperature)"""
+    n = np.maximum(counts(store, broj_vrsta), 1)  # Vrsta bez čestica ima temperaturu 0
+    return np.sqrt(kinetic(store, broj_vrsta) / (reference_mass * n))
+
+
+def partial_pressures(store, broj_vrsta, pressure):
+    """Parcijalni tlakovi: ukupni tlak podijeljen po udjelu vrste u kinetičkoj energiji"""
+    k = kinetic(store, broj_vrsta)
+    ukupno = k.sum()
+    if ukupno <= 0:
+        return np.zeros(broj_vrsta)
+    return pressure * k / ukupno